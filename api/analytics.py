@@ -1,41 +1,41 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import os
-from datetime import datetime
+from api.analytics_store import MAX_BODY_BYTES, parse_events, record_event, flush_events
 
-# NOTE: In a real "Push to GitHub" scenario, we would need 'requests' or 'PyGithub' installed
-# to make API calls to GitHub. Since this is a serverless function, we will simulate
-# the "Data Store" aspect by returning a success message.
-# The user asked to "push to github at the end of the day".
-# Real implementation requires a Cron Job (GitHub Action) + a Database.
-# This API endpoint is the "Collector".
+# Analytics collector. Accepts one event or an array of events, sent with
+# fetch (application/json) or navigator.sendBeacon (text/plain), and answers
+# 204 No Content. Events are appended to a local append-only store
+# (api/analytics_store.py): JSONL segments per day, written in batches from an
+# in-process buffer. On Vercel the store lives in /tmp of the function
+# instance; the self-hosted server (server.py) keeps it in
+# ANALYTICS_DIR (default: <tempdir>/thawe-analytics).
 
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            content_length = int(self.headers.get('Content-Length', 0))
+            if content_length > MAX_BODY_BYTES:
+                self.send_response(413)
+                self.end_headers()
+                return
 
-            # In a real app, we would write this 'data' (page, timestamp, user_agent)
-            # to a database like MongoDB, Supabase, or Redis (Vercel KV).
-            
-            # For this MVP, we acknowledge the receipt.
-            print(f"ANALYTICS RECEIVED: {data}")
+            events = parse_events(self.rfile.read(content_length))
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            # Buffered in memory only; no disk or network I/O before responding
+            # Only used for the unique-visitor sketches, never stored
+            visitor = f"{self.headers.get('x-forwarded-for', self.client_address[0])}|{self.headers.get('User-Agent', '')}"
+            for event in events:
+                record_event(event, visitor)
+
+            self.send_response(204)
             self.end_headers()
-            
-            response = {
-                "status": "success", 
-                "message": "Event logged", 
-                "server_time": datetime.now().isoformat()
-            }
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            self.wfile.flush()
+
+            # The instance is frozen after returning, so write the buffer out now
+            flush_events()
 
         except Exception as e:
-            self.send_response(500)
+            self.send_response(400 if isinstance(e, ValueError) else 500)
             self.send_header('Content-type', 'application/json')
             self.end_headers()
             self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
@@ -0,0 +1,291 @@
+import os  # File paths for the rollup files
+import json  # Rollups are stored as small JSON documents
+import threading  # Ingest and persist happen on different threads
+from urllib.parse import urlparse  # Referrers are rolled up by host
+from datetime import datetime, timedelta, timezone  # Hour / day buckets (UTC)
+from api.analytics_sketch import DaySketch  # Fixed-size uniques / top-K sketches per day
+
+try:
+    import fcntl  # Cross-process lock around read-merge-write of a rollup file (not on Windows)
+except ImportError:
+    fcntl = None
+
+# Pre-aggregated analytics, maintained incrementally as events are ingested.
+# record_event() adds each event to in-memory deltas; every store flush merges
+# the deltas into one rollup file per UTC hour and one per UTC day:
+#
+#   <ANALYTICS_DIR>/rollups/
+#     hour-2026-10-19T13.json   <- counts for that hour (kept HOUR_RETENTION_DAYS)
+#     day-2026-10-19.json       <- the same counts for the whole day
+#     sketch-2026-10-19.json    <- unique visitors, top referrers/screens, vitals percentiles (analytics_sketch.py)
+#
+# summarize() answers a time range from whole-day files plus the partial hours
+# at its edges, so its cost depends on the length of the range, never on how
+# many raw events were stored.
+#
+# A rollup: {"events": n, "pageviews": n, "types": {...}, "hours": {"2026-10-19T13": n},
+#            "paths": {...}, "referrers": {...}, "screens": {...}}
+DIMENSIONS = ("types", "paths", "referrers", "screens")
+MAX_KEYS = 1000  # Per dimension and file; rarer keys beyond this are counted as "(other)"
+MAX_RANGE_DAYS = 366
+
+# Hour files only serve the partial hours at the edges of a range; past this age
+# they are deleted and summarize() widens edges that old to whole days
+HOUR_RETENTION_DAYS = int(os.getenv("ANALYTICS_HOUR_RETENTION_DAYS", "31"))
+
+# Performance metrics kept as streaming percentiles per page: Web Vitals from
+# 'vitals' events, plus the convert round trip from 'conversion' events (ms)
+VITAL_METRICS = ("lcp", "inp", "cls", "ttfb")
+PERCENTILES = (50, 75, 95, 99)
+
+_deltas = {}  # Rollup file name -> pending counts not yet merged into the file
+_sketches = {}  # Day -> DaySketch of events not yet merged into its sketch file
+_lock = threading.Lock()
+_persist_lock = threading.Lock()
+_pruned = {"day": None}  # UTC day of the last hour-file pruning in this process
+
+
+def _rollup_dir():
+    from api.analytics_store import STORE_DIR  # Imported late: the store imports this module
+    return os.path.join(STORE_DIR, "rollups")
+
+
+def _empty():
+    return {"events": 0, "pageviews": 0, "hours": {}, **{dim: {} for dim in DIMENSIONS}}
+
+
+def _bump(counts, key, n=1):
+    if key in counts or len(counts) < MAX_KEYS:
+        counts[key] = counts.get(key, 0) + n
+    else:
+        counts["(other)"] = counts.get("(other)", 0) + n
+
+
+def merge(target, source):
+    """Adds the counts of one rollup into another (in place)"""
+    target["events"] += source.get("events", 0)
+    target["pageviews"] += source.get("pageviews", 0)
+    for hour, n in source.get("hours", {}).items():
+        target["hours"][hour] = target["hours"].get(hour, 0) + n
+    for dim in DIMENSIONS:
+        for key, n in source.get(dim, {}).items():
+            _bump(target[dim], key, n)
+    return target
+
+
+def referrer_host(referrer):
+    """'https://www.google.com/search?q=..' -> 'www.google.com'; empty -> '(direct)'"""
+    if not referrer:
+        return "(direct)"
+    return urlparse(str(referrer)).netloc.lower() or "(direct)"
+
+
+def _number(value):
+    """A finite, non-negative metric value, else None (beacons are untrusted input)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value if 0 <= value < 1e7 else None
+
+
+def _day_sketch(day):
+    sketch = _sketches.get(day)
+    if sketch is None:
+        sketch = _sketches[day] = DaySketch()
+    return sketch
+
+
+def add_event(event, received, visitor=None):
+    """
+    Counts one ingested event (received: its UTC datetime) into the pending deltas.
+    visitor is an opaque per-visitor key for the unique counts; it is only hashed
+    into a HyperLogLog, never stored.
+    """
+    hour = received.strftime("%Y-%m-%dT%H")
+    kind = str(event.get("type") or "pageview")[:40]  # Events from before typed beacons are pageviews
+    is_view = kind == "pageview"
+
+    with _lock:
+        for name in (f"hour-{hour}.json", f"day-{hour[:10]}.json"):
+            rollup = _deltas.get(name)
+            if rollup is None:
+                rollup = _deltas[name] = _empty()
+            rollup["events"] += 1
+            _bump(rollup["types"], kind)
+            if is_view:
+                rollup["pageviews"] += 1
+                rollup["hours"][hour] = rollup["hours"].get(hour, 0) + 1
+                _bump(rollup["paths"], str(event.get("path") or "/")[:200])
+                _bump(rollup["referrers"], referrer_host(event.get("referrer")))
+                _bump(rollup["screens"], str(event.get("screen") or "unknown")[:20])
+        path = str(event.get("path") or "/")[:200]
+        if is_view:
+            _day_sketch(hour[:10]).add(visitor, path, referrer_host(event.get("referrer")),
+                                       str(event.get("screen") or "unknown")[:20])
+        elif kind == "vitals":
+            for metric in VITAL_METRICS:
+                value = _number(event.get(metric))
+                if value is not None:
+                    _day_sketch(hour[:10]).add_vital(path, metric, value)
+        elif kind == "conversion" and _number(event.get("ms")) is not None:
+            _day_sketch(hour[:10]).add_vital(path, "conversion", event["ms"])
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return merge(_empty(), json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def _load_sketch(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return DaySketch.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def persist():
+    """Merges the pending deltas into the rollup files. Returns the number of files updated."""
+    with _lock:
+        if not _deltas and not _sketches:
+            return 0
+        pending = dict(_deltas)
+        sketches = dict(_sketches)
+        _deltas.clear()
+        _sketches.clear()
+
+    folder = _rollup_dir()
+    with _persist_lock:
+        os.makedirs(folder, exist_ok=True)
+        lock_file = open(os.path.join(folder, "rollup.lock"), "w")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # Other workers merge into the same files
+            for name, delta in pending.items():
+                path = os.path.join(folder, name)
+                _write(path, merge(_load(path) or _empty(), delta))
+            for day, delta in sketches.items():
+                path = os.path.join(folder, f"sketch-{day}.json")
+                existing = _load_sketch(path)
+                _write(path, (existing.merge(delta) if existing else delta).to_dict())
+            _prune_hours(folder)
+        finally:
+            lock_file.close()  # Also releases the flock
+    return len(pending) + len(sketches)
+
+
+def _prune_hours(folder, now=None):
+    """Deletes hour files older than HOUR_RETENTION_DAYS (once per UTC day and process)"""
+    now = now or datetime.now(timezone.utc)
+    if _pruned["day"] == now.date() or HOUR_RETENTION_DAYS <= 0:
+        return
+    _pruned["day"] = now.date()
+    cutoff = f"hour-{now - timedelta(days=HOUR_RETENTION_DAYS):%Y-%m-%dT%H}.json"
+    for name in os.listdir(folder):
+        if name.startswith("hour-") and name < cutoff:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def parse_bound(value, end=False):
+    """
+    'YYYY-MM-DD' or 'YYYY-MM-DDTHH' -> aligned UTC datetime.
+    For the end of a range a bare day means "through the end of that day".
+    """
+    value = (value or "").strip()
+    for fmt, step in (("%Y-%m-%dT%H", timedelta(hours=1)), ("%Y-%m-%d", timedelta(days=1))):
+        try:
+            moment = datetime.strptime(value[:13], fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        return moment + step if end else moment
+    raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD or YYYY-MM-DDTHH")
+
+
+def summarize(start=None, end=None):
+    """
+    Totals for [start, end) from the rollups (start/end are strings as accepted by
+    parse_bound; default: the last 24 hours). Raises ValueError on a bad range.
+    Unique visitors, top referrers/screens and the performance percentiles
+    (vitals) come from the day sketches, so they cover every day the range touches.
+    Only reads the rollup files: events still in memory show up after the next
+    store flush (which calls persist()).
+    """
+    if end:
+        end = parse_bound(end, end=True)
+    else:
+        end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    start = parse_bound(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise ValueError("'from' must be before 'to'")
+    if end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f"Range is limited to {MAX_RANGE_DAYS} days")
+    if HOUR_RETENTION_DAYS > 0:
+        # Edges older than the hour files widen to whole days ("from"/"to" report the range used)
+        horizon = datetime.now(timezone.utc) - timedelta(days=HOUR_RETENTION_DAYS - 1)
+        if start < horizon:
+            start = start.replace(hour=0)
+        if end < horizon and end.hour:
+            end = end.replace(hour=0) + timedelta(days=1)
+
+    folder = _rollup_dir()
+    total = _empty()
+    files_read = 0
+    cursor = start
+    while cursor < end:
+        # Whole days come from one file, the partial hours at the edges from hour files
+        if cursor.hour == 0 and cursor + timedelta(days=1) <= end:
+            name, cursor = f"day-{cursor:%Y-%m-%d}.json", cursor + timedelta(days=1)
+        else:
+            name, cursor = f"hour-{cursor:%Y-%m-%dT%H}.json", cursor + timedelta(hours=1)
+        rollup = _load(os.path.join(folder, name))
+        if rollup is not None:
+            merge(total, rollup)
+            files_read += 1
+
+    sketch = DaySketch()
+    day = start.replace(hour=0)
+    while day < end:
+        day_sketch = _load_sketch(os.path.join(folder, f"sketch-{day:%Y-%m-%d}.json"))
+        if day_sketch is not None:
+            sketch.merge(day_sketch)
+            files_read += 1
+        day += timedelta(days=1)
+
+    vitals = {}
+    for page, metrics in sketch.vitals.items():
+        vitals[page] = {}
+        for metric, digest in metrics.items():
+            report = {"count": digest.count()}
+            for pct in PERCENTILES:
+                value = digest.quantile(pct / 100)
+                report[f"p{pct}"] = round(value, 3) if metric == "cls" else round(value)
+            vitals[page][metric] = report
+
+    # [key, count] pairs, most frequent first (a list keeps the order through jsonify)
+    ranked = lambda counts: [[key, n] for key, n in sorted(counts.items(), key=lambda item: -item[1])]
+    return {
+        "from": start.strftime("%Y-%m-%dT%H:00Z"),
+        "to": end.strftime("%Y-%m-%dT%H:00Z"),
+        "events": total["events"],
+        "pageviews": total["pageviews"],
+        "hours": dict(sorted(total["hours"].items())),
+        **{dim: ranked(total[dim]) for dim in DIMENSIONS},
+        "uniqueVisitors": sketch.uniques.count(),
+        "uniqueVisitorsByPath": ranked({path: hll.count() for path, hll in sketch.paths.items()}),
+        "topReferrers": [list(item) for item in sketch.referrers.items()],
+        "topScreens": [list(item) for item in sketch.screens.items()],
+        "vitals": vitals,
+        "rollupsRead": files_read,
+    }
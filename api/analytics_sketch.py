@@ -0,0 +1,316 @@
+import zlib  # Sketch registers are mostly zeros on quiet days; compress them
+import math  # HyperLogLog estimate
+import base64  # Serialized sketches travel inside JSON
+import hashlib  # 64-bit hashes of visitors / keys
+from array import array  # Fixed-size counter tables
+
+# Fixed-memory probabilistic sketches for the analytics rollups.
+# Memory depends only on the sketch parameters, never on the traffic, and every
+# sketch merges with another of the same shape, so the rollups written by
+# separate workers / serverless instances can be combined:
+#
+#   HyperLogLog      - distinct visitors (about 1.6% error at p=12, 4 KB)
+#   CountMinSketch   - approximate counts per key (never under-counts)
+#   TopK             - Count-Min Sketch plus the k heaviest keys seen so far
+#   TDigest          - streaming percentiles (Web Vitals, conversion round trips)
+#
+# to_dict() / from_dict() give a JSON-safe form (zlib + base64 of the raw tables).
+
+
+def _hash64(value, salt=b""):
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8, salt=salt).digest(), "big")
+
+
+def _pack(data):
+    return base64.b64encode(zlib.compress(bytes(data))).decode("ascii")
+
+
+def _unpack(text):
+    return zlib.decompress(base64.b64decode(text))
+
+
+class HyperLogLog:
+    """Distinct-count estimator with 2**p one-byte registers"""
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError("HyperLogLog register count does not match p")
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1  # Position of the first 1 bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return int(round(estimate))
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def to_dict(self):
+        return {"p": self.p, "registers": _pack(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["p"], _unpack(data["registers"]))
+
+
+class CountMinSketch:
+    """depth x width counters; estimate(key) >= the true count"""
+
+    def __init__(self, width=1024, depth=4, counts=None):
+        self.width = width
+        self.depth = depth
+        self.counts = array("I", counts) if counts is not None else array("I", bytes(4 * width * depth))
+        if len(self.counts) != width * depth:
+            raise ValueError("CountMinSketch table size does not match width x depth")
+
+    def _cells(self, key):
+        # Two hashes give every row's column (Kirsch-Mitzenmacher)
+        h = _hash64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key, n=1):
+        for cell in self._cells(key):
+            self.counts[cell] = min(0xFFFFFFFF, self.counts[cell] + n)
+
+    def estimate(self, key):
+        return min(self.counts[cell] for cell in self._cells(key))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min Sketches of different shape")
+        self.counts = array("I", (min(0xFFFFFFFF, a + b) for a, b in zip(self.counts, other.counts)))
+        return self
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "counts": _pack(self.counts.tobytes())}
+
+    @classmethod
+    def from_dict(cls, data):
+        counts = array("I")
+        counts.frombytes(_unpack(data["counts"]))
+        return cls(data["width"], data["depth"], counts)
+
+
+class TopK:
+    """Heavy hitters: a Count-Min Sketch plus a bounded min-heap of candidate keys"""
+
+    def __init__(self, k=20, sketch=None, heap=None):
+        self.k = k
+        self.sketch = sketch or CountMinSketch()
+        self.top = dict(heap or {})  # key -> estimated count, at most k entries
+
+    def add(self, key, n=1):
+        self.sketch.add(key, n)
+        self._offer(key, self.sketch.estimate(key))
+
+    def _offer(self, key, estimate):
+        if key in self.top or len(self.top) < self.k:
+            self.top[key] = estimate
+            return
+        smallest = min(self.top, key=self.top.get)  # k is small: a linear scan is the cheapest heap
+        if estimate > self.top[smallest]:
+            del self.top[smallest]
+            self.top[key] = estimate
+
+    def items(self):
+        """[(key, estimated count)], heaviest first"""
+        return sorted(self.top.items(), key=lambda item: -item[1])
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        candidates = set(self.top) | set(other.top)
+        self.top = {}
+        for key in candidates:
+            self._offer(key, self.sketch.estimate(key))
+        return self
+
+    def to_dict(self):
+        return {"k": self.k, "sketch": self.sketch.to_dict(), "top": self.top}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["k"], CountMinSketch.from_dict(data["sketch"]), data["top"])
+
+
+class DaySketch:
+    """
+    One day of sketches: unique visitors overall and per path, top referrers
+    and screens, and a TDigest per (path, performance metric)
+    """
+
+    MAX_PATHS = 50  # Paths beyond this share one "(other)" HyperLogLog
+    PATH_PRECISION = 10  # 1 KB per path, about 3% error
+
+    def __init__(self):
+        self.uniques = HyperLogLog()
+        self.paths = {}
+        self.referrers = TopK()
+        self.screens = TopK()
+        self.vitals = {}  # path -> metric -> TDigest
+
+    def _path_slot(self, table, path):
+        return path if path in table or len(table) < self.MAX_PATHS else "(other)"
+
+    def add_vital(self, path, metric, value):
+        metrics = self.vitals.setdefault(self._path_slot(self.vitals, path), {})
+        metrics.setdefault(metric, TDigest()).add(value)
+
+    def add(self, visitor, path, referrer, screen):
+        if visitor:
+            self.uniques.add(visitor)
+            if path not in self.paths and len(self.paths) >= self.MAX_PATHS:
+                path = "(other)"
+            if path not in self.paths:
+                self.paths[path] = HyperLogLog(self.PATH_PRECISION)
+            self.paths[path].add(visitor)
+        self.referrers.add(referrer)
+        self.screens.add(screen)
+
+    def merge(self, other):
+        self.uniques.merge(other.uniques)
+        for path, hll in other.paths.items():
+            if path not in self.paths and len(self.paths) >= self.MAX_PATHS:
+                path = "(other)"
+            if path in self.paths:
+                self.paths[path].merge(hll)
+            else:
+                self.paths[path] = HyperLogLog(hll.p, hll.registers)
+        self.referrers.merge(other.referrers)
+        self.screens.merge(other.screens)
+        for path, metrics in other.vitals.items():
+            mine = self.vitals.setdefault(self._path_slot(self.vitals, path), {})
+            for metric, digest in metrics.items():
+                mine.setdefault(metric, TDigest(digest.compression)).merge(digest)
+        return self
+
+    def to_dict(self):
+        return {
+            "uniques": self.uniques.to_dict(),
+            "paths": {path: hll.to_dict() for path, hll in self.paths.items()},
+            "referrers": self.referrers.to_dict(),
+            "screens": self.screens.to_dict(),
+            "vitals": {path: {metric: digest.to_dict() for metric, digest in metrics.items()}
+                       for path, metrics in self.vitals.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.uniques = HyperLogLog.from_dict(data["uniques"])
+        sketch.paths = {path: HyperLogLog.from_dict(hll) for path, hll in data.get("paths", {}).items()}
+        sketch.referrers = TopK.from_dict(data["referrers"])
+        sketch.screens = TopK.from_dict(data["screens"])
+        sketch.vitals = {path: {metric: TDigest.from_dict(digest) for metric, digest in metrics.items()}
+                         for path, metrics in data.get("vitals", {}).items()}
+        return sketch
+
+
+class TDigest:
+    """
+    Streaming quantile estimator (merging t-digest): values are clustered into
+    at most ~compression centroids, small at the tails and wide in the middle,
+    so p95/p99 stay accurate in bounded memory.
+    """
+
+    def __init__(self, compression=100, centroids=None, minimum=None, maximum=None):
+        self.compression = compression
+        self.centroids = [list(c) for c in centroids or []]  # [mean, weight], sorted by mean
+        self.min = minimum
+        self.max = maximum
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        value = float(value)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self._buffer.append([value, weight])
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _scale(self, q):
+        # k1 scale function: centroids near q=0 and q=1 stay small
+        return self.compression / (2 * math.pi) * math.asin(2 * min(1.0, max(0.0, q)) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in items)
+        merged = [list(items[0])]
+        done = 0  # Weight of the centroids before the current one
+        for mean, weight in items[1:]:
+            current = merged[-1]
+            if self._scale((done + current[1] + weight) / total) - self._scale(done / total) <= 1:
+                current[1] += weight
+                current[0] += (mean - current[0]) * weight / current[1]
+            else:
+                done += current[1]
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def count(self):
+        self._compress()
+        return sum(w for _, w in self.centroids)
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0..1), None when empty"""
+        self._compress()
+        if not self.centroids:
+            return None
+        total = sum(w for _, w in self.centroids)
+        target = q * total
+        previous_mean, previous_mid = self.min, 0.0
+        seen = 0.0
+        for mean, weight in self.centroids:
+            mid = seen + weight / 2
+            if target < mid:
+                # Interpolate between neighbouring centroid centres
+                if mid == previous_mid:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (target - previous_mid) / (mid - previous_mid)
+            previous_mean, previous_mid = mean, mid
+            seen += weight
+        if total == previous_mid:
+            return self.max
+        return previous_mean + (self.max - previous_mean) * (target - previous_mid) / (total - previous_mid)
+
+    def merge(self, other):
+        other._compress()
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._buffer.extend([m, w] for m, w in other.centroids)
+        self._compress()
+        return self
+
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [[round(m, 4), w] for m, w in self.centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["compression"], data["centroids"], data.get("min"), data.get("max"))
@@ -0,0 +1,155 @@
+import os  # File paths for the event store
+import json  # Each event is one JSON line
+import time  # Buffer flush timing
+import atexit  # Flush buffered events when the process exits
+import threading  # Buffer locks and the flusher's wake-up event
+from datetime import datetime, timezone  # Events are partitioned by (UTC) day
+from api import analytics_rollup  # Hourly/daily rollups, updated as events come in
+from api import local_store  # Default location, segment naming and flusher thread shared with the audit spool
+
+# Append-only analytics event store.
+# record_event() only appends to an in-process buffer (no I/O on the request
+# path); a background thread writes the buffer to today's JSONL segment once it
+# holds ANALYTICS_BUFFER_SIZE events or ANALYTICS_FLUSH_SECONDS have passed.
+#
+#   $XDG_STATE_HOME/thawe-analytics/  (or <tempdir>/thawe-analytics/, /tmp on Vercel)
+#     events-2026-10-19.jsonl   <- one segment per UTC day
+#     rollups/                  <- pre-aggregated counts (api/analytics_rollup.py)
+STORE_DIR = os.getenv("ANALYTICS_DIR", local_store.default_dir("thawe-analytics"))
+
+ANALYTICS_BUFFER_SIZE = int(os.getenv("ANALYTICS_BUFFER_SIZE", "200"))
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+ANALYTICS_MAX_BUFFER = ANALYTICS_BUFFER_SIZE * 20  # Events beyond this are dropped if the disk is stuck
+
+MAX_BODY_BYTES = 64 * 1024  # A beacon carries a handful of small events; refuse anything bigger
+MAX_EVENTS_PER_REQUEST = 100
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_write_lock = threading.Lock()
+_wake = threading.Event()
+
+# Counters exposed through get_store_stats()
+_stats = {"received": 0, "written": 0, "dropped": 0, "writes": 0, "lastWriteMs": None}
+
+
+def segment_name(day):
+    """File name of the segment for a date (datetime/date) or 'YYYY-MM-DD' string"""
+    return local_store.segment_name("events", day)
+
+
+def list_segments():
+    """All segment file names, oldest first"""
+    return local_store.list_segments(STORE_DIR, "events")
+
+
+def _worker_loop():
+    while True:
+        _wake.wait(timeout=ANALYTICS_FLUSH_SECONDS)
+        _wake.clear()
+        try:
+            flush_events()
+        except Exception as e:
+            print(f"❌ Analytics flush failed: {e}")
+
+
+_worker = local_store.FlusherThread(_worker_loop, "analytics-flusher")
+
+
+def parse_events(body):
+    """
+    Reads a collector request body: one event object, an array of events, or
+    {"events": [...]}. Works for application/json and for navigator.sendBeacon
+    bodies (text/plain), since only the bytes are looked at.
+    Returns the list of event dicts (non-objects are skipped).
+    """
+    data = json.loads(body)
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        data = data["events"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise ValueError("Expected an event object or an array of events")
+    return [e for e in data[:MAX_EVENTS_PER_REQUEST] if isinstance(e, dict)]
+
+
+def record_event(event, visitor=None):
+    """
+    Buffers one event (a dict) for the store. Stamps it with the server's
+    receive time. visitor (e.g. IP + user agent) only feeds the unique-visitor
+    sketches and is not stored with the event.
+    Returns False if the buffer is full and the event was dropped.
+    """
+    event = dict(event)
+    received = datetime.now(timezone.utc)
+    event["receivedAt"] = received.isoformat(timespec="milliseconds")
+
+    with _buffer_lock:
+        if len(_buffer) >= ANALYTICS_MAX_BUFFER:
+            _stats["dropped"] += 1
+            return False
+        _buffer.append(event)
+        _stats["received"] += 1
+        full = len(_buffer) >= ANALYTICS_BUFFER_SIZE
+
+    analytics_rollup.add_event(event, received, visitor)
+
+    _worker.ensure()
+    if full:
+        _wake.set()
+    return True
+
+
+def flush_events():
+    """Writes everything buffered to today's segment in one append. Returns the number written."""
+    with _buffer_lock:
+        if not _buffer:
+            return 0
+        events = _buffer[:]
+        del _buffer[:]
+
+    started = time.monotonic()
+    data = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in events).encode("utf-8")
+    path = os.path.join(STORE_DIR, segment_name(datetime.now(timezone.utc)))
+    with _write_lock:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        # One O_APPEND write per flush keeps lines whole across worker processes
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    with _buffer_lock:
+        _stats["written"] += len(events)
+        _stats["writes"] += 1
+        _stats["lastWriteMs"] = round((time.monotonic() - started) * 1000, 2)
+
+    # The rollups are written with the events, so they never lag the raw log by more than one flush
+    analytics_rollup.persist()
+    return len(events)
+
+
+def iter_events(day):
+    """Yields every stored event of one UTC day"""
+    path = os.path.join(STORE_DIR, segment_name(day))
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # Half-written line at the end of a crashed write
+
+
+def get_store_stats():
+    """Buffer depth and write counters for monitoring"""
+    with _buffer_lock:
+        stats = dict(_stats)
+        stats["buffered"] = len(_buffer)
+    stats["segments"] = len(list_segments())
+    return stats
+
+
+atexit.register(flush_events)
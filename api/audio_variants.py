@@ -0,0 +1,48 @@
+import os  # Output paths and sizes
+import shutil  # Find ffmpeg on the PATH
+import subprocess  # ffmpeg does the decoding / encoding
+
+# Smaller encodings of the site's sound effects for build.py. Each clip is
+# trimmed of leading/trailing silence and written as Opus (Chrome, Firefox,
+# Edge, Safari 17+), AAC (older Safari / iOS) and MP3 (anything else); the page
+# lists them as <source> elements and the browser takes the first it can play:
+#
+#   Audio/bell.mp3 -> Audio/bell.ogg, Audio/bell.m4a, Audio/bell.mp3 (trimmed)
+#
+# Needs an ffmpeg binary (FFMPEG=/path/to/ffmpeg, or ffmpeg on the PATH);
+# without it the original MP3 is deployed as-is.
+FFMPEG = os.getenv("FFMPEG") or shutil.which("ffmpeg")
+
+# Below -60 dB at either end counts as silence: inaudible, while the bell's fading tail stays
+TRIM_FILTER = ("silenceremove=start_periods=1:start_threshold=-60dB,areverse,"
+               "silenceremove=start_periods=1:start_threshold=-60dB,areverse")
+
+# extension -> (<source type>, encoder arguments), in the order the browser should try them.
+# A short sound effect needs no more than mono at these rates.
+AUDIO_FORMATS = (
+    (".ogg", "audio/ogg; codecs=opus", ["-c:a", "libopus", "-b:a", "48k", "-ac", "1"]),
+    (".m4a", "audio/mp4", ["-c:a", "aac", "-b:a", "64k", "-ac", "1", "-movflags", "+faststart"]),
+    (".mp3", "audio/mpeg", ["-c:a", "libmp3lame", "-b:a", "80k", "-ac", "1"]),
+)
+
+
+def transcode(source, out_dir):
+    """
+    Writes the trimmed variants of `source` next to each other in out_dir
+    (the MP3 replaces a file of the same name) and returns
+    [(file name, source type, bytes)] in preference order, smallest formats first.
+    """
+    stem, source_ext = os.path.splitext(os.path.basename(source))
+    source_bytes = os.path.getsize(source)
+    variants = []
+    for ext, mime, args in AUDIO_FORMATS:
+        target = os.path.join(out_dir, stem + ext)
+        tmp_path = f"{target}.{os.getpid()}.tmp{ext}"  # ffmpeg picks the container from the extension
+        subprocess.run([FFMPEG, "-v", "error", "-y", "-i", source, "-af", TRIM_FILTER, "-map_metadata", "-1",
+                        *args, tmp_path], check=True, capture_output=True, timeout=120)
+        if ext == source_ext and os.path.getsize(tmp_path) >= source_bytes:
+            os.remove(tmp_path)  # Re-encoding didn't pay off: keep the original file
+        else:
+            os.replace(tmp_path, target)
+        variants.append((stem + ext, mime, os.path.getsize(target)))
+    return variants
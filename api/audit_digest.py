@@ -0,0 +1,194 @@
+import os  # File paths and environment variables
+import sys  # Exit code for cron
+import gzip  # The full day's detail is attached gzipped
+import json  # Records are written back out as JSONL
+import base64  # GitHub's contents API takes base64 file bodies
+import argparse  # Command line options
+from collections import Counter  # Per-language / per-document counts
+from datetime import datetime, timedelta  # "yesterday" by default
+from api import audit_spool  # Reads the day's records from the local spool
+from api.logger import AUDIT_MODE
+from api.github_transport import github_request, get_github_credentials
+
+# End-of-day audit digest: one compact GitHub comment per day instead of one
+# per conversion. Run it from cron shortly after midnight (with AUDIT_MODE=digest
+# set for the server so the flusher doesn't post entries one batch at a time):
+#
+#   5 0 * * *  cd /srv/thawedham && python -m api.audit_digest
+#
+# The full records are gzipped and committed to AUDIT_ARTIFACT_PATH in the
+# repository (needs a token with contents:write); the comment links to them.
+ARTIFACT_PATH = os.getenv("AUDIT_ARTIFACT_PATH", "audit")
+ARTIFACT_BRANCH = os.getenv("AUDIT_ARTIFACT_BRANCH")  # Default branch if unset
+TOP_DOCUMENTS = 5
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil without floats
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(records):
+    """Aggregates one day's audit records into the numbers shown in the digest"""
+    languages = Counter()
+    ips = set()
+    latencies = []
+    documents = Counter()
+    previews = {}
+
+    for record in records:
+        # Collapsed entries stand for `count` conversions, sampled repeats for 1/sampleRate
+        if record.get("type") == "collapsed":
+            weight = record.get("count", 0)
+        else:
+            weight = 1 / record["sampleRate"] if record.get("sampleRate") else 1
+        languages[record.get("targetLang") or "unknown"] += weight
+        ips.add(record.get("ip"))
+        if record.get("latencyMs") is not None:
+            latencies.append(record["latencyMs"])
+        digest = record.get("contentHash")
+        if digest:
+            documents[digest] += weight
+            if digest not in previews:
+                previews[digest] = str(audit_spool.resolve_content(record) or "")[:80]
+
+    latencies.sort()
+    return {
+        "conversions": round(sum(languages.values())),
+        "languages": {lang: round(n) for lang, n in languages.most_common()},
+        "uniqueIps": len(ips),
+        "latencyMs": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "topDocuments": [
+            {"hash": h, "count": round(n), "preview": previews[h]}
+            for h, n in documents.most_common(TOP_DOCUMENTS) if n > 1
+        ],
+    }
+
+
+def format_digest(day, summary, artifact_link=None):
+    """Creates the body of the daily GitHub comment (Markdown)"""
+    lat = summary["latencyMs"]
+    fmt = lambda v: "–" if v is None else f"{v / 1000:.1f}s"
+    lines = [
+        f"### 📊 Daily Activity Digest · {day}",
+        "| Metric | Detail |",
+        "| :--- | :--- |",
+        f"| **Conversions** | `{summary['conversions']}` |",
+        f"| **Unique IPs** | `{summary['uniqueIps']}` |",
+        f"| **Latency p50 / p90 / p99 / max** | `{fmt(lat['p50'])} / {fmt(lat['p90'])} / {fmt(lat['p99'])} / {fmt(lat['max'])}` |",
+        "",
+        "**By target language:** " + ", ".join(f"{lang} `{n}`" for lang, n in summary["languages"].items()),
+    ]
+    if summary["topDocuments"]:
+        lines += ["", "**Most repeated documents:**"]
+        for doc in summary["topDocuments"]:
+            preview = doc["preview"].replace("\n", " ").replace("`", "'")
+            lines.append(f"- `{doc['hash']}` × {doc['count']}: {preview}…")
+    if artifact_link:
+        lines += ["", f"📎 Full detail: {artifact_link}"]
+    return "\n".join(lines)
+
+
+def write_artifact(day, records):
+    """
+    Writes the day's records as gzipped JSONL next to the spool; returns (path, bytes).
+    Records carry only content hashes; each distinct body follows once as a
+    {"contentHash", "content"} line.
+    """
+    lines = [json.dumps(r, ensure_ascii=False) for r in records]
+    for digest in dict.fromkeys(r.get("contentHash") for r in records if r.get("contentHash")):
+        body = audit_spool.load_content(digest)
+        if body is not None:
+            lines.append(json.dumps({"contentHash": digest, "content": body}, ensure_ascii=False))
+    data = "".join(line + "\n" for line in lines).encode("utf-8")
+    packed = gzip.compress(data, compresslevel=9)
+    folder = os.path.join(audit_spool.SPOOL_DIR, "digests")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"audit-{day}.jsonl.gz")
+    with open(path, "wb") as f:
+        f.write(packed)
+    return path, packed
+
+
+def upload_artifact(day, packed):
+    """Commits the gzipped detail to the repository; returns its URL or None"""
+    _, repo, _ = get_github_credentials()
+    path = f"{ARTIFACT_PATH}/audit-{day}.jsonl.gz"
+    payload = {
+        "message": f"Audit detail for {day}",
+        "content": base64.b64encode(packed).decode("ascii"),
+    }
+    if ARTIFACT_BRANCH:
+        payload["branch"] = ARTIFACT_BRANCH
+
+    # Re-running the digest for a day replaces the file (needs its current sha)
+    existing = github_request("GET", f"/repos/{repo}/contents/{path}",
+                              params={"ref": ARTIFACT_BRANCH} if ARTIFACT_BRANCH else None)
+    if existing.status_code == 200:
+        payload["sha"] = existing.json().get("sha")
+
+    resp = github_request("PUT", f"/repos/{repo}/contents/{path}", json=payload)
+    if resp.status_code in (200, 201):
+        return resp.json().get("content", {}).get("html_url")
+    print(f"❌ Artifact upload failed: {resp.status_code} - {resp.text}")
+    return None
+
+
+def run_digest(day, dry_run=False):
+    """Builds and posts the digest for one day. Returns True on success."""
+    records = list(audit_spool.iter_day(day))
+    if not records:
+        print(f"ℹ️ No audit records for {day}, nothing to post")
+        return True
+
+    summary = summarize(records)
+    artifact_path, packed = write_artifact(day, records)
+    print(f"📦 Detail for {len(records)} record(s): {artifact_path} ({len(packed) / 1024:.1f} KB)")
+
+    if dry_run:
+        print(format_digest(day, summary, artifact_path))
+        return True
+
+    token, repo, issue_number = get_github_credentials()
+    if not token or not repo or not issue_number:
+        print(f"⚠️ Digest not posted: Missing creds. Token: {bool(token)}, Repo: {repo}, Issue: {issue_number}")
+        return False
+
+    link = upload_artifact(day, packed) or f"not uploaded, kept on the server at `{artifact_path}`"
+    resp = github_request("POST", f"/repos/{repo}/issues/{issue_number}/comments",
+                          json={"body": format_digest(day, summary, link)})
+    if resp.status_code != 201:
+        print(f"❌ GitHub API Error: {resp.status_code} - {resp.text}")
+        return False
+    print("✅ Digest posted to GitHub")
+
+    # In digest mode the day is now reported: mark its segment delivered
+    segment = audit_spool.segment_name(day)
+    current, _ = audit_spool.load_checkpoint()
+    if AUDIT_MODE == "digest" and (current is None or current <= segment):
+        size = os.path.getsize(os.path.join(audit_spool.SPOOL_DIR, segment))
+        audit_spool.save_checkpoint(segment, size)
+    audit_spool.prune_segments()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post one GitHub comment summarizing a day of conversions.")
+    parser.add_argument("--date", help="Day to summarize (YYYY-MM-DD), default: yesterday")
+    parser.add_argument("--dry-run", action="store_true", help="Print the digest instead of posting it")
+    args = parser.parse_args(argv)
+
+    day = args.date or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    return 0 if run_digest(day, dry_run=args.dry_run) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
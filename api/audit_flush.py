@@ -0,0 +1,29 @@
+from http.server import BaseHTTPRequestHandler
+import os
+import json
+from api.logger import flush_audit_log
+from api import audit_spool
+
+class handler(BaseHTTPRequestHandler):
+    """
+    Vercel Cron job (schedule in vercel.json): posts the audit entries spooled
+    in /tmp to GitHub. The convert functions only spool their entry and respond;
+    the logger's flusher thread delivers while an instance is warm, and this
+    catches up on what a frozen instance still holds. /tmp belongs to one
+    instance, so each run drains the instance it lands on.
+    Vercel sends "Authorization: Bearer $CRON_SECRET" when CRON_SECRET is set.
+    """
+    def do_GET(self):
+        secret = os.getenv('CRON_SECRET')
+        if secret and self.headers.get('Authorization') != f"Bearer {secret}":
+            status, payload = 401, {"error": "Unauthorized"}
+        else:
+            drained = flush_audit_log(timeout=20)
+            status, payload = 200, {"drained": drained, "pendingBytes": audit_spool.pending_bytes()}
+
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
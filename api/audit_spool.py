@@ -0,0 +1,304 @@
+import os  # File paths for the spool directory
+import json  # Each audit record is one JSON line
+import time  # To rate-limit the backlog size check
+import hashlib  # Content hashes for deduplicated translation bodies
+import threading  # Serializes appends from request threads
+from datetime import datetime  # Segments are partitioned by day
+from api import local_store  # Default location and segment naming shared with the analytics store
+
+try:
+    import fcntl  # Cross-process lock so only one flusher drains the spool (not on Windows)
+except ImportError:
+    fcntl = None
+
+# Append-only local spool for audit records.
+# The convert path appends one JSON line to today's segment (a local file write,
+# no network), and the logger's flusher drains it to GitHub, remembering how far
+# it got in checkpoint.json. Records survive restarts and GitHub outages.
+#
+#   $XDG_STATE_HOME/thawe-audit/  (or <tempdir>/thawe-audit/, /tmp on Vercel)
+#     audit-2026-10-19.jsonl   <- one segment per day
+#     checkpoint.json          <- {"segment": "...", "offset": <bytes already sent>}
+#     content/<hash>.txt       <- each distinct translation body, stored once
+#     posted.jsonl             <- content hashes already posted to GitHub (+ comment URL)
+#
+# The records hold client IPs and translated documents, so the default is never
+# inside the repo (which server.py serves as its static folder).
+SPOOL_DIR = os.getenv("AUDIT_SPOOL_DIR", local_store.default_dir("thawe-audit"))
+
+# Stop accepting records when this much is waiting to be sent (disk stays bounded, 0 = no limit)
+MAX_PENDING_BYTES = int(os.getenv("AUDIT_SPOOL_MAX_MB", "50")) * 1024 * 1024
+
+# Fully sent segments older than this are deleted
+RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "14"))
+
+CHECKPOINT_FILE = "checkpoint.json"
+POSTED_FILE = "posted.jsonl"
+_append_lock = threading.Lock()
+_backlog = {"checked": 0.0, "full": False}  # pending_bytes() is re-checked at most once a second
+
+
+def segment_name(day):
+    """File name of the segment for a date (datetime/date) or 'YYYY-MM-DD' string"""
+    return local_store.segment_name("audit", day)
+
+
+def list_segments():
+    """All segment file names, oldest first"""
+    return local_store.list_segments(SPOOL_DIR, "audit")
+
+
+def append_record(record):
+    """
+    Appends one record to today's segment.
+    Returns False (record not stored) if the backlog is over MAX_PENDING_BYTES.
+    """
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    path = os.path.join(SPOOL_DIR, segment_name(datetime.now()))
+    with _append_lock:
+        now = time.monotonic()
+        if MAX_PENDING_BYTES and now - _backlog["checked"] > 1.0:
+            _backlog["full"] = pending_bytes() + len(line) > MAX_PENDING_BYTES
+            _backlog["checked"] = now
+        if _backlog["full"]:
+            return False
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        # O_APPEND keeps lines whole even with several worker processes writing
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    return True
+
+
+def load_checkpoint():
+    """Position up to which records were delivered: (segment, byte offset)"""
+    try:
+        with open(os.path.join(SPOOL_DIR, CHECKPOINT_FILE)) as f:
+            data = json.load(f)
+        return data.get("segment"), int(data.get("offset", 0))
+    except (OSError, ValueError):
+        return None, 0
+
+
+def save_checkpoint(segment, offset):
+    """Atomically records delivery progress (write temp file, then rename)"""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    path = os.path.join(SPOOL_DIR, CHECKPOINT_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"segment": segment, "offset": offset}, f)
+    os.replace(tmp_path, path)
+
+
+def pending_bytes():
+    """Bytes appended but not yet delivered"""
+    segment, offset = load_checkpoint()
+    total = 0
+    for name in list_segments():
+        if segment and name < segment:
+            continue
+        size = os.path.getsize(os.path.join(SPOOL_DIR, name))
+        total += max(0, size - offset) if name == segment else size
+    return total
+
+
+def read_pending(limit):
+    """
+    Reads up to `limit` undelivered records starting at the checkpoint.
+    Returns (records, position) where position is passed to save_checkpoint()
+    once the records were delivered. Only whole lines are read, so a record
+    being appended at the same moment is left for the next round.
+    """
+    segment, offset = load_checkpoint()
+    records = []
+    position = (segment, offset)
+
+    for name in list_segments():
+        if segment and name < segment:
+            continue
+        start = offset if name == segment else 0
+        with open(os.path.join(SPOOL_DIR, name), "rb") as f:
+            f.seek(start)
+            while len(records) < limit:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # End of segment (or a half-written line)
+                start += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # Skip a corrupt line rather than blocking the spool forever
+                position = (name, start)
+        if len(records) >= limit:
+            break
+
+    return records, position
+
+
+def iter_day(day):
+    """Yields every record of one day's segment (delivered or not)"""
+    path = os.path.join(SPOOL_DIR, segment_name(day))
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def content_hash(content):
+    """Short SHA-256 of a translation body; audit records refer to bodies by this"""
+    return hashlib.sha256(str(content).encode("utf-8")).hexdigest()[:16]
+
+
+def store_content(digest, content):
+    """
+    Stores a translation body once under its hash.
+    Repeats of a popular document only refresh the file's mtime (for retention).
+    """
+    folder = os.path.join(SPOOL_DIR, "content")
+    path = os.path.join(folder, f"{digest}.txt")
+    os.makedirs(folder, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        os.utime(path)
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(str(content))
+    return True
+
+
+def load_content(digest):
+    """The stored body for a hash, or None if it was pruned"""
+    try:
+        with open(os.path.join(SPOOL_DIR, "content", f"{digest}.txt"), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def resolve_content(record):
+    """Body of a record: inline (older records) or from the content store"""
+    if record.get("content") is not None:
+        return record["content"]
+    return load_content(record.get("contentHash", ""))
+
+
+def load_posted():
+    """Hash -> URL of the GitHub comment that carries the full body"""
+    posted = {}
+    try:
+        with open(os.path.join(SPOOL_DIR, POSTED_FILE), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                    posted[item["hash"]] = item.get("url")
+                except (ValueError, KeyError):
+                    continue
+    except OSError:
+        pass
+    return posted
+
+
+def mark_posted(digests, url):
+    """Remembers that these bodies are now on GitHub (at url)"""
+    if not digests:
+        return
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    lines = "".join(json.dumps({"hash": d, "url": url}) + "\n" for d in digests)
+    with _append_lock, open(os.path.join(SPOOL_DIR, POSTED_FILE), "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+def prune_posted():
+    """
+    Drops posted.jsonl lines whose body was pruned from the content store, so the
+    file stays as small as the store. Returns the number of lines dropped.
+    Runs inside a drain (FlushLock held), the only place mark_posted() is called.
+    """
+    path = os.path.join(SPOOL_DIR, POSTED_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return 0
+    kept = []
+    for line in lines:
+        try:
+            digest = json.loads(line)["hash"]
+        except (ValueError, KeyError, TypeError):
+            continue
+        if os.path.exists(os.path.join(SPOOL_DIR, "content", f"{digest}.txt")):
+            kept.append(line)
+    if len(kept) == len(lines):
+        return 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with _append_lock:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.replace(tmp_path, path)
+    return len(lines) - len(kept)
+
+
+def prune_segments(today=None):
+    """
+    Deletes fully delivered segments (and unused content, with its posted.jsonl
+    lines) older than RETENTION_DAYS. Returns the number of posted lines dropped.
+    """
+    today = today or datetime.now()
+    segment, _ = load_checkpoint()
+    cutoff = segment_name(datetime.fromordinal(today.toordinal() - RETENTION_DAYS))
+    for name in list_segments():
+        # Only segments before the checkpoint segment are completely delivered
+        if name < cutoff and segment and name < segment:
+            try:
+                os.remove(os.path.join(SPOOL_DIR, name))
+            except OSError:
+                pass
+
+    # Bodies not seen for RETENTION_DAYS (the mtime is refreshed on every repeat)
+    folder = os.path.join(SPOOL_DIR, "content")
+    if segment and os.path.isdir(folder):
+        cutoff_ts = time.time() - RETENTION_DAYS * 86400
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            try:
+                if os.path.getmtime(path) < cutoff_ts:
+                    os.remove(path)
+            except OSError:
+                pass
+    return prune_posted()
+
+
+class FlushLock:
+    """
+    Non-blocking, cross-process lock around draining the spool, so several
+    server workers sharing one spool don't post the same records twice.
+    """
+
+    def __init__(self):
+        self._file = None
+
+    def acquire(self):
+        if fcntl is None:
+            return True
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        self._file = open(os.path.join(SPOOL_DIR, "flush.lock"), "w")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,194 @@
+import os  # File paths for the spool directory
+import re  # To validate upload IDs before touching the disk
+import json  # Upload metadata is stored next to the data as JSON
+import time  # Timestamps for expiring abandoned uploads
+import hashlib  # To verify the assembled file against the client's checksum
+import secrets  # Unguessable upload IDs
+import tempfile  # Default spool location (/tmp on Vercel and Linux)
+import threading  # Fallback chunk lock where fcntl is missing
+from api.upload import UPLOAD_LIMITS
+
+try:
+    import fcntl  # Cross-process lock so two PUTs for the same offset can't both append (not on Windows)
+except ImportError:
+    fcntl = None
+
+# Resumable chunked uploads: initiate -> PUT chunks by offset -> finalize.
+# Chunks are appended to a spool file on disk, so a dropped connection only
+# loses the chunk in flight; the client asks for the current offset and continues.
+#
+# The spool is local to one machine. On Vercel /tmp belongs to a single function
+# instance: an upload only resumes while its requests reach that instance, and
+# one that lands elsewhere gets a 404 (script.js then starts over, once). Servers
+# with several machines need UPLOAD_SPOOL_DIR on shared storage or sticky routing.
+SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "thawe-uploads"))
+
+# Abandoned uploads are removed after this many seconds
+UPLOAD_TTL = 60 * 60
+
+# Upload IDs are URL-safe tokens; anything else is rejected (no path tricks)
+_UPLOAD_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+_append_lock = threading.Lock()  # Only used without fcntl (single-process servers)
+
+
+def _paths(upload_id):
+    """Returns the (metadata, data) file paths for an upload, or None for a bad ID"""
+    if not upload_id or not _UPLOAD_ID.match(upload_id):
+        return None
+    base = os.path.join(SPOOL_DIR, upload_id)
+    return base + ".json", base + ".part"
+
+
+def _status(meta, data_path):
+    """Public view of an upload: how much arrived and how much is expected"""
+    return {
+        "uploadId": meta["uploadId"],
+        "offset": os.path.getsize(data_path),
+        "size": meta["size"],
+        "chunkSize": UPLOAD_LIMITS["chunkSize"],
+    }
+
+
+def cleanup_stale_uploads(now=None):
+    """Deletes spool files of uploads that were never finalized"""
+    now = now or time.time()
+    if not os.path.isdir(SPOOL_DIR):
+        return
+    for name in os.listdir(SPOOL_DIR):
+        path = os.path.join(SPOOL_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > UPLOAD_TTL:
+                os.remove(path)
+        except OSError:
+            pass  # Already removed by another worker
+
+
+def create_upload(size, mime_type, target_lang, sha256=None, client_meta=None):
+    """
+    Starts a chunked upload and reserves its spool files.
+    Returns (error, status, info).
+    """
+    if not isinstance(size, int) or size <= 0 or not mime_type or not target_lang:
+        return "Missing required fields", 400, None
+    if mime_type not in UPLOAD_LIMITS["acceptedTypes"]:
+        return f"Unsupported file type: {mime_type}", 415, None
+    if size > UPLOAD_LIMITS["maxChunkedBytes"]:
+        return f"Image too large ({size} bytes, limit {UPLOAD_LIMITS['maxChunkedBytes']})", 413, None
+
+    cleanup_stale_uploads()
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+
+    meta = {
+        "uploadId": secrets.token_urlsafe(18),
+        "size": size,
+        "mimeType": mime_type,
+        "targetLang": target_lang,
+        "sha256": sha256,
+        "client": client_meta if isinstance(client_meta, dict) else {},
+        "created": time.time(),
+    }
+    meta_path, data_path = _paths(meta["uploadId"])
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    open(data_path, "wb").close()
+
+    return None, 201, _status(meta, data_path)
+
+
+def get_upload(upload_id):
+    """
+    Looks up an upload so the client can resume from the returned offset.
+    Returns (error, status, info).
+    """
+    paths = _paths(upload_id)
+    if not paths or not os.path.exists(paths[0]) or not os.path.exists(paths[1]):
+        return "Upload not found", 404, None
+    with open(paths[0]) as f:
+        meta = json.load(f)
+    return None, 200, _status(meta, paths[1])
+
+
+def write_chunk(upload_id, offset, chunk):
+    """
+    Appends one chunk at the given offset.
+    The offset must equal the bytes already received, so retried chunks are
+    detected (409 with the current offset) instead of being written twice.
+    The check and the append happen under a lock on the data file, so two
+    requests racing with the same chunk (a retry overtaking the original)
+    can't both append it.
+    Returns (error, status, info).
+    """
+    error, status, info = get_upload(upload_id)
+    if error:
+        return error, status, None
+    if not chunk or len(chunk) > UPLOAD_LIMITS["chunkSize"]:
+        return f"Chunk must be 1-{UPLOAD_LIMITS['chunkSize']} bytes", 400, info
+
+    _, data_path = _paths(upload_id)
+    try:
+        f = open(data_path, "r+b")  # Not "ab": the file must already exist
+    except FileNotFoundError:
+        return "Upload not found", 404, None
+    with f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)  # Released when the file is closed
+        else:
+            _append_lock.acquire()
+        try:
+            info["offset"] = os.fstat(f.fileno()).st_size
+            if offset != info["offset"]:
+                return "Offset mismatch", 409, info
+            if offset + len(chunk) > info["size"]:
+                return "Chunk goes past the declared size", 400, info
+            f.seek(0, os.SEEK_END)
+            f.write(chunk)
+        finally:
+            if fcntl is None:
+                _append_lock.release()
+
+    info["offset"] += len(chunk)
+    return None, 200, info
+
+
+def finish_upload(upload_id):
+    """
+    Assembles a fully received upload. The spool files stay until the caller
+    calls discard_upload() once the conversion succeeded (or failed for good),
+    so a Gemini error or timeout can be retried without sending the chunks again.
+    Returns (error, status, result) where result holds the bytes and the
+    fields given at initiate time (mimeType, targetLang, client metadata).
+    """
+    error, status, info = get_upload(upload_id)
+    if error:
+        return error, status, None
+    if info["offset"] != info["size"]:
+        return "Upload incomplete", 409, info
+
+    meta_path, data_path = _paths(upload_id)
+    with open(meta_path) as f:
+        meta = json.load(f)
+    with open(data_path, "rb") as f:
+        data = f.read()
+
+    # Chunks were written to disk; make sure they are the file the client hashed
+    if meta.get("sha256") and hashlib.sha256(data).hexdigest() != meta["sha256"]:
+        discard_upload(upload_id)
+        return "Checksum mismatch, please upload again", 422, None
+
+    return None, 200, {
+        "bytes": data,
+        "mimeType": meta["mimeType"],
+        "targetLang": meta["targetLang"],
+        "client": meta["client"],
+    }
+
+
+def discard_upload(upload_id):
+    """Removes an upload's spool files (finished or cancelled)"""
+    paths = _paths(upload_id)
+    for path in paths or ():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,101 @@
+import os  # Sibling .br / .gz files
+import gzip  # Always available
+import io  # Build the gzip stream in memory
+
+try:
+    import brotli  # Smaller than gzip for text (optional dependency)
+except ImportError:
+    brotli = None
+
+# Content-Encoding for server.py.
+# Static text files are compressed once at build time (build.py writes
+# style.css.br / style.css.gz next to style.css at maximum compression), so a
+# request only picks the right sibling and costs no CPU. Dynamic JSON is
+# compressed per response at a fast level instead.
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.webmanifest')
+MIN_SIZE = 1024  # Below this the headers cost more than compression saves
+
+# encoding -> file suffix, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Encodings the client accepts (q > 0) from an Accept-Encoding header"""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    if '*' in accepted:
+        accepted |= {'br', 'gzip'}
+    return accepted
+
+
+def pick_precompressed(path, accept_header):
+    """(sibling path, encoding) of the best precompressed copy the client accepts, else (None, None)"""
+    accepted = accepted_encodings(accept_header)
+    if not accepted or not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return None, None
+    try:
+        source_mtime = os.path.getmtime(path)
+    except OSError:
+        return None, None
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding not in accepted:
+            continue
+        try:
+            # A sibling older than the file itself is stale (the file was edited after the build)
+            if os.path.getmtime(path + suffix) >= source_mtime:
+                return path + suffix, encoding
+        except OSError:
+            continue
+    return None, None
+
+
+def pick_encoding(accept_header):
+    """The encoding compress_body() would use for this Accept-Encoding ('br', 'gzip' or None)"""
+    accepted = accepted_encodings(accept_header)
+    if 'br' in accepted and brotli is not None:
+        return 'br'
+    return 'gzip' if 'gzip' in accepted else None
+
+
+def compress_body(body, accept_header, level='fast'):
+    """(compressed bytes, encoding) for a response body, or (None, None) if not worth it"""
+    if len(body) < MIN_SIZE:
+        return None, None
+    encoding = pick_encoding(accept_header)
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if level == 'max' else 4), 'br'
+    if encoding == 'gzip':
+        buffer = io.BytesIO()
+        # mtime=0 keeps the output identical for identical input (stable build artifacts)
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9 if level == 'max' else 6, mtime=0) as f:
+            f.write(body)
+        return buffer.getvalue(), 'gzip'
+    return None, None
+
+
+def precompress_file(path):
+    """Writes path.br and path.gz at maximum compression; returns {encoding: size} of those kept"""
+    with open(path, 'rb') as f:
+        body = f.read()
+    sizes = {}
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding == 'br' and brotli is None:
+            continue
+        data, _ = compress_body(body, encoding, level='max')
+        if data is None or len(data) >= len(body):
+            continue  # Already compressed, or too small to gain anything
+        with open(path + suffix, 'wb') as f:
+            f.write(data)
+        sizes[encoding] = len(data)
+    return sizes
@@ -1,9 +1,9 @@
 import os  # To access environment variables
-import base64  # To decode the base64 image data from the frontend
 import json  # To handle JSON input and output
+import time  # To time each conversion for the audit log
 from http.server import BaseHTTPRequestHandler  # Vercel's standard Python handler
-from google import genai  # The official Google Gemini AI SDK
-from google.genai import types  # Types for the SDK parts
+from api.translate import translate_document  # Gemini call shared with server.py
+from api.upload import UPLOAD_LIMITS, decode_upload, check_upload, describe_upload  # Upload size negotiation
 
 class handler(BaseHTTPRequestHandler):
     """
@@ -37,6 +37,7 @@ class handler(BaseHTTPRequestHandler):
             image_data = data.get('image')      # The Base64 string of the image
             mime_type = data.get('mimeType')    # e.g., "image/png"
             target_lang = data.get('targetLang') # e.g., "Hindi", "English"
+            upload_meta = data.get('upload')    # Sizes reported by the browser after resizing
 
             # Validate required fields
             if not image_data or not mime_type or not target_lang:
@@ -46,6 +47,21 @@ class handler(BaseHTTPRequestHandler):
                 self.wfile.write(json.dumps({"error": "Missing required fields"}).encode())
                 return
 
+            # Decode the base64 string back into raw bytes and check it against the advertised limits
+            image_bytes = decode_upload(image_data)
+            if image_bytes is None:
+                upload_error, upload_status = "Invalid image data", 400
+            else:
+                upload_error, upload_status, upload_record = check_upload(image_bytes, mime_type, upload_meta)
+                # Record what the client actually sent (Vercel Runtime Logs)
+                print(f"📦 [UPLOAD] {describe_upload(upload_record)}")
+            if upload_error:
+                self.send_response(upload_status)
+                self.send_header('Content-type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": upload_error, "limits": UPLOAD_LIMITS}).encode())
+                return
+
             # 2. Configure Google Gemini AI
             # Retrieve API Key from environment variables (set in Vercel settings)
             api_key = os.getenv("GEMINI_API_KEY")
@@ -53,36 +69,13 @@ class handler(BaseHTTPRequestHandler):
                  # Critical error if key is missing
                  raise ValueError("GEMINI_API_KEY not found")
             
-            # Initialize the Gemini Client with the API key
-            client = genai.Client(api_key=api_key)
-
-            # 3. Construct the AI Prompt
-            # Explicit instruction to the AI model
-            prompt_text = f"""Analyze this image containing text in Kaithi or Urdu script. Translate the full content into {target_lang}.
-            
-            Output strictly in this format:
-            
-            Translated text :
-            -------
-            [Insert the translation here]
-            
-            Do NOT provide the original transcription or any explanations."""
-
-            # 4. Prepare the Image
-            # Decode the base64 string back into raw bytes for Gemini
-            image_bytes = base64.b64decode(image_data)
-            
-            # 5. Call Gemini API
-            # Use 'gemini-2.5-flash' model (Latest, fast, and cost-effective)
-            response = client.models.generate_content(
-                model='gemini-2.5-flash', 
-                contents=[
-                    prompt_text,
-                    types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
-                ]
-            )
+            # 3. Call Gemini API
+            # Prompt and model ('gemini-2.5-flash') live in api/translate.py
+            started = time.monotonic()
+            text = translate_document(api_key, image_bytes, mime_type, target_lang)
+            latency_ms = (time.monotonic() - started) * 1000
 
-            # 6. Silent Logging (Audit Trail)
+            # 4. Silent Logging (Audit Trail)
             # This block is wrapped in try/except so it NEVER crashes the user experience
             try:
                 # Get User IP address (from Vercel headers)
@@ -95,7 +88,7 @@ class handler(BaseHTTPRequestHandler):
                     # Import logger module here 
                     from api.logger import log_to_github
                     # Send data to GitHub
-                    log_to_github(user_ip, target_lang, response.text)
+                    log_to_github(user_ip, target_lang, text, latency_ms)
                 except ImportError:
                     print("Logger module not found (local dev or missing requests).")
                 except Exception as gh_err:
@@ -103,15 +96,20 @@ class handler(BaseHTTPRequestHandler):
             except Exception as log_general:
                  print(f"General Logging Error: {log_general}")
 
-            # 7. Send Success Response
+            # 5. Send Success Response
+            # The spooled audit entry is posted by the logger's flusher while this
+            # instance is warm, or by the api/audit_flush.py cron: nothing runs after this
+            payload = json.dumps({"text": text}).encode()
             self.send_response(200) # HTTP OK
             self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('Connection', 'close')
             self.end_headers()
             # Send the AI's text response back to the frontend
-            self.wfile.write(json.dumps({"text": response.text}).encode())
+            self.wfile.write(payload)
 
         except Exception as e:
-            # 8. Global Error Handling
+            # 6. Global Error Handling
             # Catch unexpected crashes and return a proper JSON error
             self.send_response(500) # Internal Server Error
             self.send_header('Content-type', 'application/json')
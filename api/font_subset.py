@@ -0,0 +1,251 @@
+import os  # Source cache and output paths
+import re  # Class names, icon code points
+import io  # Fonts are subset in memory
+import sys  # Exit code for the command line
+import json  # The source lock file
+import hashlib  # Source files are checked against their pinned SHA-256
+import argparse  # Command line options
+
+try:
+    from fontTools import subset as ft_subset  # Font subsetting (optional dependency)
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:
+    ft_subset = None
+
+from api.minify import critical_css, minify_css
+
+# Self-hosted, subsetted fonts for build.py: the pages load Cinzel and Outfit
+# from Google Fonts and the whole Font Awesome 6.4 (all.min.css, ~100 KB plus
+# three ~100-150 KB fonts) from cdnjs, for two dozen icons.
+#
+# The build scans the pages and script.js for the characters and `fa-*`
+# classes in use, keeps only those glyphs (WOFF2) and writes fonts.css with the
+# @font-face rules and the Font Awesome rules those classes need:
+#
+#   dist/fonts.css
+#   dist/fonts/cinzel.woff2, outfit.woff2, fa-solid.woff2, fa-brands.woff2
+#
+# Sources are pinned in font-sources.lock.json: the exact URL (google/fonts at
+# a commit, Font Awesome at a release) and the SHA-256 of every file. A build
+# only downloads what the lock lists, into FONT_SOURCE_DIR (or they are put
+# there by hand for offline builds), and refuses a file whose checksum differs.
+# To pin (or move to newer) sources, review the diff, then commit the lock:
+#
+#   python -m api.font_subset --lock
+#
+# Until a lock is committed, build.py leaves the Google Fonts / cdnjs links alone.
+#
+# Devanagari isn't in either text font; the browser keeps using a system font
+# for it, as it does today.
+SCANNED_FILES = ("index.html", "rituals-news.html", "script.js")
+
+GOOGLE_FONTS_REPO = "google/fonts"
+GOOGLE_FONTS_RAW = "https://raw.githubusercontent.com/google/fonts/{ref}/{path}"
+
+# family, source (variable TTF in the google/fonts repo), weights used by the pages, output
+TEXT_FONTS = (
+    ("Cinzel", "ofl/cinzel/Cinzel%5Bwght%5D.ttf", (400, 800), "cinzel.woff2"),
+    ("Outfit", "ofl/outfit/Outfit%5Bwght%5D.ttf", (300, 700), "outfit.woff2"),
+)
+
+FA_VERSION = "6.4.0"
+FA_BASE_URL = f"https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FA_VERSION}"
+# style -> (classes selecting it, source font, family, weight, output)
+FA_STYLES = {
+    "solid": (("fas", "fa-solid", "fa"), "fa-solid-900.woff2", "Font Awesome 6 Free", 900, "fa-solid.woff2"),
+    "regular": (("far", "fa-regular"), "fa-regular-400.woff2", "Font Awesome 6 Free", 400, "fa-regular.woff2"),
+    "brands": (("fab", "fa-brands"), "fa-brands-400.woff2", "Font Awesome 6 Brands", 400, "fa-brands.woff2"),
+}
+
+# Always kept in the text fonts: translations and dates are inserted at runtime
+BASE_CHARACTERS = {chr(c) for c in range(0x20, 0x7f)} | set("–—‘’“”…•·©®°₹×")
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_SOURCE_DIR = os.getenv("FONT_SOURCE_DIR", os.path.join(_root, "font_cache"))
+LOCK_PATH = os.path.join(_root, "font-sources.lock.json")
+
+
+def source_urls(google_fonts_ref):
+    """Source file name -> download URL, with google/fonts at the given commit"""
+    urls = {f"{family}.ttf": GOOGLE_FONTS_RAW.format(ref=google_fonts_ref, path=path)
+            for family, path, _, _ in TEXT_FONTS}
+    urls["all.min.css"] = f"{FA_BASE_URL}/css/all.min.css"
+    for _, source_name, _, _, _ in FA_STYLES.values():
+        urls[source_name] = f"{FA_BASE_URL}/webfonts/{source_name}"
+    return urls
+
+
+def load_lock(path=LOCK_PATH):
+    """{"googleFontsRef": commit, "sources": {name: {"url", "sha256"}}}; RuntimeError if missing"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"No usable {os.path.basename(path)} ({e}): run `python -m api.font_subset --lock`")
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fetch_source(name, lock=None):
+    """
+    Path of a pinned source file in FONT_SOURCE_DIR, downloaded on first use.
+    Raises RuntimeError if the file isn't in the lock or its checksum differs.
+    """
+    entry = (lock or load_lock())["sources"].get(name)
+    if not entry:
+        raise RuntimeError(f"{name} is not in {os.path.basename(LOCK_PATH)}: run `python -m api.font_subset --lock`")
+    path = os.path.join(FONT_SOURCE_DIR, name)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if _sha256(f.read()) == entry["sha256"]:
+                return path
+    import requests
+    response = requests.get(entry["url"], timeout=30)
+    response.raise_for_status()
+    if _sha256(response.content) != entry["sha256"]:
+        raise RuntimeError(f"{name} from {entry['url']} does not match its pinned SHA-256")
+    os.makedirs(FONT_SOURCE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def lock_sources(path=LOCK_PATH):
+    """Pins google/fonts to its current main commit, downloads every source and writes the lock"""
+    import requests
+    response = requests.get(f"https://api.github.com/repos/{GOOGLE_FONTS_REPO}/commits/main", timeout=30)
+    response.raise_for_status()
+    ref = response.json()["sha"]
+    sources = {}
+    for name, url in source_urls(ref).items():
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        sources[name] = {"url": url, "sha256": _sha256(response.content)}
+    lock = {"googleFontsRef": ref, "fontAwesome": FA_VERSION, "sources": sources}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+    return lock
+
+
+def scan_usage(texts):
+    """(characters, {fa style: set of icon classes}, all class names) used in the given sources"""
+    characters = set(BASE_CHARACTERS)
+    icons = {}
+    classes = set()
+    for text in texts:
+        characters.update(ch for ch in text if ch.isprintable())
+        # Class lists in HTML attributes and in JS strings ('fas fa-sun')
+        for value in re.findall(r'["\']([^"\'<>]*\bfa-[\w-]+[^"\'<>]*)["\']', text):
+            names = value.split()
+            classes.update(names)
+            style = next((s for s, spec in FA_STYLES.items() if s != "solid" and set(spec[0]) & set(names)), "solid")
+            icons.setdefault(style, set()).update(n for n in names if n.startswith("fa-"))
+    return characters, icons, classes
+
+
+def icon_codepoints(css, names):
+    """Code points of the icons among `names`, from the Font Awesome stylesheet"""
+    codepoints = set()
+    for selectors, value in re.findall(r'([^{}]+)\{content:"\\([0-9a-f]+)"\}', css):
+        if any(s.strip().removesuffix(':before') in {f".{n}" for n in names} for s in selectors.split(',')):
+            codepoints.add(int(value, 16))
+    return codepoints
+
+
+def subset_font(path, unicodes, axis_range=None):
+    """WOFF2 bytes of the font at `path` with only `unicodes` (and a narrower weight axis)"""
+    font = TTFont(path)
+    if axis_range and "fvar" in font:
+        # Only the weights the pages ask for; the glyph outlines shrink with the axis
+        font = instancer.instantiateVariableFont(font, {"wght": axis_range})
+    options = ft_subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]  # Keep kerning, ligatures and the like
+    options.name_IDs = ["*"]
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def _font_face(family, weight, file, display):
+    return (f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+            f'font-display:{display};src:url(fonts/{file}) format("woff2")}}')
+
+
+def build_fonts(texts, out_dir):
+    """
+    Writes the subset fonts to out_dir/fonts/ and returns
+    (fonts.css text, {output file: (source bytes, subset bytes)}, characters no text font has).
+    """
+    characters, icons, classes = scan_usage(texts)
+    lock = load_lock()
+    os.makedirs(os.path.join(out_dir, "fonts"), exist_ok=True)
+    faces, sizes = [], {}
+
+    covered = set()
+    for family, _, (low, high), file in TEXT_FONTS:
+        source = fetch_source(f"{family}.ttf", lock)
+        cmap = TTFont(source).getBestCmap()
+        unicodes = {ord(ch) for ch in characters} & set(cmap)
+        covered |= unicodes
+        data = subset_font(source, unicodes, (low, high))
+        with open(os.path.join(out_dir, "fonts", file), "wb") as f:
+            f.write(data)
+        sizes[file] = (os.path.getsize(source), len(data))
+        faces.append(_font_face(family, f"{low} {high}", file, "swap"))
+
+    with open(fetch_source("all.min.css", lock), encoding="utf-8") as f:
+        fa_css = f.read()
+    banner = re.search(r'/\*!.*?\*/', fa_css, re.S)  # Font Awesome's license notice stays with its code
+    fa_css = re.sub(r'@font-face\{[^}]*\}', '', minify_css(fa_css))  # Replaced by the subset fonts below
+    for style, names in sorted(icons.items()):
+        _, source_name, family, weight, file = FA_STYLES[style]
+        codepoints = icon_codepoints(fa_css, names)
+        if not codepoints:
+            continue
+        source = fetch_source(source_name, lock)
+        data = subset_font(source, codepoints)
+        with open(os.path.join(out_dir, "fonts", file), "wb") as f:
+            f.write(data)
+        sizes[file] = (os.path.getsize(source), len(data))
+        faces.append(_font_face(family, weight, file, "block"))  # Same as Font Awesome: no fallback glyph flash
+
+    # The Font Awesome rules that can match the classes in use (base styles, those icons, sizes...)
+    icon_rules = critical_css(fa_css, f'<i class="{" ".join(sorted(classes))}"></i>')
+    missing = sorted(ch for ch in characters if ord(ch) not in covered and not ch.isspace())
+    return (banner.group(0) + "\n" if banner else "") + "".join(faces) + icon_rules, sizes, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the pinned font sources used by build.py.")
+    parser.add_argument("--lock", action="store_true",
+                        help="Pin google/fonts to its current commit and rewrite the checksums")
+    args = parser.parse_args(argv)
+    try:
+        lock = lock_sources() if args.lock else load_lock()
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+    if not args.lock:
+        print(f"google/fonts @ {lock['googleFontsRef']}, Font Awesome {lock.get('fontAwesome')}: "
+              f"{len(lock['sources'])} pinned source(s)")
+        return 0
+    print(f"✅ {os.path.basename(LOCK_PATH)}: google/fonts @ {lock['googleFontsRef']}, "
+          f"{len(lock['sources'])} source(s) pinned")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import os  # To access environment variables like API keys
+import time  # Pacing and backoff sleeps
+import random  # Jitter for retry backoff
+import threading  # Rate-limit state is shared by all threads
+import requests  # To send HTTP requests to GitHub's API
+from urllib3.exceptions import NewConnectionError  # The connection was never opened
+
+# Rate-limit-aware transport for every GitHub API call made by the audit logger
+# and the digest job. It reads X-RateLimit-Remaining / X-RateLimit-Reset and
+# Retry-After from each response, spreads the remaining hourly budget over the
+# time left until the reset, and retries 403/429/5xx/network errors with
+# jittered exponential backoff instead of giving up after one attempt.
+# A POST (a new issue comment) is only retried when GitHub provably never got
+# it: rate-limit refusals and failed connections. After a read timeout or a 5xx
+# the comment may already exist, and a second attempt would post it twice.
+
+# Base URL of the GitHub REST API (point it at fake_github.py to test offline)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "4"))
+BACKOFF_BASE = 1.0  # Seconds; doubled per attempt, with full jitter
+BACKOFF_CAP = 60.0
+
+# Requests kept in reserve for the digest job / manual use; below this the
+# transport waits for the window to reset instead of spending them
+RATE_RESERVE = int(os.getenv("GITHUB_RATE_RESERVE", "50"))
+
+# Start pacing once less than this fraction of the hourly budget is left
+PACE_BELOW = 0.5
+
+_session = None  # Persistent connection to api.github.com (keep-alive)
+_lock = threading.Lock()
+
+# Last rate-limit state reported by GitHub
+_rate = {
+    "limit": None,
+    "remaining": None,
+    "reset": None,          # Epoch seconds when the budget refills
+    "blockedUntil": 0.0,    # Epoch seconds; set from Retry-After / exhausted budget
+    "lastRequest": 0.0,     # Epoch seconds of the last request (for pacing)
+}
+
+# Counters exposed through get_transport_stats()
+_stats = {"requests": 0, "retries": 0, "rateLimited": 0, "serverErrors": 0, "networkErrors": 0, "waitedSeconds": 0.0}
+
+
+class RateLimitWait(Exception):
+    """Raised instead of sleeping when the required wait exceeds max_wait"""
+
+    def __init__(self, seconds):
+        super().__init__(f"GitHub rate limit: retry in {seconds:.0f}s")
+        self.seconds = seconds
+
+
+def get_github_credentials():
+    token = os.getenv("GITHUB_TOKEN")  # Get the GitHub Personal Access Token (PAT)
+    repo = os.getenv("GITHUB_REPO")  # Get the repository name (e.g., "User/Repo")
+    issue_number = os.getenv("GITHUB_ISSUE_NO")  # Get the specific Issue ID to post to
+    return token, repo, issue_number
+
+
+def _get_session(token):
+    """Reuses one HTTPS connection for every request instead of a new one per log"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        # Set the headers required by GitHub API
+        _session.headers.update({
+            "Authorization": f"token {token}",  # Authenticate with the PAT
+            "Accept": "application/vnd.github.v3+json"  # Specify API version
+        })
+    return _session
+
+
+def _pace_delay(now):
+    """Seconds to wait before the next request given the last known budget"""
+    with _lock:
+        if now < _rate["blockedUntil"]:
+            return _rate["blockedUntil"] - now
+        remaining, reset, limit = _rate["remaining"], _rate["reset"], _rate["limit"]
+        if remaining is None or reset is None or reset <= now:
+            return 0.0
+        if remaining <= RATE_RESERVE:
+            return reset - now  # Budget (minus reserve) spent: wait for the refill
+        if limit and remaining < limit * PACE_BELOW:
+            # Spread what's left evenly over the rest of the window
+            interval = (reset - now) / (remaining - RATE_RESERVE)
+            return max(0.0, _rate["lastRequest"] + interval - now)
+        return 0.0
+
+
+def _record_headers(resp, now):
+    """Updates the shared rate-limit state from a response"""
+    headers = resp.headers
+    with _lock:
+        _rate["lastRequest"] = now
+        try:
+            if "X-RateLimit-Limit" in headers:
+                _rate["limit"] = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                _rate["remaining"] = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                _rate["reset"] = float(headers["X-RateLimit-Reset"])
+        except ValueError:
+            pass  # Malformed header: keep the previous values
+
+
+def _retry_after(resp, now):
+    """How long GitHub asked us to wait (Retry-After, or until the reset if the budget is empty)"""
+    value = resp.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    if resp.headers.get("X-RateLimit-Remaining") == "0" and _rate["reset"]:
+        return max(0.0, _rate["reset"] - now)
+    return None
+
+
+def _is_rate_limited(resp):
+    """429, or a 403 caused by the primary/secondary rate limit (not a permissions 403)"""
+    if resp.status_code == 429:
+        return True
+    if resp.status_code != 403:
+        return False
+    return (resp.headers.get("X-RateLimit-Remaining") == "0"
+            or "Retry-After" in resp.headers
+            or "rate limit" in resp.text.lower())
+
+
+def _never_sent(error):
+    """True if a network error happened before the request could reach GitHub"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _wait(seconds, deadline):
+    """Sleeps unless that would run past the caller's deadline"""
+    if seconds <= 0:
+        return
+    if deadline is not None and time.time() + seconds > deadline:
+        raise RateLimitWait(seconds)
+    with _lock:
+        _stats["waitedSeconds"] += seconds
+    time.sleep(seconds)
+
+
+def github_request(method, path, max_wait=None, **kwargs):
+    """
+    Sends one request to the GitHub REST API over the shared session,
+    pacing against the rate limit and retrying transient failures.
+    max_wait bounds the total time spent waiting (raises RateLimitWait);
+    None waits as long as needed (background flusher, cron job).
+    POSTs are not idempotent: they are retried on rate limits and connection
+    failures only, never after a read timeout or a 5xx.
+    Returns the final response; raises the last network error if all attempts failed.
+    """
+    token, _, _ = get_github_credentials()
+    retry_unsent_only = method.upper() == "POST"
+    kwargs.setdefault("timeout", 15)
+    deadline = time.time() + max_wait if max_wait is not None else None
+    url = f"{GITHUB_API_URL}{path}"
+
+    for attempt in range(MAX_RETRIES + 1):
+        _wait(_pace_delay(time.time()), deadline)
+
+        with _lock:
+            _stats["requests"] += 1
+            if attempt:
+                _stats["retries"] += 1
+        try:
+            resp = _get_session(token).request(method, url, **kwargs)
+        except requests.RequestException as e:
+            with _lock:
+                _stats["networkErrors"] += 1
+            if attempt == MAX_RETRIES or (retry_unsent_only and not _never_sent(e)):
+                raise
+            _wait(_backoff(attempt), deadline)
+            continue
+
+        now = time.time()
+        _record_headers(resp, now)
+
+        if _is_rate_limited(resp):
+            wait = _retry_after(resp, now)
+            with _lock:
+                _stats["rateLimited"] += 1
+                if wait is not None:
+                    _rate["blockedUntil"] = now + wait
+            if attempt == MAX_RETRIES:
+                return resp
+            # Honour Retry-After (plus jitter so workers don't stampede), else back off
+            _wait((wait + random.uniform(0, 1)) if wait is not None else _backoff(attempt), deadline)
+            continue
+
+        if resp.status_code >= 500:
+            with _lock:
+                _stats["serverErrors"] += 1
+            if attempt == MAX_RETRIES or retry_unsent_only:
+                return resp
+            _wait(_backoff(attempt), deadline)
+            continue
+
+        return resp  # Success, or a client error retrying won't fix
+
+
+def get_transport_stats():
+    """Rate-limit state and retry counters for monitoring"""
+    with _lock:
+        stats = dict(_stats)
+        stats["rateLimitRemaining"] = _rate["remaining"]
+        stats["rateLimitReset"] = _rate["reset"]
+        stats["waitedSeconds"] = round(stats["waitedSeconds"], 1)
+    return stats
@@ -0,0 +1,221 @@
+import os  # File paths for sources and the variant cache
+import hashlib  # Content-addressed variant names
+import threading  # One encoder per variant, shared cache accounting
+from api.media_files import content_hash, IMMUTABLE_CACHE_CONTROL  # Source hashes are shared with the static files
+
+try:
+    from PIL import Image, ImageOps, features  # Resizing / re-encoding (optional dependency)
+except ImportError:
+    Image = None
+
+# Resized / re-encoded image variants for /img/<path>?w=&fmt= (server.py).
+# A variant is generated the first time it's asked for and stored in a
+# content-addressed disk cache: its name is a hash of the source file's content
+# plus the width and format, so editing a photo never serves a stale variant.
+# The cache is kept under IMAGE_CACHE_MAX_MB by evicting the least recently
+# used variants (every hit refreshes the file's mtime).
+#
+#   image_cache/
+#     3f/3fa4...e1.webp
+
+# Only images from these folders can be resized (no arbitrary file reads)
+MEDIA_ROOTS = ('Images', 'Rituals and News')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Requested widths are rounded up to one of these, so the number of variants per image stays small
+VARIANT_WIDTHS = (160, 320, 480, 640, 800, 1080, 1280, 1600, 2048)
+
+# format -> (Pillow encoder, MIME type, encoder options)
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 55}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+ENCODER_VERSION = 1  # Bump when the settings above change, to stop serving old variants
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.getenv("VERCEL"):
+    _DEFAULT_DIR = "/tmp/image_cache"  # The only writable path in a Vercel function
+else:
+    _DEFAULT_DIR = os.path.join(_root, "image_cache")
+CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", _DEFAULT_DIR)
+CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+# Fingerprinted URLs (?v=<source hash>) never change content and get IMMUTABLE_CACHE_CONTROL
+VARIANT_CACHE_CONTROL = 'public, max-age=86400, stale-while-revalidate=604800'
+
+_usage = {"bytes": None}  # Total size of the cache, scanned on first use
+_lock = threading.Lock()
+_encode_locks = {}
+
+
+def resolve_source(relative_path):
+    """Absolute path of an allowed source image, or None"""
+    parts = relative_path.replace('\\', '/').strip('/').split('/')
+    if len(parts) < 2 or parts[0] not in MEDIA_ROOTS or any(p in ('', '.', '..') for p in parts):
+        return None
+    base = os.path.realpath(os.path.join(_root, parts[0]))
+    path = os.path.realpath(os.path.join(_root, *parts))
+    if not path.startswith(base + os.sep) or not path.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def source_hash(path):
+    """SHA-256 of a source file, cached until its mtime or size changes"""
+    return content_hash(path)
+
+
+def can_encode(fmt):
+    """True if this Pillow build has an encoder for the format (AVIF / WebP are optional)"""
+    return fmt == 'jpeg' or bool(features.check(fmt))
+
+
+def choose_format(fmt, accept):
+    """Explicit ?fmt=, else the best format the browser's Accept header allows. Returns (format, negotiated)."""
+    if fmt and fmt != 'auto':
+        fmt = 'jpeg' if fmt == 'jpg' else fmt
+        return (fmt if fmt in FORMATS else None), False
+    accept = accept or ''
+    if 'image/avif' in accept and can_encode('avif'):
+        return 'avif', True
+    if 'image/webp' in accept and can_encode('webp'):
+        return 'webp', True
+    return 'jpeg', True
+
+
+def snap_width(width):
+    """Rounds a requested width up to the next VARIANT_WIDTHS step (None keeps the original width)"""
+    if width in (None, ''):
+        return None
+    width = int(width)
+    if width <= 0:
+        raise ValueError("Width must be positive")
+    return next((w for w in VARIANT_WIDTHS if w >= width), VARIANT_WIDTHS[-1])
+
+
+def _encode(source, target, width, fmt):
+    encoder, _, options = FORMATS[fmt]
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)  # Phone photos: apply the rotation flag before resizing
+        if width and width < img.width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        if fmt == 'jpeg' or img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGB' if fmt == 'jpeg' or 'A' not in img.mode else 'RGBA')
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            img.save(tmp_path, encoder, **options)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)  # A failed encode leaves no partial file in the cache
+
+
+def _cache_size():
+    """Bytes currently in the cache (scanned once, then tracked)"""
+    if _usage["bytes"] is None:
+        total = 0
+        for folder, _, files in os.walk(CACHE_DIR):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(folder, name))
+                except OSError:
+                    pass
+        _usage["bytes"] = total
+    return _usage["bytes"]
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used variants until the cache is under 90% of its limit"""
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        if _cache_size() <= max_bytes:
+            return 0
+        entries = []
+        for folder, _, files in os.walk(CACHE_DIR):
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()  # Oldest use first
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        _usage["bytes"] = total
+        return removed
+
+
+def get_variant(relative_path, width=None, fmt=None, accept=''):
+    """
+    Returns (error, status, variant): the cached variant file for an image,
+    encoding it first if needed. variant = {path, mimeType, etag, sourceHash, negotiated}
+    """
+    if Image is None:
+        return "Image resizing is not available (Pillow is not installed)", 501, None
+
+    source = resolve_source(relative_path)
+    if source is None:
+        return "Image not found", 404, None
+    try:
+        width = snap_width(width)
+    except ValueError:
+        return "Invalid width", 400, None
+    fmt, negotiated = choose_format(fmt, accept)
+    if fmt is None:
+        return f"Unsupported format, use one of: {', '.join(FORMATS)}", 400, None
+    if not can_encode(fmt):
+        return f"Format {fmt} is not available on this server", 415, None
+
+    source_digest = source_hash(source)
+    key = hashlib.sha256(f"{source_digest}:{width}:{fmt}:{ENCODER_VERSION}".encode()).hexdigest()[:32]
+    target = os.path.join(CACHE_DIR, key[:2], f"{key}.{fmt}")
+    variant = {
+        "path": target,
+        "mimeType": FORMATS[fmt][1],
+        "etag": key,
+        "sourceHash": source_digest,
+        "negotiated": negotiated,
+    }
+
+    try:
+        os.utime(target)  # Cache hit: mark as recently used
+        return None, 200, variant
+    except FileNotFoundError:
+        pass
+
+    with _lock:
+        encode_lock = _encode_locks.setdefault(key, threading.Lock())
+    try:
+        with encode_lock:  # Concurrent requests for a new variant encode it once
+            if not os.path.exists(target):
+                with _lock:
+                    _cache_size()  # Scan the existing cache before this variant is added to it
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    _encode(source, target, width, fmt)
+                except (OSError, ValueError) as e:
+                    return f"Could not convert image: {e}", 422, None
+                with _lock:
+                    _usage["bytes"] += os.path.getsize(target)
+    finally:
+        # Later requests find the file; the lock is only needed while it is being written
+        with _lock:
+            if _encode_locks.get(key) is encode_lock:
+                _encode_locks.pop(key)
+
+    print(f"🖼️ Image variant created: {relative_path} w={width or 'orig'} {fmt}")
+    if _usage["bytes"] > CACHE_MAX_BYTES:
+        evict()
+    return None, 200, variant
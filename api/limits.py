@@ -0,0 +1,16 @@
+from http.server import BaseHTTPRequestHandler
+import json
+from api.upload import UPLOAD_LIMITS
+
+class handler(BaseHTTPRequestHandler):
+    """
+    Serves /api/convert/limits on Vercel (rewritten here in vercel.json).
+    Tells the browser how far to downscale images before uploading them.
+    """
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        # Limits only change on deploy, let the CDN keep a copy
+        self.send_header('Cache-Control', 'public, max-age=3600')
+        self.end_headers()
+        self.wfile.write(json.dumps(UPLOAD_LIMITS).encode())
@@ -0,0 +1,48 @@
+import os  # Directory listing for the segment helpers
+import tempfile  # Default location outside the served tree
+import threading  # Background flusher threads
+
+# Helpers shared by the append-only local stores (audit_spool.py for the audit
+# log, analytics_store.py for analytics events): where they live, how their
+# daily segments are named, and the flusher thread that drains them.
+
+
+def default_dir(name):
+    """
+    Default directory of a local store: $XDG_STATE_HOME/<name>, else <tempdir>/<name>
+    (/tmp on Vercel, the only writable path in a function). Never inside the repo,
+    which server.py serves as its static folder.
+    """
+    return os.path.join(os.getenv("XDG_STATE_HOME") or tempfile.gettempdir(), name)
+
+
+def segment_name(prefix, day):
+    """File name of a daily segment for a date (datetime/date) or 'YYYY-MM-DD' string"""
+    if not isinstance(day, str):
+        day = day.strftime("%Y-%m-%d")
+    return f"{prefix}-{day}.jsonl"
+
+
+def list_segments(folder, prefix):
+    """All segment file names with this prefix, oldest first"""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(f for f in os.listdir(folder) if f.startswith(f"{prefix}-") and f.endswith(".jsonl"))
+
+
+class FlusherThread:
+    """A daemon thread running `target`, started on first use and restarted if it died"""
+
+    def __init__(self, target, name):
+        self._target = target
+        self._name = name
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._target, name=self._name, daemon=True)
+                self._thread.start()
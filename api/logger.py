@@ -1,16 +1,68 @@
 import os  # To access environment variables like API keys
-import requests  # To send HTTP POST requests to GitHub's API
-import json  # To format data as JSON
+import time  # To measure flush latency
+import atexit  # To flush pending entries when the process exits
+import random  # Sampling of repeated documents
+import threading  # Background flusher thread
 from datetime import datetime  # To add timestamps to the logs
+from api import audit_spool  # Durable append-only spool the entries wait in
+from api.local_store import FlusherThread  # Background thread shared with the analytics store
+# Rate-limit-aware GitHub API calls (shared session, pacing, retries)
+from api.github_transport import github_request, get_github_credentials, get_transport_stats
 
-def log_to_github(ip, target_lang, content):
+# Audit entries are appended to a local spool by the conversion request and
+# posted to GitHub by a background flusher, so users never wait for the GitHub
+# round trip and entries survive restarts and GitHub outages.
+# One comment carries up to AUDIT_BATCH_SIZE entries or AUDIT_FLUSH_SECONDS of activity.
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "20"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "30"))
+
+# "batch": the flusher posts spooled entries continuously (default)
+# "digest": entries only go to the spool; api/audit_digest.py posts one comment per day
+AUDIT_MODE = os.getenv("AUDIT_MODE", "batch")
+
+# Logging policy (cuts GitHub traffic at high load while keeping the trail useful):
+# - a document never seen before is always logged
+# - repeats of a known document are logged with probability AUDIT_REPEAT_SAMPLE_RATE
+# - further events from the same IP + language within AUDIT_DEDUPE_WINDOW seconds
+#   are only counted, and logged as one "collapsed" entry when the window closes
+AUDIT_REPEAT_SAMPLE_RATE = float(os.getenv("AUDIT_REPEAT_SAMPLE_RATE", "0.25"))
+AUDIT_DEDUPE_WINDOW = float(os.getenv("AUDIT_DEDUPE_WINDOW", "300"))  # 0 disables collapsing
+AUDIT_DEDUPE_MAX_KEYS = 10000  # Open windows kept in memory; the oldest is closed beyond this
+
+_wake = threading.Event()  # Set when a full batch is waiting
+_unflushed = 0  # Entries spooled by this process since the last flush
+_drain_lock = threading.Lock()  # One drain at a time within this process
+_posted = None  # Content hashes already on GitHub (see _posted_hashes)
+_windows = {}  # (ip, target_lang) -> {"opened": epoch, "time": str, "count": events collapsed}
+_windows_lock = threading.Lock()
+
+# Counters exposed through get_audit_stats()
+_stats = {
+    "spooled": 0,       # Entries written to the spool
+    "sent": 0,          # Entries posted to GitHub successfully
+    "failed": 0,        # Flush attempts GitHub rejected or that hit a network error (entries stay spooled)
+    "dropped": 0,       # Entries refused because the spool backlog was full
+    "deduped": 0,       # Entries posted as a hash reference instead of the full body
+    "sampledOut": 0,    # Repeat conversions skipped by AUDIT_REPEAT_SAMPLE_RATE
+    "collapsed": 0,     # Conversions folded into a per-IP/language window counter
+    "batches": 0,       # Comments posted
+    "flushes": 0,       # Batches attempted (successful or not)
+    "lastFlushMs": None,
+    "maxFlushMs": 0.0,
+    "totalFlushMs": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def log_to_github(ip, target_lang, content, latency_ms=None):
     """
     Logs the conversion activity to a private GitHub Issue as a comment.
     This acts as a secure, invisible dashboard for monitoring usage.
+    The entry is only written to the local spool here; the flusher posts it in a batch.
+    latency_ms is the time the conversion took (used by the daily digest).
+    Repeats are sampled/collapsed according to the policy settings above.
     """
-    token = os.getenv("GITHUB_TOKEN")  # Get the GitHub Personal Access Token (PAT)
-    repo = os.getenv("GITHUB_REPO")  # Get the repository name (e.g., "User/Repo")
-    issue_number = os.getenv("GITHUB_ISSUE_NO")  # Get the specific Issue ID to post to
+    token, repo, issue_number = get_github_credentials()
 
     # Check if any required credential is missing
     if not token or not repo or not issue_number:
@@ -18,47 +70,309 @@ def log_to_github(ip, target_lang, content):
         print(f"⚠️ Logging skipped: Missing creds. Token: {bool(token)}, Repo: {repo}, Issue: {issue_number}")
         return  # Exit the function safely
 
-    # Get the current timestamp in readable format (YYYY-MM-DD HH:MM:SS)
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Create the body of the GitHub comment using formatted string (Markdown supported)
-    body = f"""
-### 🕵️ New Activity Detected
-| Metric | Detail |
-| :--- | :--- |
-| **Time** | `{timestamp}` |
-| **IP Address** | `{ip}` |
-| **Target Lang** | `{target_lang}` |
-
-**Converted Content:**
-```text
-{content}
-```
-    """
+    now = time.time()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Readable format (YYYY-MM-DD HH:MM:SS)
+
+    # The body itself is stored once per distinct translation; entries refer to it by hash
+    digest = audit_spool.content_hash(content)
+    first_seen = audit_spool.store_content(digest, content)
+
+    decision = _apply_policy(ip, target_lang, first_seen, now, timestamp)
+    if decision != "log":
+        with _stats_lock:
+            _stats[decision] += 1
+        return
 
-    # Construct the GitHub API URL for creating a comment
-    url = f"https://api.github.com/repos/{repo}/issues/{issue_number}/comments"
-    
-    # Set the headers required by GitHub API
-    headers = {
-        "Authorization": f"token {token}",  # Authenticate with the PAT
-        "Accept": "application/vnd.github.v3+json"  # Specify API version
+    entry = {
+        "time": timestamp,
+        "ip": ip,
+        "targetLang": target_lang,
+        "latencyMs": round(latency_ms, 1) if latency_ms is not None else None,
+        "contentHash": digest,
     }
-    
+    if not first_seen and AUDIT_REPEAT_SAMPLE_RATE < 1:
+        entry["sampleRate"] = AUDIT_REPEAT_SAMPLE_RATE  # Lets the digest weight sampled repeats
+
+    _spool(entry)
+
+
+def _apply_policy(ip, target_lang, first_seen, now, timestamp):
+    """
+    Decides what happens to one conversion event:
+    "log" (spool it), "collapsed" (counted in an open window) or "sampledOut".
+    """
+    key = (ip, target_lang)
+    expired = []
+    with _windows_lock:
+        window = _windows.get(key)
+        if window and now - window["opened"] >= AUDIT_DEDUPE_WINDOW:
+            expired.append((key, _windows.pop(key)))
+            window = None
+
+        if window and not first_seen:
+            window["count"] += 1
+            decision = "collapsed"
+        elif first_seen or random.random() < AUDIT_REPEAT_SAMPLE_RATE:
+            decision = "log"
+            if AUDIT_DEDUPE_WINDOW > 0 and not window:
+                _windows[key] = {"opened": now, "time": timestamp, "count": 0}
+                if len(_windows) > AUDIT_DEDUPE_MAX_KEYS:
+                    oldest = min(_windows, key=lambda k: _windows[k]["opened"])
+                    expired.append((oldest, _windows.pop(oldest)))
+        else:
+            decision = "sampledOut"
+
+    for old_key, old_window in expired:
+        _spool_window(old_key, old_window)
+    return decision
+
+
+def _close_windows(now=None, everything=False):
+    """Spools a counter entry for every window that has run its course"""
+    now = now or time.time()
+    with _windows_lock:
+        done = [k for k, w in _windows.items() if everything or now - w["opened"] >= AUDIT_DEDUPE_WINDOW]
+        closed = [(k, _windows.pop(k)) for k in done]
+    for key, window in closed:
+        _spool_window(key, window)
+
+
+def _spool_window(key, window):
+    """One entry standing for all conversions collapsed into a window"""
+    if window["count"]:
+        _spool({
+            "type": "collapsed",
+            "time": window["time"],
+            "ip": key[0],
+            "targetLang": key[1],
+            "count": window["count"],
+            "windowSeconds": AUDIT_DEDUPE_WINDOW,
+        })
+
+
+def _spool(entry):
+    """Appends an entry to the spool and wakes the flusher when a batch is full"""
+    global _unflushed
+    # Local file writes only: the request never touches the network for logging
+    if not audit_spool.append_record(entry):
+        with _stats_lock:
+            _stats["dropped"] += 1
+        print("⚠️ Audit spool full, log entry dropped")
+        return
+
+    with _stats_lock:
+        _stats["spooled"] += 1
+        _unflushed += 1
+        batch_ready = _unflushed >= AUDIT_BATCH_SIZE
+
+    if AUDIT_MODE == "digest":
+        return  # Posted once a day by the digest job
+
+    _worker.ensure()
+    if batch_ready:
+        _wake.set()
+
+
+def _worker_loop():
+    """Drains the spool every AUDIT_FLUSH_SECONDS, or sooner once a full batch is waiting"""
+    while True:
+        _wake.wait(timeout=AUDIT_FLUSH_SECONDS)
+        _wake.clear()
+        try:
+            _close_windows()
+            _drain()
+        except Exception as e:
+            # Never let the flusher thread die; the entries stay in the spool
+            print(f"❌ Audit flusher error: {e}")
+
+
+_worker = FlusherThread(_worker_loop, "audit-flusher")
+
+
+def _drain(deadline=None):
+    """
+    Posts spooled entries batch by batch, advancing the checkpoint after each
+    delivered batch. Stops at the first failure (retried on the next round).
+    Returns True if everything was delivered.
+    """
+    global _unflushed, _posted
+    with _drain_lock:
+        lock = audit_spool.FlushLock()
+        if not lock.acquire():
+            return False  # Another worker process is draining the spool
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                records, position = audit_spool.read_pending(AUDIT_BATCH_SIZE)
+                if not records:
+                    if position[0]:
+                        audit_spool.save_checkpoint(*position)  # Skip past corrupt lines
+                    break
+                max_wait = deadline - time.monotonic() if deadline is not None else None
+                if not _post_batch(records, max_wait):
+                    return False
+                audit_spool.save_checkpoint(*position)
+                with _stats_lock:
+                    _unflushed = max(0, _unflushed - len(records))
+            if audit_spool.prune_segments():
+                _posted = None  # Some bodies were pruned: reload the hashes that are still on record
+        finally:
+            lock.release()
+    return audit_spool.pending_bytes() == 0
+
+
+def _posted_hashes():
+    """Hashes whose full body is already in a GitHub comment (loaded once per process)"""
+    global _posted
+    if _posted is None:
+        _posted = audit_spool.load_posted()
+    return _posted
+
+
+def format_batch(entries, posted=None):
+    """
+    Creates the body of the GitHub comment (Markdown supported).
+    Each distinct translation is written out once; entries whose body is
+    already on GitHub (posted: hash -> comment URL) only reference it.
+    Returns (body, hashes of the bodies included in full).
+    """
+    posted = posted or {}
+    events = sum(e.get("count", 0) if e.get("type") == "collapsed" else 1 for e in entries)
+    title = "New Activity Detected" if events == 1 else f"New Activity Detected ({events} conversions)"
+    lines = [
+        f"### 🕵️ {title}",
+        "| Time | IP Address | Target Lang | Content |",
+        "| :--- | :--- | :--- | :--- |",
+    ]
+    included = []
+    for entry in entries:
+        digest = entry.get("contentHash")
+        if entry.get("type") == "collapsed":
+            minutes = entry.get("windowSeconds", 0) / 60
+            lines.append(f"| `{entry['time']}` | `{entry['ip']}` | `{entry['targetLang']}` | "
+                         f"+{entry['count']} more within {minutes:g} min |")
+            continue
+        if digest in posted:
+            ref = f"[`{digest}`]({posted[digest]})" if posted[digest] else f"`{digest}`"
+        else:
+            ref = f"`{digest}`"
+            if digest not in included:
+                included.append(digest)
+        if entry.get("sampleRate"):
+            ref += f" (repeat, 1 in {round(1 / entry['sampleRate'])} logged)"
+        lines.append(f"| `{entry['time']}` | `{entry['ip']}` | `{entry['targetLang']}` | {ref} |")
+
+    bodies = {e.get("contentHash"): e for e in entries if e.get("contentHash")}
+    for digest in included:
+        content = audit_spool.resolve_content(bodies[digest])
+        lines += [
+            "",
+            f"<details><summary><b>Converted Content</b> · <code>{digest}</code></summary>",
+            "",
+            "```text",
+            str(content) if content is not None else "(content no longer stored)",
+            "```",
+            "</details>",
+        ]
+    return "\n".join(lines), included
+
+
+def _post_batch(entries, max_wait=None):
+    """
+    Sends one batch to GitHub and records latency/outcome.
+    max_wait bounds rate-limit waits (see github_transport.github_request).
+    """
+    _, repo, issue_number = get_github_credentials()
+
+    # Construct the GitHub API path for creating a comment
+    path = f"/repos/{repo}/issues/{issue_number}/comments"
+
+    started = time.monotonic()
+    ok = False
     try:
         # Log the attempt to the server console
-        print(f"📡 Sending log to GitHub: {url}")
-        
+        print(f"📡 Sending {len(entries)} log(s) to GitHub: {path}")
+
         # Make the POST request to create the comment
-        resp = requests.post(url, headers=headers, json={"body": body})
-        
+        posted = _posted_hashes()
+        body, included = format_batch(entries, posted)
+        resp = github_request("POST", path, max_wait=max_wait, json={"body": body})
+
         # Check if the request was successful (HTTP 201 Created)
         if resp.status_code == 201:
+            ok = True
             print("✅ Logged to GitHub successfully")
+            # Later entries with the same bodies will just link to this comment
+            url = resp.json().get("html_url")
+            audit_spool.mark_posted(included, url)
+            posted.update({digest: url for digest in included})
+            with _stats_lock:
+                _stats["deduped"] += len(entries) - len(included)
         else:
             # Print error details if it failed
             print(f"❌ GitHub API Error: {resp.status_code} - {resp.text}")
-            
+
     except Exception as e:
-        # Catch network or other errors to prevent crashing the main app
+        # Catch network or other errors to prevent crashing the flusher thread
         print(f"❌ Failed to log to GitHub: {str(e)}")
+
+    elapsed_ms = (time.monotonic() - started) * 1000
+    with _stats_lock:
+        if ok:
+            _stats["sent"] += len(entries)
+            _stats["batches"] += 1
+        else:
+            _stats["failed"] += 1
+        _stats["flushes"] += 1
+        _stats["lastFlushMs"] = round(elapsed_ms, 1)
+        _stats["maxFlushMs"] = max(_stats["maxFlushMs"], round(elapsed_ms, 1))
+        _stats["totalFlushMs"] += elapsed_ms
+    return ok
+
+
+def flush_audit_log(timeout=10):
+    """
+    Posts everything in the spool right away (up to timeout seconds).
+    Used at process exit, on worker exit (gunicorn.conf.py) and by the Vercel
+    cron in api/audit_flush.py, which drains what a frozen instance still holds.
+    Anything not delivered stays in the spool for the next flush.
+    Returns True if the spool was fully drained.
+    """
+    token, repo, issue_number = get_github_credentials()
+    if not token or not repo or not issue_number:
+        return False  # Nothing can be delivered; entries stay in the spool
+    _close_windows()
+    if AUDIT_MODE == "digest" or audit_spool.pending_bytes() == 0:
+        return True
+    try:
+        return _drain(deadline=time.monotonic() + timeout)
+    except Exception as e:
+        print(f"❌ Audit flush failed: {e}")
+        return False
+
+
+def get_audit_stats():
+    """Spool backlog, flush latency and drop counters for monitoring"""
+    with _stats_lock:
+        stats = dict(_stats)
+    total_ms = stats.pop("totalFlushMs")
+    stats["avgFlushMs"] = round(total_ms / stats["flushes"], 1) if stats["flushes"] else None
+    stats["pendingBytes"] = audit_spool.pending_bytes()
+    stats["pendingLimitBytes"] = audit_spool.MAX_PENDING_BYTES
+    stats["batchSize"] = AUDIT_BATCH_SIZE
+    stats["flushSeconds"] = AUDIT_FLUSH_SECONDS
+    stats["repeatSampleRate"] = AUDIT_REPEAT_SAMPLE_RATE
+    stats["dedupeWindowSeconds"] = AUDIT_DEDUPE_WINDOW
+    with _windows_lock:
+        stats["openWindows"] = len(_windows)
+    stats["github"] = get_transport_stats()
+    return stats
+
+
+def _flush_at_exit():
+    """Deliver what this process spooled on a clean shutdown (the rest waits for the next start)"""
+    _close_windows(everything=True)
+    if _stats["spooled"]:
+        flush_audit_log()
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,94 @@
+import os  # stat() to notice changed files
+import re  # Fingerprinted file names
+import posixpath  # Normalizes requested names before the allow-list check
+import hashlib  # Strong ETags from file contents
+import threading  # Request threads share the hash cache
+
+# Caching rules for files served by server.py (the static folder, 'Rituals and
+# News' and the bell audio). Every file gets a strong ETag derived from its
+# content, so If-None-Match works across restarts and machines; Flask's
+# send_file(conditional=True) then answers 304s and Range requests (206).
+#
+# A URL is "fingerprinted" when it can never point to different bytes: either
+# the file name carries a content hash (style.3fa4e1b2.css) or the query has
+# ?v=<content hash prefix> (as written by rituals_index.py). Those are cached for
+# a year; everything else is revalidated. vercel.json can only mirror the first
+# rule: the CDN can't check a ?v= against the file, so there those URLs are cached
+# like the same path without it.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MEDIA_CACHE_CONTROL = 'public, max-age=3600, stale-while-revalidate=86400'  # Images / audio
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'  # HTML, JS, CSS, JSON
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif', '.gif', '.svg', '.ico',
+                    '.mp3', '.ogg', '.opus', '.m4a', '.aac', '.woff2', '.woff', '.ttf')
+
+FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{8,}\.[A-Za-z0-9]+$')
+
+# What may be sent as a static file. In development the static folder is the
+# repo root, next to the code, .env, the config and any local data, so this is
+# an allow-list: the pages, their CSS/JS and JSON, and media in the asset folders.
+PUBLIC_DIRS = ('Images', 'Audio', 'Rituals and News', 'fonts')
+PUBLIC_ROOT_EXTENSIONS = ('.html', '.css', '.js')
+PUBLIC_ROOT_FILES = ('manifest.json', 'festivals_2026.json', 'rituals.json', 'asset-manifest.json',
+                     'robots.txt', 'sitemap.xml')
+
+_hashes = {}  # path -> (mtime_ns, size, sha256 hex)
+_lock = threading.Lock()
+
+
+def content_hash(path):
+    """SHA-256 (hex) of a file, cached until its mtime or size changes"""
+    stat = os.stat(path)
+    cached = _hashes.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    with _lock:
+        _hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return _hashes[path][2]
+
+
+def is_fingerprinted(filename, digest, version=None):
+    """True if the URL pins the content: a hashed file name or a matching ?v="""
+    if FINGERPRINT_RE.search(filename):
+        return True
+    return bool(version) and len(version) >= 8 and digest.startswith(version)
+
+
+def cache_control(filename, digest, version=None):
+    """Cache-Control value for a served file"""
+    if is_fingerprinted(filename, digest, version):
+        return IMMUTABLE_CACHE_CONTROL
+    if filename.lower().endswith(MEDIA_EXTENSIONS):
+        return MEDIA_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+def is_public(filename, folder=''):
+    """
+    True if a requested file is on the static allow-list. `filename` is relative
+    to the site root, or to `folder` (one of PUBLIC_DIRS) for the folder routes.
+    Dotfiles, '..' and anything outside the list (api/, *.py, *.jsonl, ...) are refused.
+    """
+    name = posixpath.normpath(posixpath.join(folder, filename.replace('\\', '/')))
+    parts = name.split('/')
+    if any(part.startswith('.') for part in parts):
+        return False
+    if len(parts) > 1:
+        return parts[0] in PUBLIC_DIRS and name.lower().endswith(MEDIA_EXTENSIONS)
+    # festivals_2026.1a2b3c4d.json (written by build.py) is on the list as festivals_2026.json
+    unhashed = re.sub(r'\.[0-9a-f]{8,}(?=\.[A-Za-z0-9]+$)', '', name)
+    return name.lower().endswith(PUBLIC_ROOT_EXTENSIONS) or unhashed in PUBLIC_ROOT_FILES
+
+
+def is_private(path):
+    """True for a path inside the audit spool or the analytics store, wherever they are configured"""
+    from api.audit_spool import SPOOL_DIR  # Imported late: only the servers need them
+    from api.analytics_store import STORE_DIR
+    path = os.path.realpath(path)
+    for folder in map(os.path.realpath, (SPOOL_DIR, STORE_DIR)):
+        if os.path.commonpath([path, folder]) == folder:
+            return True
+    return False
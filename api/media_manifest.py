@@ -0,0 +1,158 @@
+import os  # File paths and stat
+import sys  # Exit code for the command line
+import json  # The manifest is a JSON file
+import base64  # The placeholder is inlined as a data URI
+import hashlib  # Entries are keyed by the file's content hash
+import io  # Encode the placeholder in memory
+
+try:
+    from PIL import Image, ImageOps  # Reading dimensions / colors (optional dependency)
+except ImportError:
+    Image = None
+
+# Media manifest for the 'Rituals and News' images: width/height (so the page
+# can reserve layout space), byte size, a tiny blurred placeholder (LQIP) and
+# the dominant color. Each image is analysed once and stored under its content
+# hash, so renaming a file or re-running the build costs nothing.
+#
+#   media-manifest.json
+#     {"version": 1,
+#      "files":  {"News.jpg": {"hash": "...", "mtime": ..., "size": ...}},
+#      "images": {"<sha256[:16]>": {"width": 1080, "height": 1350, "bytes": 183211,
+#                                   "color": "#7a3b1c", "lqip": "data:image/jpeg;base64,..."}}}
+#
+# Written by build.py (rituals step) or `python -m api.media_manifest`; the
+# server and the functions only read it (api/rituals_index.py), so serving
+# /api/rituals never hashes images or writes files.
+MANIFEST_VERSION = 1
+LQIP_WIDTH = 16  # Pixels; the browser blurs it up to the full size
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.getenv("MEDIA_MANIFEST_PATH", os.path.join(_root, "media-manifest.json"))
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def dominant_color(img):
+    """Most common color after reducing the image to a small palette, as #rrggbb"""
+    small = img.convert('RGB').resize((64, 64))
+    palette = small.quantize(colors=5)
+    count, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def describe_image(path):
+    """Dimensions, size, placeholder and color of one image file"""
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)  # Report the size the browser will actually lay out
+        width, height = img.size
+        thumb = img.convert('RGB').resize((LQIP_WIDTH, max(1, round(height * LQIP_WIDTH / width))))
+        buffer = io.BytesIO()
+        thumb.save(buffer, 'JPEG', quality=60)
+        return {
+            "width": width,
+            "height": height,
+            "bytes": os.path.getsize(path),
+            "color": dominant_color(img),
+            "lqip": "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode('ascii'),
+        }
+
+
+def load_manifest(path=None):
+    try:
+        with open(path or MANIFEST_PATH, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "files": {}, "images": {}}
+
+
+def update_manifest(directory, names, path=None):
+    """
+    Makes sure every file in `names` has an entry; only new or changed files are
+    hashed and analysed. Files no longer present are dropped. Writes the file
+    if anything changed (silently skipped on a read-only file system).
+    Returns the manifest.
+    """
+    path = path or MANIFEST_PATH  # Looked up per call, like rituals_index's cache key
+    manifest = load_manifest(path)
+    files, images = manifest["files"], manifest["images"]
+    changed = False
+
+    for name in names:
+        full_path = os.path.join(directory, name)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            continue
+        known = files.get(name)
+        if not known or known.get("mtime") != stat.st_mtime_ns or known.get("size") != stat.st_size:
+            known = files[name] = {"hash": file_hash(full_path), "mtime": stat.st_mtime_ns, "size": stat.st_size}
+            changed = True
+        if known["hash"] not in images and Image is not None:
+            try:
+                images[known["hash"]] = describe_image(full_path)
+                changed = True
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read image {name}: {e}")
+
+    for name in [n for n in files if n not in names]:
+        del files[name]
+        changed = True
+    used = {entry["hash"] for entry in files.values()}
+    for digest in [d for d in images if d not in used]:
+        del images[digest]
+        changed = True
+
+    if changed:
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Read-only deployment: the entries are still used from memory
+    return manifest
+
+
+def media_for(manifest, name, directory=None):
+    """
+    Manifest entry for a file name (its hash, plus the image details if analysed), or None.
+    With `directory`, an entry whose recorded mtime/size no longer match the file
+    is treated as missing: its hash would version the URL of different bytes.
+    """
+    known = manifest["files"].get(name)
+    if not known:
+        return None
+    if directory is not None:
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except OSError:
+            return None
+        if known.get("mtime") != stat.st_mtime_ns or known.get("size") != stat.st_size:
+            return None
+    return {"hash": known["hash"], **manifest["images"].get(known["hash"], {})}
+
+
+def main():
+    if Image is None:
+        print("❌ Pillow is required: pip install pillow")
+        return 1
+    from api.rituals_index import RITUALS_DIR, list_images
+    names = list_images(RITUALS_DIR)
+    manifest = update_manifest(RITUALS_DIR, names)
+    print(f"✅ {MANIFEST_PATH}: {len(manifest['files'])} file(s), {len(manifest['images'])} distinct image(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import re  # Whitespace / comment patterns
+import json  # JSON-LD blocks are re-serialized compactly
+
+try:
+    import rjsmin  # JavaScript minifier (optional dependency)
+except ImportError:
+    rjsmin = None
+
+# Minifiers used by build.py on the copies in dist/ (the sources stay readable).
+# CSS and HTML are handled here with conservative rules: strings, <pre>,
+# <textarea> and <script> contents are never touched, and a run of whitespace
+# in HTML text becomes one space instead of disappearing (inline elements such
+# as `<i></i> Ring Bell` keep their gap). JavaScript needs a real tokenizer
+# (regex literals, template strings), so it is left as-is without rjsmin.
+#
+# critical_css() picks the rules that style a given HTML fragment (the header
+# and hero section of index.html) so they can be inlined in the page.
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)|(\s+)', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_HTML_RAW = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.S | re.I)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.S)
+
+
+def minify_css(css):
+    """Strips comments and redundant whitespace; strings are kept byte for byte"""
+    strings = []
+
+    def token(m):
+        if m.group(1):
+            strings.append(m.group(1))
+            return f'\0{len(strings) - 1}\0'  # Placeholder, restored below
+        return ' '  # Whitespace or a comment
+
+    text = re.sub(r' +', ' ', _CSS_TOKENS.sub(token, css))
+    text = _CSS_PUNCTUATION.sub(r'\1', text)
+    text = re.sub(r':\s+', ':', text)  # Spaces before ':' stay (`a :hover` is a descendant selector)
+    text = text.replace(';}', '}').strip()
+    return re.sub(r'\0(\d+)\0', lambda m: strings[int(m.group(1))], text)
+
+
+def minify_js(js):
+    """Minified JavaScript, or the source unchanged if rjsmin isn't installed"""
+    if rjsmin is None:
+        return js
+    return rjsmin.jsmin(js)
+
+
+def _collapse(html):
+    html = _HTML_COMMENT.sub('', html)
+    return re.sub(r'\s+', ' ', html)
+
+
+def minify_html(html):
+    """Drops comments and collapses whitespace; inline <style>, JSON-LD and scripts are minified"""
+    parts = []
+    pos = 0
+    for m in _HTML_RAW.finditer(html):
+        parts.append(_collapse(html[pos:m.start()]))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == 'style':
+            body = minify_css(body)
+        elif tag == 'script' and 'application/ld+json' in open_tag:
+            try:
+                body = json.dumps(json.loads(body), ensure_ascii=False, separators=(',', ':'))
+            except ValueError:
+                pass
+        elif tag == 'script' and body.strip():
+            body = minify_js(body)
+        parts.append(_collapse(open_tag) + body + close_tag)
+        pos = m.end()
+    parts.append(_collapse(html[pos:]))
+    return ''.join(parts).strip()
+
+
+def _blocks(css):
+    """Top-level (prelude, body) pairs of minified CSS"""
+    blocks = []
+    depth = start = 0
+    prelude = None
+    quote = None
+    for i, char in enumerate(css):
+        if quote:
+            if char == quote and css[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i]))
+                start = i + 1
+    return blocks
+
+
+def used_names(html):
+    """Tag names, classes and ids that appear in an HTML fragment"""
+    html = _HTML_COMMENT.sub('', html)  # Commented-out markup isn't rendered
+    classes = set()
+    for value in re.findall(r'\bclass\s*=\s*["\']([^"\']*)["\']', html, re.I):
+        classes.update(value.split())
+    return {
+        'tags': {t.lower() for t in re.findall(r'<([a-zA-Z][\w-]*)', html)} | {'html', 'body'},
+        'classes': classes,
+        'ids': set(re.findall(r'\bid\s*=\s*["\']([^"\']+)["\']', html, re.I)),
+    }
+
+
+def _selector_used(selector, used):
+    # Pseudo-classes and attribute selectors ([data-theme="light"]) don't decide anything
+    simple = re.sub(r'\[[^\]]*\]', '', selector)
+    simple = re.sub(r'::?[\w-]+(\([^)]*\))?', '', simple)
+    if any(c not in used['classes'] for c in re.findall(r'\.([\w-]+)', simple)):
+        return False
+    if any(i not in used['ids'] for i in re.findall(r'#([\w-]+)', simple)):
+        return False
+    tags = re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', simple)
+    return all(t.lower() in used['tags'] for t in tags)
+
+
+def critical_css(css, html):
+    """The rules of `css` (minified) that can apply to the elements in `html`"""
+    used = used_names(html)
+    keyframes = {}
+    kept = []
+    for prelude, body in _blocks(css):
+        if prelude.startswith('@keyframes'):
+            keyframes[prelude.split()[-1]] = f'{prelude}{{{body}}}'
+        elif prelude.startswith(('@media', '@supports')):
+            inner = critical_css(body, html)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@font-face'):
+            kept.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [s for s in prelude.split(',') if _selector_used(s, used)]
+            if selectors:
+                kept.append(f"{','.join(selectors)}{{{body}}}")
+    text = ''.join(kept)
+    # Animations used by the kept rules (e.g. the preloader's pulse)
+    text += ''.join(rule for name, rule in keyframes.items() if re.search(rf'\b{re.escape(name)}\b', text))
+    return text
@@ -1,43 +1,40 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import os
+from urllib.parse import urlparse, parse_qs
+from api.rituals_index import INDEX_CACHE_CONTROL, get_index, get_page, encode, etag_matches
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         try:
-            # Determine directory path
-            # Vercel functions run in a specific way, usually root is accessible
-            # We try to find 'Rituals and News' relative to current working dir
-            
-            base_dir = os.getcwd() # Usually project root
-            target_dir = os.path.join(base_dir, 'Rituals and News')
-            
-            # If not found, try going up one level (sometimes api/ is working dir)
-            if not os.path.exists(target_dir):
-                target_dir = os.path.join(os.path.dirname(base_dir), 'Rituals and News')
-                
-            if not os.path.exists(target_dir):
-                # Defines empty backup if folder keeps failing
-                content = {"rituals": [], "news": []}
+            # The index is built once per function instance (api/rituals_index.py)
+            # and only rebuilt when the 'Rituals and News' folder changes
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            if query.keys() & {'limit', 'cursor', 'category'}:
+                error, status, page = get_page(query.get('category'), query.get('cursor'), query.get('limit'))
+                if error:
+                    self.send_response(status)
+                    self.send_header('Content-type', 'application/json')
+                    self.end_headers()
+                    self.wfile.write(json.dumps({"error": error}).encode())
+                    return
+                body, etag = encode(page)
             else:
-                files = [f for f in os.listdir(target_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))]
-                content = {
-                    "rituals": [],
-                    "news": []
-                }
-                for file in files:
-                    if file.lower().startswith('rituals'):
-                        content['rituals'].append(file)
-                    elif file.lower().startswith('news'):
-                        content['news'].append(file)
-                
-                content['rituals'].sort()
-                content['news'].sort()
+                body, etag = get_index()
+
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', INDEX_CACHE_CONTROL)
+                self.end_headers()
+                return
 
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', INDEX_CACHE_CONTROL)
             self.end_headers()
-            self.wfile.write(json.dumps(content).encode())
+            self.wfile.write(body)
 
         except Exception as e:
             self.send_response(500)
@@ -0,0 +1,206 @@
+import os  # Directory listing and mtime
+import json  # The index is served as a JSON body
+import hashlib  # Strong ETag from the body
+import threading  # Request threads share one cached index
+import base64  # Opaque pagination cursors
+import bisect  # Find a cursor's position in the sorted listing
+from urllib.parse import quote  # File names in image URLs
+from api import media_manifest  # Dimensions, placeholder and color per image
+from api.compression import pick_encoding, compress_body  # The index is compressed once per encoding
+
+# Cached index of the 'Rituals and News' folder for /api/rituals.
+# The folder is listed, categorized and serialized once; later requests only
+# stat the directory. Adding, removing or renaming a file changes the
+# directory's mtime, which rebuilds the index (and its ETag) on the next request.
+# Without parameters the whole index is returned; ?limit=&cursor=&category=
+# returns one page (get_page).
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+CATEGORIES = ('rituals', 'news')  # File name prefixes (lower case)
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 100
+
+# The browser keeps the listing but checks back every time, which costs a 304
+# unless the folder changed
+INDEX_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RITUALS_DIR = os.path.join(_root, 'Rituals and News')
+
+_cache = {"key": None, "index": None, "body": None, "etag": None, "encoded": {}}
+_lock = threading.Lock()
+
+
+def list_images(directory=RITUALS_DIR):
+    """File names of the images that belong to a category ('Rituals...' or 'News...')"""
+    if not os.path.isdir(directory):
+        return []
+    names = []
+    for entry in os.scandir(directory):
+        lower = entry.name.lower()
+        if lower.endswith(IMAGE_EXTENSIONS) and lower.startswith(CATEGORIES) and entry.is_file():
+            names.append(entry.name)
+    return names
+
+
+def build_index(directory=RITUALS_DIR):
+    """
+    Categorizes the images: files starting with 'Rituals' or 'News', sorted by name.
+    "media" holds each file's manifest entry (size, placeholder, color; see media_manifest.py).
+    The manifest is only read here; build.py and `python -m api.media_manifest`
+    write it. Files added or changed since then are listed without media details.
+    """
+    names = list_images(directory)
+    manifest = media_manifest.load_manifest()
+    content = {"rituals": [], "news": [], "media": {}}
+    for name in sorted(names):
+        content['rituals' if name.lower().startswith('rituals') else 'news'].append(name)
+        media = media_manifest.media_for(manifest, name, directory)
+        if media:
+            content['media'][name] = media
+    return content
+
+
+def encode(data):
+    """JSON body and its strong ETag"""
+    body = json.dumps(data).encode('utf-8')
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _load():
+    """The cached index dict, rebuilt when the folder (or the manifest) changed"""
+    key = []
+    for path in (RITUALS_DIR, media_manifest.MANIFEST_PATH):
+        try:
+            key.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            key.append(None)  # Folder / manifest missing: serve (and cache) what there is
+    key = tuple(key)
+
+    cached = _cache
+    if cached["body"] is not None and cached["key"] == key:
+        return cached
+
+    with _lock:
+        if _cache["body"] is None or _cache["key"] != key:
+            index = build_index()
+            body, etag = encode(index)
+            _cache.update(key=key, index=index, body=body, etag=etag, encoded={})
+        return _cache
+
+
+def get_index():
+    """Returns (json body bytes, strong ETag) for the current folder contents"""
+    cached = _load()
+    return cached["body"], cached["etag"]
+
+
+def get_encoded_index(accept_encoding=None):
+    """
+    Returns (body, strong ETag, Content-Encoding or None) for the current folder
+    contents, compressed for the client's Accept-Encoding. Each encoding is
+    compressed once (at the build-time level) and cached with the index, so a
+    request never recompresses it. The ETag carries the encoding ('"...-br"'),
+    like the responses compressed by server.compress_json.
+    """
+    cached = _load()
+    encoding = pick_encoding(accept_encoding)
+    if encoding is None:
+        return cached["body"], cached["etag"], None
+    encoded = cached["encoded"].get(encoding)
+    if encoded is None:
+        data, _ = compress_body(cached["body"], encoding, level='max')
+        # A small index isn't worth it: cached as False, sent as is
+        encoded = cached["encoded"][encoding] = (data, cached["etag"][:-1] + f'-{encoding}"') if data else False
+    if not encoded:
+        return cached["body"], cached["etag"], None
+    return encoded[0], encoded[1], encoding
+
+
+def _item(index, category, name):
+    """One listing entry: name, category, versioned URL and the media details"""
+    media = index['media'].get(name, {})
+    url = 'Rituals%20and%20News/' + quote(name)
+    if media.get('hash'):
+        url += '?v=' + media['hash']  # Content hash: the URL changes when the photo does
+    return {"name": name, "category": category, "url": url, **media}
+
+
+def static_manifest():
+    """
+    The whole listing in the shape of one /api/rituals page, with a versioned
+    URL per image. Written to rituals.json at build time (build.py) so the page
+    can read it from the CDN instead of calling the function.
+    """
+    index = _load()["index"]
+    items = [_item(index, cat, name) for cat in ('rituals', 'news') for name in index[cat]]
+    version = hashlib.sha256(json.dumps(items, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return {"version": version, "items": items, "nextCursor": None}
+
+
+def _encode_cursor(category, name):
+    return base64.urlsafe_b64encode(f"{category}/{name}".encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    category, _, name = base64.urlsafe_b64decode(padded).decode('utf-8').partition('/')
+    if category not in ('rituals', 'news'):
+        raise ValueError("Invalid cursor")
+    return category, name
+
+
+def get_page(category=None, cursor=None, limit=None):
+    """
+    One page of the index: {"items": [{name, category, ...media}], "nextCursor"}.
+    Items are ordered rituals first, then news, each by name. The cursor names
+    the last item returned, so posts added meanwhile don't shift later pages.
+    Returns (error, status, page).
+    """
+    if category not in (None, '', 'rituals', 'news'):
+        return "category must be 'rituals' or 'news'", 400, None
+    try:
+        limit = min(MAX_PAGE_SIZE, max(1, int(limit or DEFAULT_PAGE_SIZE)))
+        after = _decode_cursor(cursor) if cursor else None
+    except (ValueError, UnicodeDecodeError):
+        return "Invalid limit or cursor", 400, None
+
+    index = _load()["index"]
+    order = ('rituals', 'news')
+    items = []
+    for cat in order:
+        if category and cat != category:
+            continue
+        if after and order.index(cat) < order.index(after[0]):
+            continue
+        names = index[cat]
+        start = bisect.bisect_right(names, after[1]) if after and after[0] == cat else 0
+        for name in names[start:start + limit + 1 - len(items)]:
+            items.append(_item(index, cat, name))
+        if len(items) > limit:
+            break
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1]['category'], items[-1]['name'])
+    return None, 200, {"items": items, "nextCursor": next_cursor}
+
+
+def _strip_encoding(etag):
+    # The same body sent compressed carries the encoding in its ETag ("...-gzip")
+    for suffix in ('-br"', '-gzip"'):
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value covers this ETag (in any of its encodings)"""
+    if not if_none_match:
+        return False
+    etag = _strip_encoding(etag)
+    for candidate in if_none_match.split(','):
+        candidate = _strip_encoding(candidate.strip().removeprefix('W/'))
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
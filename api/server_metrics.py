@@ -0,0 +1,97 @@
+import os  # Worker pid in the stats
+import socket  # TCP_INFO on the listening socket
+import struct  # Unpack struct tcp_info
+import threading  # Request threads update the counters
+import time  # Request timings
+
+# Request-queue metrics for the self-hosted server (gunicorn.conf.py calls
+# request_started / request_finished from its pre_request / post_request hooks).
+# Each worker process keeps its own counters; /api/server/stats reports the
+# worker that answered plus the accept queue of the shared listening socket:
+#   listenQueue  connections accepted by the kernel that no worker picked up yet
+#   queueWaitMs  time between the proxy receiving the request and a thread starting
+#                it, from the X-Request-Start header (nginx: "t=${msec}")
+#   active       requests in progress in this worker (at most `threads`)
+_EMPTY = {"requests": 0, "active": 0, "maxActive": 0, "totalMs": 0.0, "maxMs": 0.0,
+          "queued": 0, "totalQueueWaitMs": 0.0, "maxQueueWaitMs": 0.0}
+_stats = dict(_EMPTY)
+_lock = threading.Lock()
+_settings = {"workers": None, "threads": None, "startedAt": time.time()}
+_listeners = []  # Listening sockets shared by the workers (set after fork)
+
+
+def configure(listeners=(), workers=None, threads=None):
+    """Called in each worker after fork: the sockets to inspect and the pool sizes"""
+    _listeners[:] = list(listeners)
+    _settings.update(workers=workers, threads=threads, startedAt=time.time())
+    with _lock:
+        _stats.update(_EMPTY)  # Don't inherit the master's counters
+
+
+def queue_wait_ms(header, now=None):
+    """Milliseconds since X-Request-Start ('t=<seconds or ms or µs>' or a bare number), or None"""
+    if not header:
+        return None
+    try:
+        value = float(header.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    # Proxies send seconds (nginx ${msec}), milliseconds or microseconds since the epoch
+    while value > 1e11:
+        value /= 1000
+    wait = ((now or time.time()) - value) * 1000
+    return max(wait, 0.0) if wait < 3600 * 1000 else None  # Skewed clocks: ignore
+
+
+def request_started(request_start_header=None):
+    """Marks a request as in progress; returns the start time for request_finished"""
+    wait = queue_wait_ms(request_start_header)
+    with _lock:
+        _stats["active"] += 1
+        _stats["maxActive"] = max(_stats["maxActive"], _stats["active"])
+        if wait is not None:
+            _stats["queued"] += 1
+            _stats["totalQueueWaitMs"] += wait
+            _stats["maxQueueWaitMs"] = max(_stats["maxQueueWaitMs"], wait)
+    return time.monotonic()
+
+
+def request_finished(started):
+    elapsed_ms = (time.monotonic() - started) * 1000
+    with _lock:
+        _stats["active"] = max(_stats["active"] - 1, 0)
+        _stats["requests"] += 1
+        _stats["totalMs"] += elapsed_ms
+        _stats["maxMs"] = max(_stats["maxMs"], elapsed_ms)
+
+
+def listen_queue(sock):
+    """(waiting connections, backlog size) of a listening TCP socket; (None, None) off Linux"""
+    if not hasattr(socket, 'TCP_INFO') or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return None, None
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 104)
+        # struct tcp_info: 8 x u8, then u32 rto, ato, snd_mss, rcv_mss, unacked, sacked.
+        # For a listening socket unacked is the accept queue length and sacked its limit.
+        fields = struct.unpack_from('8B6I', info)
+        return fields[12], fields[13]
+    except (OSError, struct.error):
+        return None, None
+
+
+def get_server_stats():
+    with _lock:
+        stats = dict(_stats)
+    total_ms, total_wait = stats.pop("totalMs"), stats.pop("totalQueueWaitMs")
+    stats["avgMs"] = round(total_ms / stats["requests"], 1) if stats["requests"] else None
+    stats["avgQueueWaitMs"] = round(total_wait / stats["queued"], 1) if stats["queued"] else None
+    stats["maxMs"] = round(stats["maxMs"], 1)
+    stats["maxQueueWaitMs"] = round(stats["maxQueueWaitMs"], 1)
+    stats["pid"] = os.getpid()
+    stats["workers"] = _settings["workers"]
+    stats["threads"] = _settings["threads"]
+    stats["uptimeSeconds"] = round(time.time() - _settings["startedAt"])
+    queues = [q for q in (listen_queue(getattr(s, 'sock', s)) for s in _listeners) if q[0] is not None]
+    stats["listenQueue"] = sum(q for q, _ in queues) if queues else None
+    stats["listenBacklog"] = sum(b for _, b in queues) if queues else None
+    return stats
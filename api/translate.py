@@ -0,0 +1,62 @@
+from google import genai  # The official Google Gemini AI SDK
+from google.genai import types  # Types for the SDK parts
+
+# Model used for every conversion (confirmed working, fast and cost-effective)
+MODEL_NAME = 'gemini-2.5-flash'
+
+
+def build_prompt(target_lang):
+    """Constructs the detailed prompt for the AI"""
+    return f"""Analyze this image containing text in Kaithi or Urdu script. Translate the full content into {target_lang}.
+        
+        Output strictly in this format:
+        
+        Translated text :
+        -------
+        [Insert the translation here]
+        
+        Do NOT provide the original transcription or any explanations."""
+
+
+def build_contents(image_bytes, mime_type, target_lang):
+    """The prompt and the document, as sent to the model"""
+    return [
+        build_prompt(target_lang),
+        types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+    ]
+
+
+def translate_document(api_key, image_bytes, mime_type, target_lang):
+    """
+    Sends the document image to Gemini and returns the translated text.
+    Shared by the Flask server and the Vercel functions (convert/uploads).
+    """
+    # Create client instance with the key
+    client = genai.Client(api_key=api_key)
+
+    response = client.models.generate_content(
+        model=MODEL_NAME,
+        contents=build_contents(image_bytes, mime_type, target_lang)
+    )
+    return response.text
+
+
+# One client per key for the async app: its connection pool is reused by every
+# conversion in the process (an ASGI server runs a single event loop per process)
+_async_clients = {}
+
+
+async def translate_document_async(api_key, image_bytes, mime_type, target_lang):
+    """
+    Same as translate_document, for the ASGI app (asgi.py): awaits Gemini
+    instead of holding a thread while the model works.
+    """
+    client = _async_clients.get(api_key)
+    if client is None:
+        client = _async_clients[api_key] = genai.Client(api_key=api_key)
+
+    response = await client.aio.models.generate_content(
+        model=MODEL_NAME,
+        contents=build_contents(image_bytes, mime_type, target_lang)
+    )
+    return response.text
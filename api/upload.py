@@ -0,0 +1,109 @@
+import base64  # To measure the decoded size of the uploaded image
+import math  # To reject NaN / infinite sizes reported by the client
+
+# Upload targets advertised to the browser via /api/convert/limits.
+# script.js resizes and recompresses the picked file in the browser to fit
+# these numbers before sending it, so phones on slow 3G/4G links upload a few
+# hundred KB instead of the original 5-12 MB camera file.
+UPLOAD_LIMITS = {
+    "maxEdge": 2048,            # Longest side (px) after resizing; enough for Gemini to read handwriting
+    "targetBytes": 1_200_000,   # Size the client should aim for after recompression
+    "maxBytes": 3_000_000,      # Hard limit enforced here (Vercel bodies cap at 4.5 MB of base64)
+    "outputType": "image/jpeg", # Format the client re-encodes to
+    "quality": 0.85,            # Starting JPEG quality, lowered step by step to hit targetBytes
+    "minQuality": 0.5,          # Never go below this, text must stay legible
+    "acceptedTypes": ["image/jpeg", "image/png", "image/webp", "application/pdf"],
+    "chunkSize": 512 * 1024,    # Resumable uploads send raw chunks of this size (fits any function body limit)
+    "maxChunkedBytes": 15_000_000,  # Hard limit for resumable uploads (e.g. PDFs that can't be resized)
+}
+
+# Leading bytes of each accepted type: the declared mimeType is only trusted if the data agrees
+SIGNATURES = {
+    "image/jpeg": lambda data: data[:3] == b"\xff\xd8\xff",
+    "image/png": lambda data: data[:8] == b"\x89PNG\r\n\x1a\n",
+    "image/webp": lambda data: data[:4] == b"RIFF" and data[8:12] == b"WEBP",
+    "application/pdf": lambda data: data[:5] == b"%PDF-",
+}
+
+
+def sniff_type(data):
+    """The accepted type the bytes actually are, or None"""
+    return next((mime for mime, matches in SIGNATURES.items() if matches(data)), None)
+
+
+def client_number(value):
+    """
+    A size reported by the browser as a non-negative number, or None.
+    The upload metadata comes straight from the request body: strings, bools,
+    NaN or negative values are dropped instead of reaching the logs.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+        return None
+    return value
+
+
+def decode_upload(image_data):
+    """
+    Decodes the Base64 image string from the request body.
+    Returns the raw bytes, or None if the string is not valid Base64.
+    """
+    try:
+        return base64.b64decode(image_data, validate=True)
+    except (ValueError, TypeError):
+        return None
+
+
+def check_upload(image_bytes, mime_type, client_meta=None, max_bytes=None):
+    """
+    Validates an uploaded image against UPLOAD_LIMITS.
+    max_bytes overrides the single-request limit (used for chunked uploads).
+    Returns (error, status, record): error is None when the upload is accepted,
+    record describes what the client sent so it can be logged.
+    """
+    client_meta = client_meta if isinstance(client_meta, dict) else {}
+
+    # What the browser says it did (sizes before/after resizing)
+    record = {
+        "bytes": len(image_bytes),
+        "mimeType": mime_type,
+        "originalBytes": client_number(client_meta.get("originalBytes")),
+        "originalWidth": client_number(client_meta.get("originalWidth")),
+        "originalHeight": client_number(client_meta.get("originalHeight")),
+        "width": client_number(client_meta.get("width")),
+        "height": client_number(client_meta.get("height")),
+        "resized": client_meta.get("resized") is True,
+    }
+
+    if mime_type not in UPLOAD_LIMITS["acceptedTypes"]:
+        return f"Unsupported file type: {mime_type}", 415, record
+
+    max_bytes = max_bytes or UPLOAD_LIMITS["maxBytes"]
+    if len(image_bytes) > max_bytes:
+        return f"Image too large ({len(image_bytes)} bytes, limit {max_bytes})", 413, record
+
+    # The declared type goes to Gemini as-is: the bytes must really be that type
+    record["sniffedType"] = sniff_type(image_bytes)
+    if record["sniffedType"] != mime_type:
+        return f"File content does not match its type {mime_type}", 415, record
+
+    # The client-reported size should match what actually arrived
+    claimed = client_number(client_meta.get("bytes"))
+    record["sizeMismatch"] = claimed is not None and claimed != len(image_bytes)
+
+    return None, 200, record
+
+
+def describe_upload(record):
+    """Formats an upload record as a one-line summary for the console logs."""
+    line = f"{record['bytes'] / 1024:.0f} KB {record['mimeType']}"
+    if record.get("width") and record.get("height"):
+        line += f" ({record['width']}x{record['height']})"
+    if record.get("resized") and record.get("originalBytes"):
+        line += f", resized from {record['originalBytes'] / 1024:.0f} KB"
+        if record.get("originalWidth") and record.get("originalHeight"):
+            line += f" ({record['originalWidth']}x{record['originalHeight']})"
+    if record.get("sniffedType", record["mimeType"]) != record["mimeType"]:
+        line += f" [content is {record['sniffedType'] or 'unknown'}]"
+    if record.get("sizeMismatch"):
+        line += " [size mismatch with client report]"
+    return line
@@ -0,0 +1,108 @@
+import os  # To access environment variables
+import json  # To handle JSON input and output
+import time  # To time each conversion for the audit log
+from http.server import BaseHTTPRequestHandler  # Vercel's standard Python handler
+from urllib.parse import urlparse, parse_qs  # To read the upload ID from the rewritten URL
+from api import chunked_upload  # Spool logic shared with server.py
+from api.upload import UPLOAD_LIMITS, check_upload, describe_upload
+from api.translate import translate_document
+
+class handler(BaseHTTPRequestHandler):
+    """
+    Vercel variant of the resumable chunked upload endpoints.
+    vercel.json rewrites /api/convert/uploads[/<id>[/finalize]] to this function
+    with ?id=<id>&action=finalize.
+
+    Chunks (UPLOAD_LIMITS['chunkSize'], raw bytes) stay far below the 4.5 MB body
+    limit and are spooled in /tmp. /tmp belongs to one function instance, so
+    resuming only works while the requests reach the same instance: if a later
+    request lands on another one the upload is reported as 404 and the browser
+    starts it again (once).
+    """
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _query(self):
+        return {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+    def _read_body(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(content_length) if content_length else b''
+
+    def do_GET(self):
+        """Report how many bytes have arrived so the client can resume"""
+        error, status, info = chunked_upload.get_upload(self._query().get('id'))
+        self._send_json(status, {"error": error, **(info or {})} if error else info)
+
+    def do_PUT(self):
+        """Append one chunk at ?offset=N"""
+        query = self._query()
+        try:
+            offset = int(query.get('offset', ''))
+        except ValueError:
+            offset = None
+        error, status, info = chunked_upload.write_chunk(query.get('id'), offset, self._read_body())
+        self._send_json(status, {"error": error, **(info or {})} if error else info)
+
+    def do_POST(self):
+        """Start an upload (no id) or finalize it (?action=finalize)"""
+        query = self._query()
+        try:
+            if query.get('action') == 'finalize':
+                self._finalize(query.get('id'))
+                return
+
+            data = json.loads(self._read_body() or b'{}')
+            error, status, info = chunked_upload.create_upload(
+                data.get('size'), data.get('mimeType'), data.get('targetLang'),
+                data.get('sha256'), data.get('upload')
+            )
+            self._send_json(status, {"error": error, "limits": UPLOAD_LIMITS} if error else info)
+
+        except Exception as e:
+            self._send_json(500, {"error": "Failed to process document", "details": str(e)})
+
+    def _finalize(self, upload_id):
+        """Assemble the chunks and run the same conversion as api/convert.py"""
+        error, status, result = chunked_upload.finish_upload(upload_id)
+        if error:
+            self._send_json(status, {"error": error, **(result or {})})
+            return
+
+        image_bytes, mime_type, target_lang = result['bytes'], result['mimeType'], result['targetLang']
+        upload_error, upload_status, upload_record = check_upload(
+            image_bytes, mime_type, result['client'], max_bytes=UPLOAD_LIMITS['maxChunkedBytes']
+        )
+        print(f"📦 [UPLOAD] chunked {describe_upload(upload_record)}")
+        if upload_error:
+            chunked_upload.discard_upload(upload_id)  # Sending it again won't help
+            self._send_json(upload_status, {"error": upload_error, "limits": UPLOAD_LIMITS})
+            return
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found")
+        started = time.monotonic()
+        text = translate_document(api_key, image_bytes, mime_type, target_lang)
+        latency_ms = (time.monotonic() - started) * 1000
+        # Only now: a failed conversion keeps the spool so finalizing again retries it
+        chunked_upload.discard_upload(upload_id)
+
+        # Silent Logging (Audit Trail), never breaks the response
+        try:
+            user_ip = self.headers.get('x-forwarded-for', self.client_address[0])
+            print(f"🔒 [AUDIT] IP: {user_ip} | Target: {target_lang}")
+            from api.logger import log_to_github
+            log_to_github(user_ip, target_lang, text, latency_ms)
+        except Exception as log_err:
+            print(f"GitHub Logging Failed: {log_err}")
+
+        # Audit entries are posted by the logger's flusher / the api/audit_flush.py cron
+        self._send_json(200, {"text": text})
@@ -0,0 +1,296 @@
+"""
+Async (ASGI) variant of server.py for self-hosting under heavy conversion load.
+
+A conversion spends nearly all its time waiting on Gemini. In server.py that
+wait holds a worker thread; here it is an awaited call on the SDK's async
+client, so one process can keep hundreds of conversions in flight.
+
+    pip install -r requirements-asgi.txt
+    hypercorn asgi:app --bind 0.0.0.0:8000      # or: uvicorn asgi:app
+
+Same routes as server.py for the site itself: /api/convert (plus limits and
+chunked uploads), /api/rituals, /api/analytics and the static files. The
+monitoring endpoints (/api/*/stats, summaries) and /img stay in server.py.
+"""
+import os  # Standard library for OS-level operations
+import time  # To time each conversion for the audit log
+import asyncio  # Disk work runs in threads; a semaphore bounds concurrent conversions
+import mimetypes  # Content-Type of static files sent from their precompressed copies
+from quart import Quart, request, jsonify, send_file, abort  # Async, Flask-compatible framework
+from werkzeug.security import safe_join  # Keeps requested paths inside the served folder
+from dotenv import load_dotenv  # Library to load environment variables from .env file
+from api.translate import translate_document_async  # Gemini call on the SDK's async client
+from api.upload import UPLOAD_LIMITS, decode_upload, check_upload, describe_upload  # Upload size negotiation
+from api import chunked_upload  # Resumable chunked uploads staged on disk
+from api.media_files import content_hash, cache_control, is_public, is_private  # ETags / Cache-Control for served files
+from api.compression import COMPRESSIBLE_EXTENSIONS, pick_precompressed, compress_body  # Content-Encoding
+
+try:
+    from quart_cors import cors  # Lets a frontend on another port call the API locally (optional)
+except ImportError:
+    cors = None
+
+# Load environment variables from .env file (e.g., API Keys)
+load_dotenv()
+
+# Conversions in progress at once. A slot is taken before the request body is
+# read and held through decoding, validation and the model call, so at most this
+# many documents are parsed and decoded at a time; the rest wait their turn.
+# (A waiting request's raw body can still be buffered by Quart, up to its
+# MAX_CONTENT_LENGTH.)
+MAX_CONCURRENT_CONVERSIONS = int(os.getenv("MAX_CONCURRENT_CONVERSIONS", "200"))
+_conversion_slots = None  # asyncio.Semaphore, created inside the running event loop
+
+
+def conversion_slot():
+    """The semaphore bounding conversions (created on first use, inside the event loop)"""
+    global _conversion_slots
+    if _conversion_slots is None:
+        _conversion_slots = asyncio.Semaphore(MAX_CONCURRENT_CONVERSIONS)
+    return _conversion_slots
+
+
+async def send_media(directory, filename):
+    """Async version of server.send_media: strong ETag, 304/206, precompressed siblings"""
+    path = safe_join(os.path.abspath(directory), filename)
+    # Folder routes ('Rituals and News') are checked as that folder of the site
+    folder = '' if os.path.abspath(directory) == os.path.abspath(app.static_folder) else os.path.basename(directory)
+    if path is None or not is_public(filename, folder) or is_private(path) or not os.path.isfile(path):
+        abort(404)
+    digest = await asyncio.to_thread(content_hash, path)  # Hashes the file on first use
+    encoded_path, encoding = (None, None) if request.range else pick_precompressed(
+        path, request.headers.get('Accept-Encoding'))
+    response = await send_file(encoded_path or path, mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+                               add_etags=False, last_modified=os.path.getmtime(path))
+    response.set_etag(digest[:32] + (f'-{encoding}' if encoding else ''))
+    await response.make_conditional(request, accept_ranges=True,
+                                    complete_length=os.path.getsize(encoded_path or path))
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if path.endswith(COMPRESSIBLE_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control(filename, digest, request.args.get('v'))
+    return response
+
+
+class ThaweDhamAsyncApp(Quart):
+    async def send_static_file(self, filename):
+        # Static files go through the same caching / Range handling as the other media
+        return await send_media(self.static_folder, filename)
+
+
+# Same static layout as server.py (STATIC_DIR=dist serves the output of build.py)
+app = ThaweDhamAsyncApp(__name__, static_folder=os.getenv('STATIC_DIR', '.'), static_url_path='')
+if cors is not None:
+    app = cors(app)
+
+
+@app.route('/')
+async def home():
+    """Serve the main HTML file"""
+    return await app.send_static_file('index.html')
+
+
+@app.after_request
+async def compress_json(response):
+    """Compresses dynamic JSON responses; already encoded bodies are left alone (same as server.compress_json)"""
+    if (response.mimetype != 'application/json' or response.status_code != 200
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    data, encoding = compress_body(await response.get_data(), request.headers.get('Accept-Encoding'))
+    if data is None:
+        return response
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+async def run_conversion(image_bytes, mime_type, target_lang):
+    """
+    Translates a validated document and logs the activity.
+    Shared by /api/convert and the finalize step of chunked uploads; both call
+    it while holding a conversion_slot().
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return jsonify({"error": "No API Key found"}), 500
+
+    # Await the model: no thread is held while Gemini works on the document
+    started = time.monotonic()
+    text = await translate_document_async(api_key, image_bytes, mime_type, target_lang)
+    latency_ms = (time.monotonic() - started) * 1000
+
+    # --- LOGGING ---
+    try:
+        from api.logger import log_to_github
+        user_ip = request.remote_addr
+        print(f"🔒 Logging to GitHub for IP: {user_ip}")
+        # Spools to disk (file writes): run it in a thread; delivery happens on the logger's own thread
+        await asyncio.to_thread(log_to_github, user_ip, target_lang, text, latency_ms)
+    except Exception as log_ex:
+        print(f"❌ Logger failed: {log_ex}")
+    # ---------------
+
+    return jsonify({"text": text})
+
+
+@app.route('/api/convert/limits', methods=['GET'])
+async def convert_limits():
+    """Tell the browser how far to downscale images before uploading them"""
+    return jsonify(UPLOAD_LIMITS)
+
+
+@app.route('/api/convert', methods=['POST'])
+async def convert_kaithi():
+    """Same contract as server.py's /api/convert: {image, mimeType, targetLang, upload} -> {text}"""
+    print("📨 Request received at /api/convert (async)")
+    async with conversion_slot():  # Before the body is parsed: bounds the documents held in memory
+        return await _convert()
+
+
+async def _convert():
+    try:
+        data = await request.get_json()
+        image_data = data.get('image')      # Base64 image string
+        mime_type = data.get('mimeType')    # Image type (e.g., 'image/png')
+        target_lang = data.get('targetLang') # Target language string
+        upload_meta = data.get('upload')    # Sizes reported by the browser after resizing
+
+        if not image_data or not mime_type or not target_lang:
+            return jsonify({"error": "Missing required fields"}), 400
+
+        # Base64-decoding a multi-MB upload is CPU work: keep it off the event loop
+        image_bytes = await asyncio.to_thread(decode_upload, image_data)
+        if image_bytes is None:
+            return jsonify({"error": "Invalid image data"}), 400
+
+        upload_error, upload_status, upload_record = await asyncio.to_thread(
+            check_upload, image_bytes, mime_type, upload_meta)
+        print(f"   - Upload: {describe_upload(upload_record)}")
+        if upload_error:
+            return jsonify({"error": upload_error, "limits": UPLOAD_LIMITS}), upload_status
+
+        return await run_conversion(image_bytes, mime_type, target_lang)
+
+    except Exception as e:
+        print(f"❌ Server Error: {str(e)}")
+        return jsonify({"error": "Failed to process document", "details": str(e)}), 500
+
+
+# --- RESUMABLE CHUNKED UPLOADS (same protocol as server.py) ---
+
+@app.route('/api/convert/uploads', methods=['POST'])
+async def start_chunked_upload():
+    """Start a resumable upload for a large scan"""
+    data = await request.get_json(silent=True) or {}
+    error, status, info = await asyncio.to_thread(
+        chunked_upload.create_upload, data.get('size'), data.get('mimeType'), data.get('targetLang'),
+        data.get('sha256'), data.get('upload')
+    )
+    if error:
+        return jsonify({"error": error, "limits": UPLOAD_LIMITS}), status
+    print(f"📥 Chunked upload started: {info['uploadId']} ({info['size']} bytes)")
+    return jsonify(info), status
+
+
+@app.route('/api/convert/uploads/<upload_id>', methods=['GET', 'PUT'])
+async def chunked_upload_status(upload_id):
+    """Report the received offset (GET) or append one chunk (PUT)"""
+    if request.method == 'GET':
+        error, status, info = await asyncio.to_thread(chunked_upload.get_upload, upload_id)
+    else:
+        offset = request.args.get('offset', type=int)
+        body = await request.get_data()
+        error, status, info = await asyncio.to_thread(chunked_upload.write_chunk, upload_id, offset, body)
+    if error:
+        return jsonify({"error": error, **(info or {})}), status
+    return jsonify(info), status
+
+
+@app.route('/api/convert/uploads/<upload_id>/finalize', methods=['POST'])
+async def finalize_chunked_upload(upload_id):
+    """Assemble the spooled chunks and convert the document"""
+    async with conversion_slot():  # Before the chunks are read back from disk
+        return await _finalize(upload_id)
+
+
+async def _finalize(upload_id):
+    try:
+        error, status, result = await asyncio.to_thread(chunked_upload.finish_upload, upload_id)
+        if error:
+            return jsonify({"error": error, **(result or {})}), status
+
+        image_bytes, mime_type = result['bytes'], result['mimeType']
+        upload_error, upload_status, upload_record = await asyncio.to_thread(
+            check_upload, image_bytes, mime_type, result['client'], max_bytes=UPLOAD_LIMITS['maxChunkedBytes']
+        )
+        print(f"📨 Chunked upload finalized: {upload_id}")
+        print(f"   - Upload: {describe_upload(upload_record)}")
+        if upload_error:
+            await asyncio.to_thread(chunked_upload.discard_upload, upload_id)  # Sending it again won't help
+            return jsonify({"error": upload_error, "limits": UPLOAD_LIMITS}), upload_status
+
+        response = await run_conversion(image_bytes, mime_type, result['targetLang'])
+        # Failed conversions (raised, or an error tuple) keep the spool:
+        # finalizing again retries without re-uploading
+        if not isinstance(response, tuple):
+            await asyncio.to_thread(chunked_upload.discard_upload, upload_id)
+        return response
+
+    except Exception as e:
+        print(f"❌ Server Error: {str(e)}")
+        return jsonify({"error": "Failed to process document", "details": str(e)}), 500
+
+
+@app.route('/api/analytics', methods=['POST'])
+async def collect_analytics():
+    """Buffer analytics events (same as server.py); the store flushes on its own thread"""
+    from api.analytics_store import MAX_BODY_BYTES, parse_events, record_event
+    if request.content_length and request.content_length > MAX_BODY_BYTES:
+        return '', 413
+    try:
+        events = parse_events(await request.get_data())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    visitor = f"{request.remote_addr}|{request.headers.get('User-Agent', '')}"
+    for event in events:
+        record_event(event, visitor)
+    return '', 204
+
+
+@app.route('/api/rituals', methods=['GET'])
+async def get_rituals_news_content():
+    """The Rituals & News listing or one page of it, with ETag / 304 (same as server.py)"""
+    from api.rituals_index import INDEX_CACHE_CONTROL, get_encoded_index, get_page, encode, etag_matches
+    if request.args.keys() & {'limit', 'cursor', 'category'}:
+        error, status, page = await asyncio.to_thread(get_page, request.args.get('category'),
+                                                      request.args.get('cursor'), request.args.get('limit'))
+        if error:
+            return jsonify({"error": error}), status
+        (body, etag), encoding = encode(page), None  # compress_json compresses the page
+    else:
+        # Cached (compressed once per encoding) until the folder changes; a rebuild
+        # lists the folder and reads the manifest, so it runs in a thread
+        body, etag, encoding = await asyncio.to_thread(get_encoded_index, request.headers.get('Accept-Encoding'))
+    headers = {'ETag': etag, 'Cache-Control': INDEX_CACHE_CONTROL, 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return '', 304, headers
+    if encoding:
+        headers['Content-Encoding'] = encoding  # compress_json leaves encoded bodies alone
+    return app.response_class(body, mimetype='application/json', headers=headers)
+
+
+# Serve the 'Rituals and News' directory as static files
+@app.route('/Rituals and News/<path:filename>')
+async def serve_rituals_news_files(filename):
+    return await send_media('Rituals and News', filename)
+
+
+# Entry point: development run (production: hypercorn asgi:app)
+if __name__ == '__main__':
+    print("🚀 Async Kaithi Converter Server starting on http://localhost:5000")
+    app.run(port=5000, debug=True)
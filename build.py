@@ -0,0 +1,399 @@
+"""
+Build steps that run before a deploy (Vercel runs `python3 build.py` and
+serves the dist/ folder, see vercel.json).
+
+    python build.py              # every step, in order
+    python build.py rituals      # only the listed steps (dist/ must exist)
+
+The source files are never modified: the site is copied to dist/ and every
+step works on that copy. Preview a build locally with
+    STATIC_DIR=dist python server.py
+"""
+import os
+import re
+import sys
+import json
+import gzip
+import shutil
+import hashlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(ROOT, os.getenv("BUILD_DIR", "dist"))
+sys.path.insert(0, ROOT)
+
+# What gets deployed as static files
+SITE_FILES = ("index.html", "rituals-news.html", "style.css", "script.js", "sw.js", "manifest.json",
+              "festivals_2026.json", "robots.txt", "sitemap.xml", "CNAME")
+SITE_DIRS = ("Images", "Audio", "Rituals and News")
+
+# Fingerprinted as <name>.<hash>.<ext>. Leaves first: the code files are
+# hashed after their own references to the leaves were rewritten.
+FINGERPRINT_LEAVES = ("Images", "Audio", "fonts", "festivals_2026.json")
+FINGERPRINT_CODE = ("style.css", "fonts.css", "script.js")
+PAGES = ("index.html", "rituals-news.html", "manifest.json")  # Keep their names; references rewritten
+HASH_LENGTH = 8
+
+# Third-party font / icon stylesheets replaced by the self-hosted subsets (fonts step)
+FONT_LINKS = (
+    r'<link[^>]*rel="preconnect"[^>]*fonts\.(?:googleapis|gstatic)\.com[^>]*>',
+    r'<link[^>]*fonts\.googleapis\.com/css2[^>]*>',
+    r'<link[^>]*font-awesome[^>]*all\.min\.css[^>]*>',
+)
+
+# Minified in place before fingerprinting (sw.js is left readable: the sw step edits it)
+MINIFY_FILES = ("index.html", "rituals-news.html", "style.css", "script.js")
+CRITICAL_PAGE = "index.html"  # Gets the header/hero CSS inlined, the rest of style.css loads async
+STYLESHEET_LINK = '<link rel="stylesheet" href="style.css">'
+
+# Estimated LCP uses Lighthouse's mobile throttling (slow 4G). It only models the
+# first-party critical path (HTML -> render-blocking CSS -> hero image), so it is
+# for comparing builds, not a measurement; fonts and CDN scripts are left out.
+RTT_MS = 150
+BYTES_PER_MS = 1.6 * 1000 * 1000 / 8 / 1000
+
+
+def dist_path(name):
+    return os.path.join(BUILD_DIR, *name.split("/"))
+
+
+def file_digest(name):
+    with open(dist_path(name), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_json(name, data):
+    """Writes a JSON file into the build (atomically) and returns its size"""
+    path = dist_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return len(body)
+
+
+def load_asset_map():
+    """Original name -> fingerprinted name, as written by the assets step"""
+    try:
+        with open(dist_path("asset-manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except OSError:
+        return {}
+
+
+def build_site():
+    """Copies the deployable files into a fresh dist/"""
+    if os.path.isdir(BUILD_DIR):
+        shutil.rmtree(BUILD_DIR)
+    os.makedirs(BUILD_DIR)
+    for name in SITE_FILES:
+        if os.path.exists(os.path.join(ROOT, name)):
+            shutil.copy2(os.path.join(ROOT, name), dist_path(name))
+    for name in SITE_DIRS:
+        if os.path.isdir(os.path.join(ROOT, name)):
+            shutil.copytree(os.path.join(ROOT, name), dist_path(name))
+    print(f"✅ Copied the site to {os.path.relpath(BUILD_DIR, ROOT)}/")
+
+
+def build_rituals():
+    """rituals.json: the Rituals & News listing with content hashes, sizes and placeholders"""
+    from api.rituals_index import RITUALS_DIR, list_images, static_manifest
+    from api.media_manifest import Image, MANIFEST_PATH, update_manifest
+    if Image is None:
+        print("⚠️ Pillow not installed: rituals.json will have hashes but no sizes/placeholders")
+    # The only place (with `python -m api.media_manifest`) the manifest is written;
+    # the server and the functions just read it
+    media = update_manifest(RITUALS_DIR, list_images(RITUALS_DIR))
+    print(f"✅ {os.path.relpath(MANIFEST_PATH, ROOT)}: {len(media['files'])} file(s)")
+    manifest = static_manifest()
+    size = write_json("rituals.json", manifest)
+    print(f"✅ rituals.json: {len(manifest['items'])} item(s), {size / 1024:.1f} KB, version {manifest['version']}")
+
+
+def transfer_size(data):
+    """Bytes on the wire with gzip (what the reports compare)"""
+    return len(gzip.compress(data, 9, mtime=0))
+
+
+def estimate_lcp(html_bytes, blocking_css_bytes, hero_bytes):
+    """Rough LCP (ms): connection, HTML, render-blocking CSS, then the hero image"""
+    ms = 3 * RTT_MS  # DNS + TCP + TLS
+    ms += RTT_MS + html_bytes / BYTES_PER_MS
+    if blocking_css_bytes:
+        ms += RTT_MS + blocking_css_bytes / BYTES_PER_MS
+    ms += RTT_MS + hero_bytes / BYTES_PER_MS  # A CSS background: requested once styles apply
+    return round(ms)
+
+
+def hero_fragment(html):
+    """index.html up to the end of the hero section (what's on screen at first paint)"""
+    start = html.find('class="hero"')
+    end = html.find("</section>", start)
+    return html[:end] if start != -1 and end != -1 else None
+
+
+def build_fonts():
+    """Subsets the text and icon fonts to what the pages use and serves them from dist/"""
+    from api.font_subset import LOCK_PATH, SCANNED_FILES, TEXT_FONTS, build_fonts as subset_fonts, ft_subset
+    if not os.path.exists(LOCK_PATH):
+        # Nothing pinned yet: the pages keep the Google Fonts / cdnjs links
+        print(f"⚠️ No {os.path.basename(LOCK_PATH)} (python -m api.font_subset --lock): fonts stay on Google Fonts / cdnjs")
+        return
+    # With pinned sources a build without the subsets fails, unless FONTS_FALLBACK=cdn asks to keep the CDN links
+    fallback = os.getenv("FONTS_FALLBACK") == "cdn"
+    if ft_subset is None:
+        if not fallback:
+            sys.exit("❌ fontTools not installed (pip install -r requirements-build.txt); "
+                     "set FONTS_FALLBACK=cdn to keep the fonts on Google Fonts / cdnjs")
+        print("⚠️ fontTools not installed, FONTS_FALLBACK=cdn: fonts stay on Google Fonts / cdnjs")
+        return
+    texts = []
+    for name in SCANNED_FILES:
+        with open(dist_path(name), encoding="utf-8") as f:
+            texts.append(f.read())
+    try:
+        css, sizes, missing = subset_fonts(texts, BUILD_DIR)
+    except Exception as e:
+        shutil.rmtree(dist_path("fonts"), ignore_errors=True)
+        if not fallback:
+            sys.exit(f"❌ Could not build the font subsets: {e}\n"
+                     "   Set FONTS_FALLBACK=cdn to keep the fonts on Google Fonts / cdnjs instead")
+        print(f"⚠️ Could not build the font subsets ({e}), FONTS_FALLBACK=cdn: fonts stay on Google Fonts / cdnjs")
+        return
+    with open(dist_path("fonts.css"), "w", encoding="utf-8") as f:
+        f.write(css)
+
+    # Text fonts are needed for the first paint: start them with the HTML
+    preloads = "".join(f'<link rel="preload" href="fonts/{file}" as="font" type="font/woff2" crossorigin>'
+                       for *_, file in TEXT_FONTS)
+    for name in SITE_FILES:
+        if not name.endswith(".html") or not os.path.exists(dist_path(name)):
+            continue
+        with open(dist_path(name), encoding="utf-8") as f:
+            html = f.read()
+        html, replaced = re.subn(FONT_LINKS[2], preloads + '<link rel="stylesheet" href="fonts.css">', html)
+        if replaced:
+            for pattern in FONT_LINKS[:2]:
+                html = re.sub(pattern, "", html)
+            with open(dist_path(name), "w", encoding="utf-8") as f:
+                f.write(html)
+
+    for file, (source, subset) in sizes.items():
+        print(f"   fonts/{file}: {source / 1024:.1f} -> {subset / 1024:.1f} KB")
+    if missing:
+        print(f"   {len(missing)} character(s) left to system fonts (e.g. {''.join(missing[:12])})")
+    print(f"✅ Self-hosted {len(sizes)} font subset(s), fonts.css {len(css.encode('utf-8')) / 1024:.1f} KB")
+
+
+def build_audio():
+    """Trims the sound effects, adds Opus/AAC copies and lists them as <source>s in the pages"""
+    from api.audio_variants import FFMPEG, transcode
+    if not FFMPEG:
+        print("⚠️ ffmpeg not found (set FFMPEG): audio is deployed as-is")
+        return
+    audio_dir = dist_path("Audio")
+    names = sorted(f for f in os.listdir(audio_dir) if f.endswith(".mp3")) if os.path.isdir(audio_dir) else []
+    for file in names:
+        path = os.path.join(audio_dir, file)
+        original = os.path.getsize(path)
+        try:
+            variants = transcode(path, audio_dir)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ Could not transcode Audio/{file}: {e}")
+            continue
+        # <audio src="Audio/bell.mp3"> -> <audio><source src="Audio/bell.ogg" type="..."> ...
+        sources = "".join(f'<source src="Audio/{name}" type="{mime}">' for name, mime, _ in variants)
+        tag = re.compile(r'<audio([^>]*?)\s+src="(?:\./)?Audio/' + re.escape(file) + r'"([^>]*)>')
+        for page in PAGES:
+            if page.endswith(".html") and os.path.exists(dist_path(page)):
+                with open(dist_path(page), encoding="utf-8") as f:
+                    html = f.read()
+                html, replaced = tag.subn(lambda m: f"<audio{m.group(1)}{m.group(2)}>{sources}", html)
+                if replaced:
+                    with open(dist_path(page), "w", encoding="utf-8") as f:
+                        f.write(html)
+        sizes = ", ".join(f"{os.path.splitext(name)[1][1:]} {size / 1024:.1f} KB" for name, _, size in variants)
+        print(f"   Audio/{file}: {original / 1024:.1f} KB -> {sizes}")
+    print(f"✅ Transcoded {len(names)} audio file(s)")
+
+
+def build_minified():
+    """Minifies HTML/CSS/JS and inlines the hero's CSS into index.html; writes build-report.json"""
+    from api.minify import critical_css, minify_css, minify_html, minify_js, rjsmin
+    if rjsmin is None:
+        print("⚠️ rjsmin not installed: JavaScript is not minified")
+    minifiers = {".html": minify_html, ".css": minify_css, ".js": minify_js}
+    sources = {}
+    files = {}
+    for name in MINIFY_FILES:
+        if not os.path.exists(dist_path(name)):
+            continue
+        with open(dist_path(name), encoding="utf-8") as f:
+            sources[name] = f.read()
+        minified = minifiers[os.path.splitext(name)[1]](sources[name])
+        with open(dist_path(name), "w", encoding="utf-8") as f:
+            f.write(minified)
+        before, after = sources[name].encode("utf-8"), minified.encode("utf-8")
+        files[name] = {"bytes": [len(before), len(after)], "gzip": [transfer_size(before), transfer_size(after)]}
+
+    report = {"files": files}
+    page = sources.get(CRITICAL_PAGE)
+    fragment = hero_fragment(page) if page else None
+    with open(dist_path(CRITICAL_PAGE), encoding="utf-8") as f:
+        html = f.read()
+    if fragment is None or STYLESHEET_LINK not in html or "style.css" not in files:
+        print(f"⚠️ No hero section / stylesheet link in {CRITICAL_PAGE}: critical CSS not inlined")
+    else:
+        with open(dist_path("style.css"), encoding="utf-8") as f:
+            css = f.read()
+        critical = critical_css(css, fragment)
+        # The full stylesheet still loads, just without blocking the first paint
+        html = html.replace(STYLESHEET_LINK, (
+            f"<style>{critical}</style>"
+            "<link rel=\"preload\" href=\"style.css\" as=\"style\" onload=\"this.onload=null;this.rel='stylesheet'\">"
+            f"<noscript>{STYLESHEET_LINK}</noscript>"), 1)
+        with open(dist_path(CRITICAL_PAGE), "w", encoding="utf-8") as f:
+            f.write(html)
+
+        hero = re.search(r"url\(['\"]?([^'\")]+)", fragment)
+        hero_bytes = os.path.getsize(dist_path(hero.group(1))) if hero and os.path.exists(dist_path(hero.group(1))) else 0
+        page_before, page_after = transfer_size(page.encode("utf-8")), transfer_size(html.encode("utf-8"))
+        report["critical"] = {"page": CRITICAL_PAGE, "inlinedBytes": len(critical.encode("utf-8")),
+                              "stylesheetBytes": len(css.encode("utf-8"))}
+        report["estimatedLcpMs"] = [estimate_lcp(page_before, files["style.css"]["gzip"][0], hero_bytes),
+                                    estimate_lcp(page_after, 0, hero_bytes)]
+
+    write_json("build-report.json", report)
+    for name, sizes in files.items():
+        (raw_before, raw_after), (gz_before, gz_after) = sizes["bytes"], sizes["gzip"]
+        print(f"   {name}: {raw_before / 1024:.1f} -> {raw_after / 1024:.1f} KB "
+              f"(gzip {gz_before / 1024:.1f} -> {gz_after / 1024:.1f} KB)")
+    if "estimatedLcpMs" in report:
+        before, after = report["estimatedLcpMs"]
+        print(f"   {CRITICAL_PAGE}: {report['critical']['inlinedBytes'] / 1024:.1f} KB critical CSS inlined, "
+              f"estimated LCP {before} -> {after} ms ({after - before:+d} ms)")
+    print(f"✅ Minified {len(files)} file(s) (build-report.json)")
+
+
+def rewrite_references(name, asset_map):
+    """Points relative references in a text file at the fingerprinted names"""
+    path = dist_path(name)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    original = text
+    for source, hashed in asset_map.items():
+        # Only whole relative references ('Images/x.jpg', "./Images/x.jpg", url(Images/x.jpg));
+        # absolute URLs such as og:image on the live domain are left alone
+        pattern = re.compile(r"(?<=['\"(=\s])(\./|/)?" + re.escape(source) + r"(?=['\")?#\s])")
+        text = pattern.sub(lambda m: (m.group(1) or "") + hashed, text)
+    if text != original:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def fingerprint(name):
+    """Copies dist/<name> to dist/<stem>.<hash><ext>; returns the new name"""
+    stem, ext = os.path.splitext(name)
+    hashed = f"{stem}.{file_digest(name)[:HASH_LENGTH]}{ext}"
+    shutil.copy2(dist_path(name), dist_path(hashed))  # The original stays for external links
+    return hashed
+
+
+def build_assets():
+    """Content-hashes images, audio, data, CSS and JS and rewrites the references to them"""
+    asset_map = {}
+    for entry in FINGERPRINT_LEAVES:
+        if os.path.isdir(dist_path(entry)):
+            for folder, _, files in os.walk(dist_path(entry)):
+                for file in sorted(files):
+                    name = os.path.relpath(os.path.join(folder, file), BUILD_DIR).replace(os.sep, "/")
+                    asset_map[name] = fingerprint(name)
+        elif os.path.exists(dist_path(entry)):
+            asset_map[entry] = fingerprint(entry)
+
+    for name in FINGERPRINT_CODE:
+        if not os.path.exists(dist_path(name)):
+            continue  # fonts.css only exists when the fonts step ran
+        rewrite_references(name, asset_map)
+        asset_map[name] = fingerprint(name)
+    for name in PAGES:
+        rewrite_references(name, asset_map)
+
+    write_json("asset-manifest.json", asset_map)
+    print(f"✅ Fingerprinted {len(asset_map)} asset(s) (asset-manifest.json)")
+
+
+def build_service_worker():
+    """Rewrites the PRECACHE list in dist/sw.js with fingerprinted URLs and revisions"""
+    asset_map = load_asset_map()
+    path = dist_path("sw.js")
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    match = re.search(r"const PRECACHE = \[(.*?)\];", source, re.S)
+    urls = re.findall(r"url: '([^']+)'", match.group(1))
+
+    entries = []
+    for url in urls:
+        name = url[2:] if url.startswith("./") else url
+        name = asset_map.get(name, name)
+        file_name = name or "index.html"  # './' is the home page
+        if not os.path.exists(dist_path(file_name)):
+            print(f"⚠️ Precache entry {url} is not part of the build, skipped")
+            continue
+        entries.append({"url": "./" + name, "revision": file_digest(file_name)[:HASH_LENGTH]})
+
+    lines = ",\n".join(f"    {{ url: {json.dumps(e['url'])}, revision: '{e['revision']}' }}" for e in entries)
+    source = source[:match.start()] + f"const PRECACHE = [\n{lines}\n];" + source[match.end():]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"✅ sw.js: {len(entries)} precached file(s)")
+
+
+def build_compressed():
+    """Writes .br and .gz next to every text file in dist/ (served by server.py without per-request CPU)"""
+    from api.compression import COMPRESSIBLE_EXTENSIONS, MIN_SIZE, brotli, precompress_file
+    if brotli is None:
+        print("⚠️ brotli not installed: writing .gz only")
+    original = compressed = files = 0
+    for folder, _, names in os.walk(BUILD_DIR):
+        for file in names:
+            path = os.path.join(folder, file)
+            if not file.endswith(COMPRESSIBLE_EXTENSIONS) or os.path.getsize(path) < MIN_SIZE:
+                continue
+            sizes = precompress_file(path)
+            if sizes:
+                files += 1
+                original += os.path.getsize(path)
+                compressed += min(sizes.values())
+    saved = 100 - compressed * 100 / original if original else 0
+    print(f"✅ Precompressed {files} file(s): {original / 1024:.1f} KB -> {compressed / 1024:.1f} KB ({saved:.0f}% smaller)")
+
+
+STEPS = {
+    "site": build_site,
+    "rituals": build_rituals,
+    "fonts": build_fonts,
+    "audio": build_audio,
+    "minify": build_minified,  # Before fingerprinting, so the hashes are of the shipped bytes
+    "assets": build_assets,
+    "sw": build_service_worker,
+    "compress": build_compressed,  # Last: compresses the final files
+}
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or list(STEPS)
+    unknown = [n for n in names if n not in STEPS]
+    if unknown:
+        print(f"❌ Unknown step(s): {', '.join(unknown)}. Available: {', '.join(STEPS)}")
+        return 2
+    for name in names:
+        print(f"🔨 {name}")
+        STEPS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Local stand-in for the GitHub REST API endpoints the audit logger uses
+(issue comments and repository contents), with rate-limit headers and
+injectable 403/429/500 responses, so the logger can be tested offline.
+
+Run the server and point the app at it:
+    python fake_github.py --port 8765 --limit 100 --window 60
+    GITHUB_API_URL=http://127.0.0.1:8765 python server.py
+
+Or run a self-contained throughput test through the real logger:
+    python fake_github.py --bench 500 --limit 30 --window 10 --secondary-every 7
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGitHub:
+    """In-memory state: stored comments/files, the rate-limit window and counters"""
+
+    def __init__(self, limit=5000, window=3600, secondary_every=0, too_many_every=0, error_rate=0.0, latency_ms=0):
+        self.limit = limit
+        self.window = window
+        self.secondary_every = secondary_every  # Every Nth request: 403 secondary rate limit
+        self.too_many_every = too_many_every    # Every Nth request: 429
+        self.error_rate = error_rate            # Fraction of requests answered with 500
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.comments = []
+        self.files = {}
+        self.counts = {"requests": 0, "created": 0, "403": 0, "429": 0, "500": 0}
+        self.window_start = time.time()
+        self.used = 0
+
+    def admit(self):
+        """Decides the fate of one request: (status or None, headers)"""
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start, self.used = now, 0
+            reset = int(self.window_start + self.window) + 1
+            self.counts["requests"] += 1
+            n = self.counts["requests"]
+
+            if self.used >= self.limit:
+                status = 403  # Primary rate limit exhausted
+            elif self.secondary_every and n % self.secondary_every == 0:
+                status = 403  # Secondary rate limit (abuse detection)
+            elif self.too_many_every and n % self.too_many_every == 0:
+                status = 429
+            elif random.random() < self.error_rate:
+                status = 500
+            else:
+                status = None
+                self.used += 1
+
+            headers = {
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Remaining": str(max(0, self.limit - self.used)),
+                "X-RateLimit-Reset": str(reset),
+            }
+            if status in (403, 429) and self.used < self.limit:
+                headers["Retry-After"] = "1"
+            if status:
+                self.counts[str(status)] += 1
+            return status, headers
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like api.github.com
+
+        def _reply(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _handle(self, method):
+            body = self._body() if method in ("POST", "PUT") else {}
+            if self.path == "/__stats":
+                self._reply(200, {**state.counts, "comments": len(state.comments), "files": len(state.files)})
+                return
+
+            if state.latency:
+                time.sleep(state.latency)
+            status, headers = state.admit()
+            if status == 403:
+                message = ("API rate limit exceeded" if headers["X-RateLimit-Remaining"] == "0"
+                           else "You have exceeded a secondary rate limit")
+                self._reply(403, {"message": message}, headers)
+                return
+            if status in (429, 500):
+                self._reply(status, {"message": "Try again later"}, headers)
+                return
+
+            parts = self.path.split("?")[0].strip("/").split("/")
+            # /repos/<owner>/<repo>/issues/<n>/comments
+            if method == "POST" and len(parts) == 6 and parts[0] == "repos" and parts[3] == "issues" and parts[5] == "comments":
+                with state.lock:
+                    state.comments.append(body.get("body", ""))
+                    state.counts["created"] += 1
+                    comment_id = len(state.comments)
+                self._reply(201, {"id": comment_id, "html_url": f"http://fake/{parts[1]}/{parts[2]}/issues/{parts[4]}#{comment_id}"}, headers)
+                return
+            # /repos/<owner>/<repo>/contents/<path...>
+            if len(parts) > 4 and parts[0] == "repos" and parts[3] == "contents":
+                path = "/".join(parts[4:])
+                if method == "GET":
+                    if path in state.files:
+                        self._reply(200, {"sha": str(hash(state.files[path]))}, headers)
+                    else:
+                        self._reply(404, {"message": "Not Found"}, headers)
+                    return
+                if method == "PUT":
+                    created = path not in state.files
+                    state.files[path] = body.get("content", "")
+                    self._reply(201 if created else 200, {"content": {"html_url": f"http://fake/blob/{path}"}}, headers)
+                    return
+            self._reply(404, {"message": "Not Found"}, headers)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PUT(self):
+            self._handle("PUT")
+
+        def log_message(self, *args):
+            pass  # Keep the console for the logger's own output
+
+    return Handler
+
+
+def serve(state, port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench(state, port, entries):
+    """Spools `entries` audit records and drains them through the real logger"""
+    serve(state, port)
+    os.environ.update({
+        "GITHUB_API_URL": f"http://127.0.0.1:{port}",
+        "GITHUB_TOKEN": "fake-token",
+        "GITHUB_REPO": "local/fake",
+        "GITHUB_ISSUE_NO": "1",
+        "AUDIT_SPOOL_DIR": tempfile.mkdtemp(prefix="audit-bench-"),
+        "GITHUB_RATE_RESERVE": os.getenv("GITHUB_RATE_RESERVE", "0"),
+    })
+    # Imported only now so they pick up the environment above
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from api import logger
+
+    started = time.monotonic()
+    for i in range(entries):
+        logger.log_to_github(f"10.0.0.{i % 250}", "Hindi", f"Bench document {i}", latency_ms=1000)
+    spooled = time.monotonic() - started
+
+    drained = logger.flush_audit_log(timeout=600)
+    elapsed = time.monotonic() - started
+    stats = logger.get_audit_stats()
+
+    print(f"\nSpooled {entries} entries in {spooled * 1000:.1f} ms ({spooled / entries * 1e6:.0f} µs each)")
+    print(f"Drained: {drained} in {elapsed:.1f}s -> {stats['sent'] / elapsed:.1f} entries/s, {stats['batches']} comments")
+    print(f"Fake GitHub: {json.dumps(state.counts)}")
+    print(f"Transport: {json.dumps(stats['github'])}")
+    return 0 if drained and stats["sent"] == entries else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake of the GitHub issues-comments API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--limit", type=int, default=5000, help="Requests allowed per window")
+    parser.add_argument("--window", type=int, default=3600, help="Rate-limit window in seconds")
+    parser.add_argument("--secondary-every", type=int, default=0, help="Answer every Nth request with a secondary-limit 403")
+    parser.add_argument("--429-every", dest="too_many_every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Added latency per request")
+    parser.add_argument("--bench", type=int, metavar="N", help="Push N entries through api/logger.py and report")
+    args = parser.parse_args(argv)
+
+    state = FakeGitHub(args.limit, args.window, args.secondary_every, args.too_many_every, args.error_rate, args.latency_ms)
+    if args.bench:
+        return bench(state, args.port, args.bench)
+
+    serve(state, args.port)
+    print(f"🧪 Fake GitHub API on http://127.0.0.1:{args.port} (limit {args.limit}/{args.window}s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Production settings for the self-hosted server (Vercel doesn't use this file).
+
+    pip install gunicorn
+    gunicorn server:app          # picks up this file from the working directory
+
+`python server.py` stays the development server (reloader + debugger).
+
+Every value can be overridden from the environment, e.g.
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=16 PORT=8000 gunicorn server:app
+
+Static files are served from the build output (STATIC_DIR, default dist/: run
+`python build.py` first). Starting with the repo root as the static folder is
+refused, since that folder also holds the code and the config.
+
+Graceful restarts: `kill -HUP <master pid>` starts new workers and lets the
+old ones finish their requests (up to graceful_timeout). With preload_app the
+code is loaded once in the master, so a code deploy needs a full restart
+(or `kill -USR2` then `kill -WINCH` on the old master).
+"""
+import os
+import multiprocessing
+
+from api import server_metrics
+
+# --- Static files ---
+# Set before server.py is imported (preload_app), which reads it for its static folder
+os.environ.setdefault("STATIC_DIR", "dist")
+_static_dir = os.path.abspath(os.environ["STATIC_DIR"])
+if _static_dir == os.path.dirname(os.path.abspath(__file__)):
+    raise SystemExit("STATIC_DIR is the repo root: serve the build output instead (python build.py, STATIC_DIR=dist)")
+if not os.path.isdir(_static_dir):
+    raise SystemExit(f"STATIC_DIR {_static_dir} does not exist: run `python build.py` first")
+
+# --- Sockets ---
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))  # Accept queue; watch listenQueue in /api/server/stats
+
+# --- Workers ---
+# A conversion spends seconds waiting on Gemini, so each process runs a thread
+# pool (gthread): one worker per core for the CPU work (image resizing, JSON),
+# threads to overlap the waiting.
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True  # Import server.py once in the master; workers fork with the code already loaded
+
+# Recycle workers now and then (memory held by large uploads / Pillow), staggered by the jitter
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+# --- Timeouts ---
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))  # A stuck worker is killed; conversions can take a while
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))  # In-flight requests finish on restart
+# Idle keep-alive connections wait in the worker's poller, not in a thread. Facing browsers
+# directly a few seconds is enough; behind a proxy that reuses upstream connections set it
+# above the proxy's idle timeout, so the proxy never sends on a socket we just closed.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# --- Logging ---
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+# %(L)s = request time in seconds, next to the status and size
+access_log_format = '%(h)s "%(r)s" %(s)s %(B)s %(L)ss "%(a)s"'
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")  # Trust X-Forwarded-* from the local proxy
+
+
+def post_fork(server, worker):
+    """Each worker counts its own requests and can see the shared listening socket"""
+    server_metrics.configure(worker.sockets, workers=server.num_workers, threads=worker.cfg.threads)
+
+
+def pre_request(worker, req):
+    header = next((value for name, value in req.headers if name == "X-REQUEST-START"), None)
+    req.metrics_started = server_metrics.request_started(header)
+
+
+def post_request(worker, req, environ, resp):
+    server_metrics.request_finished(req.metrics_started)
+
+
+def worker_exit(server, worker):
+    """Write what this worker still buffers before it goes away (restart, recycle, shutdown)"""
+    from api.analytics_store import flush_events
+    from api.logger import flush_audit_log
+    try:
+        flush_events()
+        flush_audit_log()
+    except Exception as e:
+        print(f"❌ Flush on worker exit failed: {e}")
@@ -141,6 +141,19 @@ const bellBtn = document.getElementById('ringBellBtn');
 const bellSound = document.getElementById('bellSound');
 const diyaBtn = document.getElementById('lightDiyaBtn');
 
+// The bell sound isn't downloaded with the page (preload="none"): most visitors never
+// ring it. The first tap/click/key press anywhere starts fetching it, so it's ready
+// (or nearly) by the time the bell button is pressed.
+if (bellSound) {
+    const warmUpEvents = ['pointerdown', 'touchstart', 'keydown'];
+    const warmUpBell = () => {
+        warmUpEvents.forEach(type => window.removeEventListener(type, warmUpBell, true));
+        bellSound.preload = 'auto';
+        bellSound.load();
+    };
+    warmUpEvents.forEach(type => window.addEventListener(type, warmUpBell, { capture: true, passive: true }));
+}
+
 // Ring Bell Interaction
 if (bellBtn) {
     bellBtn.addEventListener('click', () => {
@@ -397,31 +410,43 @@ if (convertBtn) {
         const originalText = convertBtn.textContent;
         convertBtn.textContent = localStorage.getItem('lang') === 'hi' ? "परिवर्तित कर रहा है..." : "Converting...";
         resultCard.style.display = 'none'; // Hide previous results
+        const startedAt = performance.now(); // Conversion round trip, reported to analytics
+        let uploadBytes = null;
+        let chunked = false;
 
         try {
-            // Convert file to base64 string
-            const reader = new FileReader();
-            const base64Promise = new Promise((resolve) => {
-                reader.onloadend = () => resolve(reader.result.split(',')[1]); // Remove metadata prefix
-            });
-            reader.readAsDataURL(file);
-            const base64Image = await base64Promise;
+            // Shrink the photo in the browser first (phones produce 5-12 MB files)
+            const limits = await getUploadLimits();
+            const prepared = await prepareUpload(file, limits);
+            uploadBytes = prepared.blob.size;
 
             const targetLang = document.getElementById('targetLang').value; // Get selected language
 
-            // Call our secure Python backend API
-            // Note: Uses logic from api/convert.py via Vercel Serverless
-            const response = await fetch('/api/convert', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    image: base64Image,
-                    mimeType: file.type,
-                    targetLang: targetLang
-                })
-            });
-
-            const data = await response.json();
+            let data;
+            // Only files /api/convert refuses go in chunks; smaller ones take the single request
+            chunked = prepared.blob.size > limits.maxBytes;
+            if (chunked) {
+                // Large scans: resumable chunked upload, survives dropped connections
+                data = await chunkedConvert(prepared, targetLang);
+            } else {
+                // Convert file to base64 string
+                const base64Image = await blobToBase64(prepared.blob);
+
+                // Call our secure Python backend API
+                // Note: Uses logic from api/convert.py via Vercel Serverless
+                const response = await fetch('/api/convert', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        image: base64Image,
+                        mimeType: prepared.blob.type,
+                        targetLang: targetLang,
+                        upload: prepared.meta
+                    })
+                });
+
+                data = await response.json();
+            }
 
             // Check for API errors
             if (data.error) {
@@ -433,8 +458,11 @@ if (convertBtn) {
             // Scroll to result
             resultCard.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
 
+            queueAnalytics({ type: 'conversion', ok: true, ms: Math.round(performance.now() - startedAt), bytes: uploadBytes, chunked: chunked, targetLang: targetLang });
+
         } catch (error) {
             console.error("Conversion Error detall:", error);
+            queueAnalytics({ type: 'conversion', ok: false, ms: Math.round(performance.now() - startedAt), bytes: uploadBytes, chunked: chunked, error: String(error.message || error).slice(0, 200) });
             alert("Error converting document: " + (error.message || "Unknown error"));
         } finally {
             // Reset Button State
@@ -444,6 +472,212 @@ if (convertBtn) {
     });
 }
 
+/**
+ * ====================================================================
+ * CLIENT-SIDE IMAGE DOWNSCALING
+ * ====================================================================
+ * Resizes and recompresses the selected image to the target advertised
+ * by the server (/api/convert/limits) so uploads stay small on slow links.
+ */
+// Used when the limits endpoint cannot be reached
+const DEFAULT_UPLOAD_LIMITS = {
+    maxEdge: 2048,
+    targetBytes: 1200000,
+    maxBytes: 3000000,
+    chunkSize: 524288,
+    outputType: 'image/jpeg',
+    quality: 0.85,
+    minQuality: 0.5,
+    acceptedTypes: ['image/jpeg', 'image/png', 'image/webp', 'application/pdf']
+};
+let uploadLimitsPromise = null; // Fetched once per page load
+
+function getUploadLimits() {
+    if (!uploadLimitsPromise) {
+        uploadLimitsPromise = fetch('/api/convert/limits')
+            .then(res => res.ok ? res.json() : DEFAULT_UPLOAD_LIMITS)
+            .catch(() => DEFAULT_UPLOAD_LIMITS);
+    }
+    return uploadLimitsPromise;
+}
+
+// Read a Blob as a base64 string (without the data: prefix)
+function blobToBase64(blob) {
+    return new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onloadend = () => resolve(reader.result.split(',')[1]); // Remove metadata prefix
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(blob);
+    });
+}
+
+// Encode a canvas to a Blob (OffscreenCanvas and regular canvas have different APIs)
+function canvasToBlob(canvas, type, quality) {
+    if (canvas.convertToBlob) {
+        return canvas.convertToBlob({ type, quality });
+    }
+    return new Promise(resolve => canvas.toBlob(resolve, type, quality));
+}
+
+async function prepareUpload(file, limits) {
+    const meta = { originalBytes: file.size, bytes: file.size, resized: false };
+    const original = { blob: file, meta };
+    // HEIC/HEIF, GIF, BMP...: the server refuses them (415), so they are always re-encoded to JPEG
+    const accepted = (limits.acceptedTypes || DEFAULT_UPLOAD_LIMITS.acceptedTypes).includes(file.type);
+    const unsupported = new Error(localStorage.getItem('lang') === 'hi'
+        ? "यह फ़ाइल प्रकार समर्थित नहीं है, कृपया JPEG, PNG, WebP या PDF चुनें"
+        : "This file type is not supported, please choose a JPEG, PNG, WebP or PDF");
+
+    // PDFs are sent untouched
+    if (!file.type.startsWith('image/') || typeof createImageBitmap !== 'function') {
+        if (!accepted) throw unsupported;
+        return original;
+    }
+
+    let bitmap;
+    try {
+        bitmap = await createImageBitmap(file);
+    } catch (e) {
+        // e.g. HEIC outside Safari: nothing the server would take
+        if (!accepted) throw unsupported;
+        console.warn("Could not decode image for resizing, sending original", e);
+        return original;
+    }
+
+    meta.originalWidth = meta.width = bitmap.width;
+    meta.originalHeight = meta.height = bitmap.height;
+
+    // Already small enough: don't re-encode (would only lose quality)
+    const scale = Math.min(1, limits.maxEdge / Math.max(bitmap.width, bitmap.height));
+    if (accepted && scale === 1 && file.size <= limits.targetBytes) {
+        bitmap.close();
+        return original;
+    }
+
+    const width = Math.round(bitmap.width * scale);
+    const height = Math.round(bitmap.height * scale);
+    const canvas = typeof OffscreenCanvas === 'function'
+        ? new OffscreenCanvas(width, height)
+        : Object.assign(document.createElement('canvas'), { width, height });
+    const ctx = canvas.getContext('2d');
+    ctx.fillStyle = '#fff'; // Transparent PNG areas would turn black in JPEG
+    ctx.fillRect(0, 0, width, height);
+    ctx.drawImage(bitmap, 0, 0, width, height);
+    bitmap.close();
+
+    // Lower the quality step by step until the target size is reached
+    let quality = limits.quality;
+    let blob = await canvasToBlob(canvas, limits.outputType, quality);
+    while (blob && blob.size > limits.targetBytes && quality - 0.1 >= limits.minQuality) {
+        quality -= 0.1;
+        blob = await canvasToBlob(canvas, limits.outputType, quality);
+    }
+
+    // Keep the original if recompression didn't actually help
+    if (!blob || (accepted && blob.size >= file.size && file.size <= limits.maxBytes)) {
+        if (!accepted) throw unsupported;
+        return original;
+    }
+
+    console.log(`Upload resized: ${Math.round(file.size / 1024)} KB -> ${Math.round(blob.size / 1024)} KB (${width}x${height})`);
+    return {
+        blob,
+        meta: { ...meta, bytes: blob.size, width, height, resized: true }
+    };
+}
+
+/**
+ * ====================================================================
+ * RESUMABLE CHUNKED UPLOAD
+ * ====================================================================
+ * initiate -> PUT chunks by offset -> finalize. If the connection drops,
+ * the upload continues from the last offset the server confirmed
+ * (also after a page reload, via the upload ID kept in localStorage).
+ */
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+async function sha256Hex(blob) {
+    const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function chunkedConvert(prepared, targetLang, restarted = false) {
+    const blob = prepared.blob;
+    const sha256 = (window.crypto && crypto.subtle) ? await sha256Hex(blob) : null;
+    const resumeKey = sha256 ? `kaithi_upload_${sha256}_${targetLang}` : null;
+
+    // 1. Resume a previous attempt for the same file if the server still has it
+    let upload = null;
+    const savedId = resumeKey && localStorage.getItem(resumeKey);
+    if (savedId) {
+        const res = await fetch(`/api/convert/uploads/${savedId}`).catch(() => null);
+        if (res && res.ok) upload = await res.json();
+    }
+
+    // 2. Otherwise start a new upload
+    if (!upload) {
+        const res = await fetch('/api/convert/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                size: blob.size,
+                mimeType: blob.type,
+                targetLang: targetLang,
+                sha256: sha256,
+                upload: prepared.meta
+            })
+        });
+        upload = await res.json();
+        if (!res.ok) throw new Error(upload.error);
+        if (resumeKey) localStorage.setItem(resumeKey, upload.uploadId);
+    }
+
+    // 3. Send the remaining chunks, retrying with backoff on network errors
+    let offset = upload.offset;
+    let failures = 0;
+    while (offset < blob.size) {
+        convertBtn.textContent = `${localStorage.getItem('lang') === 'hi' ? "अपलोड" : "Uploading"} ${Math.round(offset / blob.size * 100)}%`;
+        let res;
+        try {
+            res = await fetch(`/api/convert/uploads/${upload.uploadId}?offset=${offset}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: blob.slice(offset, offset + upload.chunkSize)
+            });
+        } catch (networkError) {
+            if (++failures > 6) throw networkError;
+            await sleep(Math.min(1000 * 2 ** failures, 15000));
+            // Ask the server how much actually arrived before retrying
+            const status = await fetch(`/api/convert/uploads/${upload.uploadId}`).catch(() => null);
+            if (status && status.ok) offset = (await status.json()).offset;
+            continue;
+        }
+
+        const info = await res.json();
+        if (res.status === 404 && !restarted) {
+            // Server lost the upload (expired, or another serverless instance): start over once
+            if (resumeKey) localStorage.removeItem(resumeKey);
+            return chunkedConvert(prepared, targetLang, true);
+        }
+        if (!res.ok && res.status !== 409) throw new Error(info.error);
+        offset = info.offset; // 409 also reports the offset the server has
+        failures = 0;
+    }
+
+    // 4. All bytes are on the server: run the conversion
+    convertBtn.textContent = localStorage.getItem('lang') === 'hi' ? "परिवर्तित कर रहा है..." : "Converting...";
+    const res = await fetch(`/api/convert/uploads/${upload.uploadId}/finalize`, { method: 'POST' });
+    const data = await res.json();
+    if (res.status === 404 && !restarted) {
+        // Finalize reached an instance that never saw the chunks: upload again once
+        if (resumeKey) localStorage.removeItem(resumeKey);
+        return chunkedConvert(prepared, targetLang, true);
+    }
+    // 409 (incomplete) and 5xx (conversion failed) keep the upload: the next try resumes it
+    if (resumeKey && res.status !== 409 && res.status < 500) localStorage.removeItem(resumeKey);
+    return data;
+}
+
 // Display Result with Typewriter Effect
 function displayResult(text) {
     // 1. Reset and Show Card
@@ -767,30 +1001,128 @@ window.addEventListener('appinstalled', () => {
  * ====================================================================
  * ANALYTICS TRACKING
  * ====================================================================
- * Sends pageview data to the serverless backend.
+ * Events (pageview, page timings, conversion outcomes) are queued in memory
+ * and sent together in one request when the page is hidden or closed, using
+ * navigator.sendBeacon so the browser delivers them after the page is gone.
+ * The backend (api/analytics.py) accepts the array and answers 204.
  */
+const analyticsQueue = [];
+const ANALYTICS_MAX_QUEUE = 50; // Send early if a long session piles up events
+
+function queueAnalytics(event) {
+    analyticsQueue.push({
+        ...event,
+        path: window.location.pathname,
+        timestamp: new Date().toISOString()
+    });
+    if (analyticsQueue.length >= ANALYTICS_MAX_QUEUE) flushAnalytics();
+}
+
+function flushAnalytics() {
+    if (!analyticsQueue.length) return;
+    const body = JSON.stringify(analyticsQueue.splice(0));
+
+    // sendBeacon posts as text/plain: no CORS preflight, survives page unload
+    if (navigator.sendBeacon && navigator.sendBeacon('/api/analytics', body)) return;
+
+    // Fallback: keepalive fetch also outlives the page
+    fetch('/api/analytics', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: body,
+        keepalive: true
+    }).catch(e => console.error("Analytics failed", e));
+}
+
 function logAnalytics() {
     // Basic session check to avoid spamming on reload (optional)
     if (sessionStorage.getItem('view_logged')) return;
+    sessionStorage.setItem('view_logged', 'true');
 
-    const data = {
-        path: window.location.pathname,
-        timestamp: new Date().toISOString(),
+    queueAnalytics({
+        type: 'pageview',
         referrer: document.referrer,
         screen: `${window.screen.width}x${window.screen.height}`
+    });
+}
+
+function logPageTimings() {
+    const nav = performance.getEntriesByType && performance.getEntriesByType('navigation')[0];
+    if (!nav) return;
+    queueAnalytics({
+        type: 'timing',
+        domContentLoaded: Math.round(nav.domContentLoadedEventEnd),
+        load: Math.round(nav.loadEventEnd),
+        transferSize: nav.transferSize
+    });
+}
+
+/**
+ * Web Vitals (LCP, INP, CLS, TTFB) measured with PerformanceObserver and sent
+ * once per page view, together with the rest of the queue, when the page is
+ * hidden. The backend keeps streaming percentiles per page and metric.
+ */
+const webVitals = {};
+let vitalsQueued = false;
+
+function observeVitals() {
+    if (!('PerformanceObserver' in window)) return;
+    const observe = (type, callback, options = {}) => {
+        try {
+            new PerformanceObserver(list => list.getEntries().forEach(callback))
+                .observe({ type: type, buffered: true, ...options });
+        } catch (e) { /* Entry type not supported by this browser */ }
     };
 
-    fetch('/api/analytics', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json'
-        },
-        body: JSON.stringify(data)
-    }).then(() => {
-        console.log("Analytics sent");
-        sessionStorage.setItem('view_logged', 'true');
-    }).catch(e => console.error("Analytics failed", e));
+    // LCP: the last candidate reported before the page is hidden
+    observe('largest-contentful-paint', entry => { webVitals.lcp = Math.round(entry.startTime); });
+
+    // CLS: worst session window (shifts < 1s apart, window < 5s), ignoring shifts right after input
+    let sessionValue = 0;
+    let sessionStart = 0;
+    let lastShift = 0;
+    observe('layout-shift', entry => {
+        if (entry.hadRecentInput) return;
+        if (sessionValue && entry.startTime - lastShift < 1000 && entry.startTime - sessionStart < 5000) {
+            sessionValue += entry.value;
+        } else {
+            sessionValue = entry.value;
+            sessionStart = entry.startTime;
+        }
+        lastShift = entry.startTime;
+        webVitals.cls = Math.max(webVitals.cls || 0, Math.round(sessionValue * 1000) / 1000);
+    });
+
+    // INP: slowest interaction of the visit (clicks, taps, key presses)
+    observe('event', entry => {
+        if (entry.interactionId) webVitals.inp = Math.max(webVitals.inp || 0, Math.round(entry.duration));
+    }, { durationThreshold: 40 });
+
+    const nav = performance.getEntriesByType('navigation')[0];
+    if (nav) webVitals.ttfb = Math.round(nav.responseStart);
+}
+
+function queueVitals() {
+    if (vitalsQueued || !Object.keys(webVitals).length) return;
+    vitalsQueued = true;
+    queueAnalytics({ type: 'vitals', ...webVitals });
+}
+
+function onPageHidden() {
+    queueVitals();
+    flushAnalytics();
 }
 
-// Log visit after a slight delay
-setTimeout(logAnalytics, 3000);
+observeVitals();
+
+// 'pagehide' covers browsers that skip 'visibilitychange' on close (older Safari)
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') onPageHidden();
+});
+window.addEventListener('pagehide', onPageHidden);
+
+// Log visit after a slight delay (timings need the load event to have finished)
+setTimeout(() => {
+    logAnalytics();
+    logPageTimings();
+}, 3000);
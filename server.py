@@ -1,19 +1,58 @@
 import os  # Standard library for OS-level operations
-import base64  # Library to handle Base64 encoding/decoding of images
-from flask import Flask, request, jsonify  # Flask framework for creating the web server
+import hmac  # Constant-time comparison of the admin token
+import functools  # To wrap the operational endpoints
+import mimetypes  # Content-Type of static files sent from their precompressed copies
+import time  # To time each conversion for the audit log
+from flask import Flask, request, jsonify, send_file, abort  # Flask framework for creating the web server
+from werkzeug.security import safe_join  # Keeps requested paths inside the served folder
 from flask_cors import CORS  # Extension for handling Cross-Origin Resource Sharing (CORS)
-# New Google Generative AI SDK Imports
-from google import genai
-from google.genai import types
+# Gemini call shared with the Vercel functions (uses the new Google GenAI SDK)
+from api.translate import translate_document
 from dotenv import load_dotenv  # Library to load environment variables from .env file
+from api.upload import UPLOAD_LIMITS, decode_upload, check_upload, describe_upload  # Upload size negotiation
+from api import chunked_upload  # Resumable chunked uploads staged on disk
+from api.media_files import content_hash, cache_control, is_public, is_private  # ETags / Cache-Control for served files
+from api.compression import COMPRESSIBLE_EXTENSIONS, pick_precompressed, compress_body  # Content-Encoding
 
 # Load environment variables from .env file (e.g., API Keys)
 load_dotenv()
 
+def send_media(directory, filename):
+    """
+    Sends a file with a strong content ETag, Last-Modified, Range support (206)
+    and conditional GETs (304). Fingerprinted URLs (hashed name or ?v=<hash>)
+    are cached as immutable (api/media_files.py). Precompressed siblings are
+    negotiated through Accept-Encoding (api/compression.py).
+    """
+    path = safe_join(os.path.abspath(directory), filename)
+    # Folder routes ('Rituals and News') are checked as that folder of the site
+    folder = '' if os.path.abspath(directory) == os.path.abspath(app.static_folder) else os.path.basename(directory)
+    if path is None or not is_public(filename, folder) or is_private(path) or not os.path.isfile(path):
+        abort(404)
+    digest = content_hash(path)
+    # Text files: send the .br/.gz written by build.py if the client takes it (not for Range requests)
+    encoded_path, encoding = (None, None) if request.range else pick_precompressed(
+        path, request.headers.get('Accept-Encoding'))
+    response = send_file(encoded_path or path, mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+                         etag=digest[:32] + (f'-{encoding}' if encoding else ''),
+                         last_modified=os.path.getmtime(path), conditional=True, max_age=None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if path.endswith(COMPRESSIBLE_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control(filename, digest, request.args.get('v'))
+    return response
+
+class ThaweDhamApp(Flask):
+    def send_static_file(self, filename):
+        # Static files go through the same caching / Range handling as the other media
+        return send_media(self.static_folder, filename)
+
 # Initialize the Flask application
 # static_folder='.' allows serving files from the root directory
+# (STATIC_DIR=dist serves the output of build.py instead)
 # static_url_path='' allows accessing them directly (e.g. /style.css instead of /static/style.css)
-app = Flask(__name__, static_folder='.', static_url_path='')
+app = ThaweDhamApp(__name__, static_folder=os.getenv('STATIC_DIR', '.'), static_url_path='')
 
 @app.route('/')
 def home():
@@ -22,6 +61,82 @@ def home():
 # Enable CORS for all routes (allows frontend to talk to this backend locally)
 CORS(app)
 
+def admin_only(view):
+    """
+    Operational endpoints (stats, analytics summary) expose internals: they need
+    "Authorization: Bearer $ADMIN_TOKEN", or, with no token set, the debug server
+    (`python server.py`). Anywhere else they answer 404.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.getenv('ADMIN_TOKEN')
+        if token:
+            sent = request.headers.get('Authorization', '').encode()
+            if not hmac.compare_digest(sent, f'Bearer {token}'.encode()):
+                return jsonify({"error": "Unauthorized"}), 401
+        elif not app.debug:
+            abort(404)
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.after_request
+def compress_json(response):
+    """
+    Compresses dynamic JSON responses on the fly (static files are precompressed by build.py).
+    Bodies that already carry a Content-Encoding (the cached /api/rituals index) are left alone.
+    """
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or response.status_code != 200 or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    data, encoding = compress_body(response.get_data(), request.headers.get('Accept-Encoding'))
+    if data is None:
+        return response
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # A strong ETag names one exact byte sequence, so the compressed body gets its own
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+def run_conversion(image_bytes, mime_type, target_lang):
+    """
+    Translates a validated document and logs the activity.
+    Shared by /api/convert and the finalize step of chunked uploads.
+    """
+    # Initialize the AI Client
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+         # Return error if API key is missing
+         return jsonify({"error": "No API Key found"}), 500
+    
+    # Call the Gemini Model with the decoded document
+    started = time.monotonic()
+    text = translate_document(api_key, image_bytes, mime_type, target_lang)
+    latency_ms = (time.monotonic() - started) * 1000
+
+    # --- LOGGING ---
+    # Attempt to log this transaction to GitHub (Internal Audit)
+    try:
+        from api.logger import log_to_github
+        # In local dev, IP is usually the localhost
+        user_ip = request.remote_addr
+        print(f"🔒 Logging to GitHub for IP: {user_ip}")
+        log_to_github(user_ip, target_lang, text, latency_ms)
+    except Exception as log_ex:
+        # If logging fails, print error but do NOT stop the conversion
+        print(f"❌ Logger failed: {log_ex}")
+    # ---------------
+
+    # Return the AI's response text as JSON
+    return jsonify({"text": text})
+
+@app.route('/api/convert/limits', methods=['GET'])
+def convert_limits():
+    """Tell the browser how far to downscale images before uploading them"""
+    return jsonify(UPLOAD_LIMITS)
+
 @app.route('/api/convert', methods=['POST'])
 def convert_kaithi():
     """
@@ -37,6 +152,7 @@ def convert_kaithi():
         image_data = data.get('image')      # Base64 image string
         mime_type = data.get('mimeType')    # Image type (e.g., 'image/png')
         target_lang = data.get('targetLang') # Target language string
+        upload_meta = data.get('upload')    # Sizes reported by the browser after resizing
         
         # Log basic info for debugging
         print(f"   - Target Lang: {target_lang}")
@@ -46,96 +162,192 @@ def convert_kaithi():
         if not image_data or not mime_type or not target_lang:
             return jsonify({"error": "Missing required fields"}), 400
 
-        # Initialize the AI Client
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-             # Return error if API key is missing
-             return jsonify({"error": "No API Key found"}), 500
-        
-        # Create client instance with the key
-        client = genai.Client(api_key=api_key)
+        # Decode the image data from Base64
+        image_bytes = decode_upload(image_data)
+        if image_bytes is None:
+            return jsonify({"error": "Invalid image data"}), 400
 
-        # Construct the detailed prompt for the AI
-        prompt_text = f"""Analyze this image containing text in Kaithi or Urdu script. Translate the full content into {target_lang}.
-        
-        Output strictly in this format:
-        
-        Translated text :
-        -------
-        [Insert the translation here]
-        
-        Do NOT provide the original transcription or any explanations."""
+        # Check the upload against the advertised limits and record what the client sent
+        upload_error, upload_status, upload_record = check_upload(image_bytes, mime_type, upload_meta)
+        print(f"   - Upload: {describe_upload(upload_record)}")
+        if upload_error:
+            return jsonify({"error": upload_error, "limits": UPLOAD_LIMITS}), upload_status
 
-        # Decode the image data from Base64
-        image_bytes = base64.b64decode(image_data)
-        
-        # Call the Gemini Model (using the confirmed working model 'gemini-2.5-flash')
-        response = client.models.generate_content(
-            model='gemini-2.5-flash', 
-            contents=[
-                prompt_text,
-                types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
-            ]
+        # Translate with Gemini, log, and return the result
+        return run_conversion(image_bytes, mime_type, target_lang)
+
+    except Exception as e:
+        # Catch any unexpected server errors
+        print(f"❌ Server Error: {str(e)}")
+        return jsonify({"error": "Failed to process document", "details": str(e)}), 500
+
+# --- RESUMABLE CHUNKED UPLOADS ---
+# POST /api/convert/uploads                  -> start, returns uploadId
+# PUT  /api/convert/uploads/<id>?offset=N    -> append raw bytes at offset N
+# GET  /api/convert/uploads/<id>             -> current offset (to resume)
+# POST /api/convert/uploads/<id>/finalize    -> run the conversion
+
+@app.route('/api/convert/uploads', methods=['POST'])
+def start_chunked_upload():
+    """Start a resumable upload for a large scan"""
+    data = request.get_json(silent=True) or {}
+    error, status, info = chunked_upload.create_upload(
+        data.get('size'), data.get('mimeType'), data.get('targetLang'),
+        data.get('sha256'), data.get('upload')
+    )
+    if error:
+        return jsonify({"error": error, "limits": UPLOAD_LIMITS}), status
+    print(f"📥 Chunked upload started: {info['uploadId']} ({info['size']} bytes)")
+    return jsonify(info), status
+
+@app.route('/api/convert/uploads/<upload_id>', methods=['GET', 'PUT'])
+def chunked_upload_status(upload_id):
+    """Report the received offset (GET) or append one chunk (PUT)"""
+    if request.method == 'GET':
+        error, status, info = chunked_upload.get_upload(upload_id)
+    else:
+        offset = request.args.get('offset', type=int)
+        error, status, info = chunked_upload.write_chunk(upload_id, offset, request.get_data())
+    if error:
+        return jsonify({"error": error, **(info or {})}), status
+    return jsonify(info), status
+
+@app.route('/api/convert/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_chunked_upload(upload_id):
+    """Assemble the spooled chunks and convert the document"""
+    try:
+        error, status, result = chunked_upload.finish_upload(upload_id)
+        if error:
+            return jsonify({"error": error, **(result or {})}), status
+
+        image_bytes, mime_type = result['bytes'], result['mimeType']
+        upload_error, upload_status, upload_record = check_upload(
+            image_bytes, mime_type, result['client'], max_bytes=UPLOAD_LIMITS['maxChunkedBytes']
         )
+        print(f"📨 Chunked upload finalized: {upload_id}")
+        print(f"   - Upload: {describe_upload(upload_record)}")
+        if upload_error:
+            chunked_upload.discard_upload(upload_id)  # Sending it again won't help
+            return jsonify({"error": upload_error, "limits": UPLOAD_LIMITS}), upload_status
 
-        # --- LOGGING ---
-        # Attempt to log this transaction to GitHub (Internal Audit)
-        try:
-            from api.logger import log_to_github
-            # In local dev, IP is usually the localhost
-            user_ip = request.remote_addr
-            print(f"🔒 Logging to GitHub for IP: {user_ip}")
-            log_to_github(user_ip, target_lang, response.text)
-        except Exception as log_ex:
-            # If logging fails, print error but do NOT stop the conversion
-            print(f"❌ Logger failed: {log_ex}")
-        # ---------------
-
-        # Return the AI's response text as JSON
-        return jsonify({"text": response.text})
+        response = run_conversion(image_bytes, mime_type, result['targetLang'])
+        # Failed conversions (raised, or an error tuple) keep the spool:
+        # finalizing again retries without re-uploading
+        if not isinstance(response, tuple):
+            chunked_upload.discard_upload(upload_id)
+        return response
 
     except Exception as e:
-        # Catch any unexpected server errors
         print(f"❌ Server Error: {str(e)}")
         return jsonify({"error": "Failed to process document", "details": str(e)}), 500
 
+@app.route('/api/audit/stats', methods=['GET'])
+@admin_only
+def audit_stats():
+    """Audit logger health: spool backlog, flush latency, dropped entries"""
+    from api.logger import get_audit_stats
+    return jsonify(get_audit_stats())
+
+@app.route('/api/server/stats', methods=['GET'])
+@admin_only
+def server_stats():
+    """Request queue of the production server (gunicorn.conf.py): listen queue, queue wait, busy threads"""
+    from api.server_metrics import get_server_stats
+    return jsonify(get_server_stats())
+
+@app.route('/api/analytics', methods=['POST'])
+def collect_analytics():
+    """Buffer analytics events: one or an array, JSON or sendBeacon text/plain (same as api/analytics.py)"""
+    from api.analytics_store import MAX_BODY_BYTES, parse_events, record_event
+    if request.content_length and request.content_length > MAX_BODY_BYTES:
+        return '', 413
+    try:
+        events = parse_events(request.get_data())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    visitor = f"{request.remote_addr}|{request.headers.get('User-Agent', '')}"
+    for event in events:
+        record_event(event, visitor)
+    return '', 204
+
+@app.route('/api/analytics/stats', methods=['GET'])
+@admin_only
+def analytics_stats():
+    """Analytics store health: buffered events, writes, drops"""
+    from api.analytics_store import get_store_stats
+    return jsonify(get_store_stats())
+
+@app.route('/api/analytics/summary', methods=['GET'])
+@admin_only
+def analytics_summary():
+    """
+    Totals per path/hour/referrer/screen from the rollups (self-hosted only: a
+    Vercel instance's /tmp holds a fraction of the events). Read-only; covers
+    events up to the store's last flush (ANALYTICS_FLUSH_SECONDS).
+    """
+    from api.analytics_rollup import summarize
+    try:
+        return jsonify(summarize(request.args.get('from'), request.args.get('to')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 @app.route('/api/rituals', methods=['GET'])
 def get_rituals_news_content():
     """
-    Scans the 'Rituals and News' directory and returns categorized images.
-    Files should start with 'Rituals' or 'News'.
+    Returns the categorized images of the 'Rituals and News' directory, with
+    their dimensions, placeholder and color (api/media_manifest.py).
+    Files should start with 'Rituals' or 'News'. The listing is cached until
+    the folder changes (api/rituals_index.py); repeat requests get a 304.
     """
-    directory = 'Rituals and News'
-    if not os.path.exists(directory):
-        return jsonify({"rituals": [], "news": []})
+    from api.rituals_index import INDEX_CACHE_CONTROL, get_encoded_index, get_page, encode, etag_matches
+    if request.args.keys() & {'limit', 'cursor', 'category'}:
+        # One page: ?limit=12&cursor=<nextCursor of the previous page>&category=news
+        error, status, page = get_page(request.args.get('category'), request.args.get('cursor'),
+                                       request.args.get('limit'))
+        if error:
+            return jsonify({"error": error}), status
+        (body, etag), encoding = encode(page), None  # compress_json compresses the page
+    else:
+        # Compressed once per encoding and cached with the index
+        body, etag, encoding = get_encoded_index(request.headers.get('Accept-Encoding'))
+    headers = {'ETag': etag, 'Cache-Control': INDEX_CACHE_CONTROL, 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return '', 304, headers
+    if encoding:
+        headers['Content-Encoding'] = encoding  # compress_json leaves encoded bodies alone
+    return app.response_class(body, mimetype='application/json', headers=headers)
 
-    files = [f for f in os.listdir(directory) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))]
-    
-    content = {
-        "rituals": [],
-        "news": []
-    }
-    
-    for file in files:
-        # Check start of filename to categorize
-        if file.lower().startswith('rituals'):
-            content['rituals'].append(file)
-        elif file.lower().startswith('news'):
-            content['news'].append(file)
-            
-    # Sort them to ensure order (e.g. News 1, News 2)
-    content['rituals'].sort()
-    content['news'].sort()
-    
-    return jsonify(content)
+@app.route('/img/<path:filename>')
+def image_variant(filename):
+    """
+    Resized copy of an image from Images/ or 'Rituals and News/':
+    /img/Images/Mandir.jpg?w=640&fmt=webp (fmt: avif, webp, jpeg or auto from the Accept header).
+    Variants are cached on disk (api/image_variants.py); URLs carrying ?v=<source hash> are immutable.
+    """
+    from api.image_variants import get_variant, IMMUTABLE_CACHE_CONTROL, VARIANT_CACHE_CONTROL
+    error, status, variant = get_variant(filename, request.args.get('w'), request.args.get('fmt'),
+                                         request.headers.get('Accept', ''))
+    if error:
+        return jsonify({"error": error}), status
+
+    # conditional=True answers If-None-Match with 304 and supports Range requests
+    response = send_file(variant['path'], mimetype=variant['mimeType'], etag=variant['etag'],
+                         conditional=True, max_age=None)
+    version = request.args.get('v')
+    immutable = bool(version) and len(version) >= 8 and variant['sourceHash'].startswith(version)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else VARIANT_CACHE_CONTROL
+    if variant['negotiated']:
+        response.headers['Vary'] = 'Accept'
+    return response
 
 # Serve the 'Rituals and News' directory as static files
 @app.route('/Rituals and News/<path:filename>')
 def serve_rituals_news_files(filename):
-    return app.send_from_directory('Rituals and News', filename)
+    return send_media('Rituals and News', filename)
 
 # Entry point: Run the server if executed directly
 if __name__ == '__main__':
     print("🚀 Python Kaithi Converter Server starting on http://localhost:5000")
     # Run in debug mode for auto-reloading during development
+    # (production: `gunicorn server:app`, settings in gunicorn.conf.py)
     app.run(port=5000, debug=True)
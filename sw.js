@@ -1,67 +1,102 @@
-const CACHE_NAME = 'thawe-dham-v3';
-const ASSETS_TO_CACHE = [
-    './',
-    './index.html',
-    './style.css',
-    './script.js',
-    './festivals_2026.json',
-    './Images/Mandir.jpg',
-    './Images/Thawe_Mata_Ji.jpg',
-    './Audio/bell.mp3',
-    './manifest.json'
+// Files cached at install time. `python build.py` rewrites this list in the
+// deployed copy with the fingerprinted URLs and a content revision per file,
+// so a new deploy only downloads the files that actually changed.
+// (revision: null = unbuilt source tree, cached like any other request)
+// The bell sound is left out: it's only fetched once a visitor interacts with the page.
+const PRECACHE = [
+    { url: './', revision: null },
+    { url: './index.html', revision: null },
+    { url: './style.css', revision: null },
+    { url: './script.js', revision: null },
+    { url: './festivals_2026.json', revision: null },
+    { url: './Images/Mandir.jpg', revision: null },
+    { url: './Images/Thawe_Mata_Ji.jpg', revision: null },
+    { url: './manifest.json', revision: null }
 ];
 
-// Install Event: Cache assets individually so one failure doesn't block the PWA
+// Cache names never need bumping: precached entries are keyed by revision
+const PRECACHE_NAME = 'thawe-dham-precache';
+const RUNTIME_NAME = 'thawe-dham-runtime';
+
+const absolute = (url) => new URL(url, self.location).href;
+const cacheKey = (entry) => absolute(`${entry.url}${entry.url.includes('?') ? '&' : '?'}__rev=${entry.revision}`);
+const revisioned = PRECACHE.filter(entry => entry.revision);
+const precacheKeys = new Map(revisioned.map(entry => [absolute(entry.url), cacheKey(entry)]));
+
+// Install Event: fetch only the entries whose revision isn't cached yet
 self.addEventListener('install', (event) => {
     event.waitUntil(
-        caches.open(CACHE_NAME).then((cache) => {
+        Promise.all([caches.open(PRECACHE_NAME), caches.open(RUNTIME_NAME)]).then(([precache, runtime]) => {
             console.log('[SW] Caching assets individually');
-            return Promise.allSettled(
-                ASSETS_TO_CACHE.map(url => {
-                    return cache.add(url).catch(err => console.warn(`[SW] Failed to cache: ${url}`, err));
-                })
-            );
+            return Promise.allSettled(PRECACHE.map(async (entry) => {
+                try {
+                    if (!entry.revision) {
+                        await runtime.add(entry.url);
+                        return;
+                    }
+                    const key = cacheKey(entry);
+                    if (await precache.match(key)) return; // Unchanged since the last deploy
+                    const response = await fetch(entry.url, { cache: 'no-cache' });
+                    if (response.ok) await precache.put(key, response);
+                } catch (err) {
+                    console.warn(`[SW] Failed to cache: ${entry.url}`, err);
+                }
+            }));
         })
     );
     self.skipWaiting();
 });
 
-// Activate Event: Cleanup old caches
+// Activate Event: drop old revisions and caches from earlier versions of this worker
 self.addEventListener('activate', (event) => {
+    const current = new Set(precacheKeys.values());
     event.waitUntil(
-        caches.keys().then((cacheNames) => {
-            return Promise.all(
-                cacheNames.map((cacheName) => {
-                    if (cacheName !== CACHE_NAME) {
-                        return caches.delete(cacheName);
-                    }
-                })
-            );
-        })
+        caches.keys().then((cacheNames) => Promise.all(
+            cacheNames.filter(name => name !== PRECACHE_NAME && name !== RUNTIME_NAME)
+                .map(name => caches.delete(name))
+        )).then(() => caches.open(PRECACHE_NAME)).then((cache) =>
+            cache.keys().then(requests => Promise.all(
+                requests.filter(request => !current.has(request.url)).map(request => cache.delete(request))
+            ))
+        )
     );
     self.clients.claim();
 });
 
-// Fetch Event: Stale-while-revalidate
+// Fetch Event: cache-first for precached assets, stale-while-revalidate for the rest
 self.addEventListener('fetch', (event) => {
     // Skip non-GET requests and cross-origin analytics
     if (event.request.method !== 'GET' || event.request.url.includes('/api/')) {
         return;
     }
 
+    const url = new URL(event.request.url);
+    url.hash = '';
+    const precacheKey = precacheKeys.get(url.href);
+
+    // Fingerprinted assets never change at the same URL: no need to touch the network
+    if (precacheKey && event.request.mode !== 'navigate') {
+        event.respondWith(
+            caches.open(PRECACHE_NAME)
+                .then(cache => cache.match(precacheKey))
+                .then(cached => cached || fetch(event.request))
+        );
+        return;
+    }
+
     event.respondWith(
-        caches.match(event.request).then((cachedResponse) => {
+        caches.match(event.request, { cacheName: RUNTIME_NAME }).then((cachedResponse) => {
             const fetchPromise = fetch(event.request).then((networkResponse) => {
                 if (networkResponse && networkResponse.status === 200) {
                     const responseClone = networkResponse.clone();
-                    caches.open(CACHE_NAME).then((cache) => {
+                    caches.open(RUNTIME_NAME).then((cache) => {
                         cache.put(event.request, responseClone);
                     });
                 }
                 return networkResponse;
             }).catch(() => {
-                // Return cached response if network fails
-                return cachedResponse;
+                // Offline: the cached copy, or the precached page from the last deploy
+                return cachedResponse || (precacheKey && caches.match(precacheKey));
             });
 
             return cachedResponse || fetchPromise;
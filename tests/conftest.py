@@ -0,0 +1,26 @@
+import functools
+import os
+
+import pytest
+
+
+@pytest.fixture
+def rituals(tmp_path, monkeypatch):
+    """An empty 'Rituals and News' folder in tmp_path, listed by api/rituals_index.py"""
+    from api import rituals_index
+    folder = tmp_path / "Rituals and News"
+    folder.mkdir()
+    monkeypatch.setattr(rituals_index, "RITUALS_DIR", str(folder))
+    # build_index() binds the folder as a default argument
+    monkeypatch.setattr(rituals_index, "build_index", functools.partial(rituals_index.build_index, str(folder)))
+    monkeypatch.setattr(rituals_index.media_manifest, "MANIFEST_PATH", str(tmp_path / "media-manifest.json"))
+    monkeypatch.setattr(rituals_index, "_cache", {"key": None, "index": None, "body": None, "etag": None, "encoded": {}})
+    return folder
+
+
+def add_posts(folder, *names):
+    """Writes tiny JPEGs and moves the folder's mtime on, as a new upload would"""
+    for name in names:
+        (folder / name).write_bytes(b"\xff\xd8\xff" + name.encode())
+    stat = os.stat(folder)
+    os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
@@ -0,0 +1,31 @@
+import pytest
+
+from server import app
+
+ENDPOINTS = ("/api/audit/stats", "/api/server/stats", "/api/analytics/stats", "/api/analytics/summary")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "debug", False)
+    return app.test_client()
+
+
+def test_hidden_without_a_token_outside_debug(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    for path in ENDPOINTS:
+        assert client.get(path).status_code == 404, path
+
+
+def test_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    for path in ENDPOINTS:
+        assert client.get(path).status_code == 401, path
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401, path
+        assert client.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200, path
+
+
+def test_open_on_the_debug_server(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    monkeypatch.setattr(app, "debug", True)
+    assert client.get("/api/audit/stats").status_code == 200
@@ -0,0 +1,74 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api import analytics_rollup, analytics_store
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(analytics_rollup, "_deltas", {})
+    monkeypatch.setattr(analytics_rollup, "_sketches", {})
+    monkeypatch.setattr(analytics_rollup, "_pruned", {"day": None})
+    return tmp_path
+
+
+def at(text):
+    return datetime.strptime(text, "%Y-%m-%dT%H").replace(tzinfo=timezone.utc)
+
+
+def view(path="/", referrer="https://www.google.com/search?q=thawe", screen="390x844"):
+    return {"type": "pageview", "path": path, "referrer": referrer, "screen": screen}
+
+
+def test_summary_adds_whole_days_and_edge_hours():
+    for hour in ("2026-10-17T23", "2026-10-18T00", "2026-10-18T12", "2026-10-19T01", "2026-10-19T05"):
+        analytics_rollup.add_event(view(), at(hour), visitor=hour)
+    analytics_rollup.add_event({"type": "click"}, at("2026-10-18T12"))
+    assert analytics_rollup.persist() > 0
+
+    summary = analytics_rollup.summarize("2026-10-17T23", "2026-10-19T02")
+    assert summary["pageviews"] == 4  # 17T23, the whole 18th, 19T01; not 19T05
+    assert summary["events"] == 5
+    assert summary["types"] == [["pageview", 4], ["click", 1]]
+    assert summary["referrers"] == [["www.google.com", 4]]
+    assert summary["hours"] == {"2026-10-17T23": 1, "2026-10-18T00": 1, "2026-10-18T12": 1, "2026-10-19T01": 1}
+    assert summary["rollupsRead"] >= 4
+
+
+def test_bad_ranges_are_refused():
+    with pytest.raises(ValueError):
+        analytics_rollup.summarize("yesterday")
+    with pytest.raises(ValueError):
+        analytics_rollup.summarize("2026-10-19", "2026-10-18")
+    with pytest.raises(ValueError):
+        analytics_rollup.summarize("2024-01-01", "2026-01-01")
+
+
+def test_old_edges_widen_to_whole_days(monkeypatch, store):
+    monkeypatch.setattr(analytics_rollup, "HOUR_RETENTION_DAYS", 31)
+    old = (datetime.now(timezone.utc) - timedelta(days=60)).replace(hour=0, minute=0, second=0, microsecond=0)
+    for hours in (3, 15, 22):
+        analytics_rollup.add_event(view(), old + timedelta(hours=hours))
+    analytics_rollup.persist()
+
+    # The hour files of that day are gone (pruned); its day file still has everything
+    assert not any(name.startswith(f"hour-{old:%Y-%m-%d}") for name in os.listdir(store / "rollups"))
+    summary = analytics_rollup.summarize(f"{old:%Y-%m-%d}T10", f"{old:%Y-%m-%d}T12")
+    assert summary["from"] == f"{old:%Y-%m-%d}T00:00Z"
+    assert summary["to"] == f"{old + timedelta(days=1):%Y-%m-%d}T00:00Z"
+    assert summary["pageviews"] == 3
+
+
+def test_recent_edges_keep_their_hours(monkeypatch):
+    monkeypatch.setattr(analytics_rollup, "HOUR_RETENTION_DAYS", 31)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    analytics_rollup.add_event(view(), now)
+    analytics_rollup.add_event(view(), now + timedelta(hours=1))
+    analytics_rollup.persist()
+    summary = analytics_rollup.summarize(f"{now:%Y-%m-%dT%H}", f"{now:%Y-%m-%dT%H}")
+    assert summary["from"] == f"{now:%Y-%m-%dT%H}:00Z"
+    assert summary["pageviews"] == 1
+
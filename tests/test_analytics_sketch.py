@@ -0,0 +1,92 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from api import analytics_rollup, analytics_store
+from api.analytics_sketch import CountMinSketch, DaySketch, HyperLogLog, TopK
+
+
+def test_hyperloglog_estimates_distinct_values():
+    hll = HyperLogLog()
+    for i in range(20000):
+        hll.add(f"visitor-{i % 10000}")  # Every visitor twice
+    assert abs(hll.count() - 10000) / 10000 < 0.05
+
+    small = HyperLogLog()
+    for i in range(50):
+        small.add(i)
+    assert small.count() == pytest.approx(50, abs=2)  # Linear counting range
+    assert HyperLogLog().count() == 0
+
+
+def test_hyperloglogs_merge_to_the_union():
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        a.add(i)
+    for i in range(2000, 5000):
+        b.add(i)
+    assert abs(a.merge(b).count() - 5000) / 5000 < 0.05
+
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(10))
+
+
+def test_count_min_never_under_counts():
+    sketch = CountMinSketch(width=64, depth=4)  # Narrow: collisions are certain
+    truth = {f"/page/{i}": i + 1 for i in range(200)}
+    for key, n in truth.items():
+        sketch.add(key, n)
+    assert all(sketch.estimate(key) >= n for key, n in truth.items())
+    assert sketch.estimate("/page/199") <= 200 + sum(truth.values()) / 64 * 4
+
+
+def test_topk_keeps_the_heaviest_keys():
+    top = TopK(k=3)
+    for key, n in (("google", 50), ("direct", 40), ("bing", 30), ("t.co", 5), ("duckduckgo", 2)):
+        for _ in range(n):
+            top.add(key)
+    assert [key for key, _ in top.items()] == ["google", "direct", "bing"]
+    assert dict(top.items())["google"] >= 50
+
+
+def test_topk_merge_combines_counts():
+    a, b = TopK(k=2), TopK(k=2)
+    a.add("google", 10)
+    a.add("bing", 8)
+    b.add("direct", 9)
+    b.add("bing", 8)
+    assert a.merge(b).items()[0] == ("bing", 16)
+
+
+def test_sketches_round_trip_through_json():
+    day = DaySketch()
+    for i in range(500):
+        day.add(f"v{i}", "/" if i % 2 else "/rituals-news.html", "google" if i % 3 else "direct", "390x844")
+    restored = DaySketch.from_dict(json.loads(json.dumps(day.to_dict())))
+    assert restored.uniques.count() == day.uniques.count()
+    assert restored.paths["/"].count() == day.paths["/"].count()
+    assert restored.referrers.items() == day.referrers.items()
+
+    # Bounded: past MAX_PATHS, new paths share one "(other)" slot
+    for i in range(DaySketch.MAX_PATHS + 10):
+        day.add("v", f"/p{i}", "", "")
+    assert len(day.paths) == DaySketch.MAX_PATHS + 1
+    assert "(other)" in day.paths
+
+
+def test_rollup_summary_reports_uniques_and_top_referrers(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(analytics_rollup, "_deltas", {})
+    monkeypatch.setattr(analytics_rollup, "_sketches", {})
+    received = datetime(2026, 10, 18, 10, tzinfo=timezone.utc)
+    for i in range(30):
+        event = {"type": "pageview", "path": "/rituals-news.html" if i % 3 else "/",
+                 "referrer": "https://www.google.com/" if i % 5 else "", "screen": "390x844"}
+        analytics_rollup.add_event(event, received, visitor=f"v{i % 10}")
+    analytics_rollup.persist()
+
+    summary = analytics_rollup.summarize("2026-10-18", "2026-10-18")
+    assert summary["uniqueVisitors"] == 10
+    assert summary["topReferrers"] == [["www.google.com", 24], ["(direct)", 6]]
+    assert summary["topScreens"] == [["390x844", 30]]
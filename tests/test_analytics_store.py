@@ -0,0 +1,84 @@
+import json
+import types
+
+import pytest
+
+from api import analytics_rollup, analytics_store
+from server import app
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(analytics_store, "_buffer", [])
+    monkeypatch.setattr(analytics_store, "_stats", {**analytics_store._stats, "received": 0, "written": 0,
+                                                    "dropped": 0, "writes": 0})
+    # No flusher thread: the tests flush the buffer themselves
+    monkeypatch.setattr(analytics_store, "_worker", types.SimpleNamespace(ensure=lambda: None))
+    monkeypatch.setattr(analytics_rollup, "_deltas", {})
+    monkeypatch.setattr(analytics_rollup, "_sketches", {})
+    return tmp_path
+
+
+def stored_events():
+    return [event for name in analytics_store.list_segments()
+            for event in analytics_store.iter_events(name[len("events-"):-len(".jsonl")])]
+
+
+def test_events_are_buffered_then_written_in_one_append(store):
+    for i in range(3):
+        assert analytics_store.record_event({"type": "pageview", "path": f"/{i}"}) is True
+    assert analytics_store.list_segments() == []  # Nothing written on the request path
+
+    assert analytics_store.flush_events() == 3
+    assert [e["path"] for e in stored_events()] == ["/0", "/1", "/2"]
+    assert all("receivedAt" in e for e in stored_events())
+    assert analytics_store.flush_events() == 0
+    stats = analytics_store.get_store_stats()
+    assert (stats["received"], stats["written"], stats["writes"], stats["buffered"]) == (3, 3, 1, 0)
+
+
+def test_full_buffer_drops_events(monkeypatch):
+    monkeypatch.setattr(analytics_store, "ANALYTICS_MAX_BUFFER", 2)
+    results = [analytics_store.record_event({"type": "click"}) for _ in range(3)]
+    assert results == [True, True, False]
+    assert analytics_store.get_store_stats()["dropped"] == 1
+
+
+def test_half_written_lines_are_skipped(store):
+    analytics_store.record_event({"type": "click"})
+    analytics_store.flush_events()
+    name = analytics_store.list_segments()[0]
+    with open(store / name, "a") as f:
+        f.write('{"type": "cli')
+    assert [e["type"] for e in stored_events()] == ["click"]
+
+
+@pytest.mark.parametrize("body", [
+    [{"type": "pageview"}, {"type": "click"}, "not an event"],
+    {"events": [{"type": "pageview"}, {"type": "click"}]},
+])
+def test_batched_beacons_are_parsed(body):
+    events = analytics_store.parse_events(json.dumps(body).encode())
+    assert [e["type"] for e in events] == ["pageview", "click"]
+
+
+def test_parse_events_limits_and_rejects():
+    assert len(analytics_store.parse_events(json.dumps([{}] * 500))) == analytics_store.MAX_EVENTS_PER_REQUEST
+    assert analytics_store.parse_events(b'{"type": "click"}') == [{"type": "click"}]
+    with pytest.raises(ValueError):
+        analytics_store.parse_events(b'"text"')
+    with pytest.raises(ValueError):
+        analytics_store.parse_events(b"not json")
+
+
+def test_collector_takes_send_beacon_bodies():
+    client = app.test_client()
+    body = json.dumps([{"type": "pageview", "path": "/"}, {"type": "click"}])
+    response = client.post("/api/analytics", data=body, content_type="text/plain;charset=UTF-8")
+    assert response.status_code == 204
+    assert analytics_store.get_store_stats()["buffered"] == 2
+
+    assert client.post("/api/analytics", data="nope", content_type="text/plain").status_code == 400
+    too_big = b"[" + b" " * analytics_store.MAX_BODY_BYTES + b"]"
+    assert client.post("/api/analytics", data=too_big, content_type="text/plain").status_code == 413
@@ -0,0 +1,90 @@
+import asyncio
+import base64
+import gzip
+
+import pytest
+
+pytest.importorskip("quart")
+
+import asgi
+from api import chunked_upload, logger
+from api.upload import UPLOAD_LIMITS
+from conftest import add_posts
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 40
+
+
+@pytest.fixture(autouse=True)
+def conversions(monkeypatch, tmp_path):
+    """The model answers after a short wait; tracks how many calls overlap"""
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(logger, "log_to_github", lambda *args: None)
+    monkeypatch.setattr(asgi, "_conversion_slots", None)  # One semaphore per event loop
+    monkeypatch.setattr(chunked_upload, "SPOOL_DIR", str(tmp_path / "spool"))
+    state = {"active": 0, "peak": 0, "fail": 0}
+
+    async def translate(api_key, image_bytes, mime_type, target_lang):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(0.02)
+            if state["fail"]:
+                state["fail"] -= 1
+                raise RuntimeError("model overloaded")
+            return f"{target_lang}: {len(image_bytes)}"
+        finally:
+            state["active"] -= 1
+
+    monkeypatch.setattr(asgi, "translate_document_async", translate)
+    return state
+
+
+def run(test):
+    return asyncio.run(test(asgi.app.test_client()))
+
+
+def test_conversions_beyond_the_limit_wait_for_a_slot(conversions, monkeypatch):
+    monkeypatch.setattr(asgi, "MAX_CONCURRENT_CONVERSIONS", 2)
+    body = {"image": base64.b64encode(JPEG).decode(), "mimeType": "image/jpeg", "targetLang": "Hindi"}
+
+    async def test(client):
+        responses = await asyncio.gather(*(client.post("/api/convert", json=body) for _ in range(5)))
+        return [(r.status_code, await r.get_json()) for r in responses]
+
+    assert run(test) == [(200, {"text": f"Hindi: {len(JPEG)}"})] * 5
+    assert conversions["peak"] == 2
+
+
+def test_failed_conversion_keeps_the_chunked_upload(conversions, monkeypatch):
+    monkeypatch.setitem(UPLOAD_LIMITS, "chunkSize", 4096)
+    conversions["fail"] = 1
+
+    async def test(client):
+        start = await client.post("/api/convert/uploads",
+                                  json={"size": len(JPEG), "mimeType": "image/jpeg", "targetLang": "Hindi"})
+        upload_id = (await start.get_json())["uploadId"]
+        for offset in range(0, len(JPEG), 4096):
+            put = await client.put(f"/api/convert/uploads/{upload_id}?offset={offset}", data=JPEG[offset:offset + 4096])
+            assert put.status_code == 200
+        finalize = f"/api/convert/uploads/{upload_id}/finalize"
+        failed = await client.post(finalize)
+        kept = chunked_upload.get_upload(upload_id)[1]
+        retried = await client.post(finalize)
+        return failed.status_code, kept, retried.status_code, chunked_upload.get_upload(upload_id)[1]
+
+    assert run(test) == (500, 200, 200, 404)
+
+
+def test_rituals_index_is_sent_encoded_with_its_etag(rituals):
+    add_posts(rituals, *["News_%03d.jpg" % i for i in range(100)])
+
+    async def test(client):
+        response = await client.get("/api/rituals", headers={"Accept-Encoding": "gzip"})
+        etag = response.headers["ETag"]
+        again = await client.get("/api/rituals", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        return response.headers["Content-Encoding"], etag, gzip.decompress(await response.get_data()), again.status_code
+
+    encoding, etag, body, revalidated = run(test)
+    assert encoding == "gzip" and etag.endswith('-gzip"')
+    assert b"News_099.jpg" in body
+    assert revalidated == 304
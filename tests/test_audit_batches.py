@@ -0,0 +1,120 @@
+import pytest
+
+from api import audit_spool, logger
+
+
+class Response:
+    def __init__(self, status_code, url=None):
+        self.status_code = status_code
+        self.text = ""
+        self.url = url
+
+    def json(self):
+        return {"html_url": self.url}
+
+
+class FakeGitHub:
+    """Records the comments posted; answers 201 unless told otherwise"""
+
+    def __init__(self):
+        self.comments = []
+        self.statuses = []
+
+    def request(self, method, path, max_wait=None, **kwargs):
+        self.comments.append((method, path, kwargs["json"]["body"]))
+        status = self.statuses.pop(0) if self.statuses else 201
+        return Response(status, f"https://github.example/c/{len(self.comments)}")
+
+
+@pytest.fixture(autouse=True)
+def github(tmp_path, monkeypatch):
+    """Credentials set, a spool in tmp_path, fresh counters and a fake GitHub"""
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+    monkeypatch.setenv("GITHUB_REPO", "owner/repo")
+    monkeypatch.setenv("GITHUB_ISSUE_NO", "7")
+    monkeypatch.setattr(audit_spool, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(audit_spool, "_backlog", {"checked": 0.0, "full": False})
+    monkeypatch.setattr(logger, "_stats", {key: 0 for key in logger._stats})
+    monkeypatch.setattr(logger, "_unflushed", 0)
+    monkeypatch.setattr(logger, "_posted", None)
+    monkeypatch.setattr(logger, "_windows", {})
+    monkeypatch.setattr(logger, "AUDIT_DEDUPE_WINDOW", 0)
+    monkeypatch.setattr(logger, "AUDIT_REPEAT_SAMPLE_RATE", 1)
+    # Entries are only spooled while logging (no flusher thread); the tests flush them
+    monkeypatch.setattr(logger, "AUDIT_MODE", "digest")
+    fake = FakeGitHub()
+    monkeypatch.setattr(logger, "github_request", fake.request)
+    return fake
+
+
+def flush(monkeypatch, batch_size):
+    monkeypatch.setattr(logger, "AUDIT_MODE", "batch")
+    monkeypatch.setattr(logger, "AUDIT_BATCH_SIZE", batch_size)
+    return logger.flush_audit_log()
+
+
+def test_conversions_are_posted_in_batches(github, monkeypatch):
+    for i in range(5):
+        logger.log_to_github(f"10.0.0.{i}", "Hindi", f"text {i}", latency_ms=100)
+    assert github.comments == []  # Logging never waits for GitHub
+
+    assert flush(monkeypatch, 2) is True
+    assert [path for _, path, _ in github.comments] == ["/repos/owner/repo/issues/7/comments"] * 3
+    assert [body.count("| `10.0.0.") for _, _, body in github.comments] == [2, 2, 1]
+    assert "(2 conversions)" in github.comments[0][2]
+    stats = logger.get_audit_stats()
+    assert (stats["spooled"], stats["sent"], stats["batches"], stats["failed"]) == (5, 5, 3, 0)
+    assert stats["pendingBytes"] == 0
+
+
+def test_failed_batches_stay_in_the_spool(github, monkeypatch):
+    for i in range(3):
+        logger.log_to_github("10.0.0.1", "Hindi", f"text {i}")
+    github.statuses = [500]
+    assert flush(monkeypatch, 10) is False
+    assert logger.get_audit_stats()["failed"] == 1
+    assert audit_spool.pending_bytes() > 0
+
+    # The next flush posts the same entries
+    assert flush(monkeypatch, 10) is True
+    assert github.comments[1][2] == github.comments[0][2]
+
+
+def test_missing_credentials_skip_logging(github, monkeypatch):
+    monkeypatch.delenv("GITHUB_TOKEN")
+    logger.log_to_github("10.0.0.1", "Hindi", "text")
+    assert audit_spool.pending_bytes() == 0
+    assert logger.flush_audit_log() is False
+    assert github.comments == []
+
+
+def test_each_body_is_stored_and_posted_once(github, monkeypatch, tmp_path):
+    for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        logger.log_to_github(ip, "Hindi", "same document")
+    logger.log_to_github("10.0.0.4", "Hindi", "another document")
+    assert len(list((tmp_path / "content").iterdir())) == 2
+    digest = audit_spool.content_hash("same document")
+
+    assert flush(monkeypatch, 10) is True
+    body = github.comments[0][2]
+    assert body.count("same document") == 1 and body.count("another document") == 1
+    assert body.count(f"`{digest}`") == 3  # One table row each, the body in one details block
+
+    # Later repeats only link to the comment that carries the body
+    logger.log_to_github("10.0.0.5", "Hindi", "same document")
+    assert flush(monkeypatch, 10) is True
+    body = github.comments[1][2]
+    assert "same document" not in body
+    assert f"[`{digest}`](https://github.example/c/1)" in body
+    assert logger.get_audit_stats()["deduped"] == 3  # Two repeats in the first comment, one in the second
+
+
+def test_posted_bodies_are_remembered_across_restarts(github, monkeypatch):
+    logger.log_to_github("10.0.0.1", "Hindi", "same document")
+    assert flush(monkeypatch, 10) is True
+    monkeypatch.setattr(logger, "_posted", None)  # A new process
+
+    logger.log_to_github("10.0.0.2", "Hindi", "same document")
+    assert flush(monkeypatch, 10) is True
+    assert "same document" not in github.comments[1][2]
+    assert audit_spool.load_posted() == {audit_spool.content_hash("same document"): "https://github.example/c/1"}
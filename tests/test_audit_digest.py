@@ -0,0 +1,55 @@
+import gzip
+import json
+
+import pytest
+
+from api import audit_digest, audit_spool
+
+
+@pytest.fixture(autouse=True)
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_spool, "SPOOL_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert audit_digest.percentile(values, 50) == 50
+    assert audit_digest.percentile(values, 90) == 90
+    assert audit_digest.percentile(values, 99) == 99
+    assert audit_digest.percentile([7], 99) == 7
+    assert audit_digest.percentile([10, 20, 30], 50) == 20
+    assert audit_digest.percentile([], 50) is None
+
+
+def test_summarize_aggregates_a_day():
+    audit_spool.store_content("aaaa", "Kaithi deed of 1890")
+    records = [
+        {"ip": "1.1.1.1", "targetLang": "Hindi", "latencyMs": 1200, "contentHash": "aaaa"},
+        {"ip": "1.1.1.1", "targetLang": "Hindi", "latencyMs": 800, "contentHash": "aaaa"},
+        {"ip": "2.2.2.2", "targetLang": "English", "latencyMs": 3000, "contentHash": "bbbb"},
+        {"ip": "3.3.3.3", "latencyMs": None},
+    ]
+    summary = audit_digest.summarize(records)
+    assert summary["conversions"] == 4
+    assert summary["languages"] == {"Hindi": 2, "English": 1, "unknown": 1}
+    assert summary["uniqueIps"] == 3
+    assert summary["latencyMs"] == {"p50": 1200, "p90": 3000, "p99": 3000, "max": 3000}
+    # Only documents seen more than once are listed, with a preview of their text
+    assert summary["topDocuments"] == [{"hash": "aaaa", "count": 2, "preview": "Kaithi deed of 1890"}]
+
+
+def test_empty_day():
+    summary = audit_digest.summarize([])
+    assert summary["conversions"] == 0
+    assert summary["latencyMs"]["max"] is None
+    assert "–" in audit_digest.format_digest("2026-10-18", summary)
+
+
+def test_artifact_holds_the_records_and_each_body_once(spool):
+    audit_spool.store_content("aaaa", "body")
+    records = [{"contentHash": "aaaa", "ip": "1.1.1.1"}, {"contentHash": "aaaa", "ip": "2.2.2.2"}]
+    path, packed = audit_digest.write_artifact("2026-10-18", records)
+    lines = [json.loads(line) for line in gzip.decompress(packed).decode().splitlines()]
+    assert lines == records + [{"contentHash": "aaaa", "content": "body"}]
+    assert path.startswith(str(spool))
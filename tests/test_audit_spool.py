@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from api import audit_spool, logger
+
+
+@pytest.fixture(autouse=True)
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_spool, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(audit_spool, "MAX_PENDING_BYTES", 0)
+    monkeypatch.setattr(audit_spool, "_backlog", {"checked": 0.0, "full": False})
+    return tmp_path
+
+
+def records(n, start=0):
+    return [{"time": f"t{i}", "ip": "127.0.0.1", "targetLang": "Hindi", "contentHash": f"h{i}"}
+            for i in range(start, start + n)]
+
+
+def test_records_are_read_back_in_order_from_the_checkpoint():
+    for record in records(5):
+        assert audit_spool.append_record(record)
+
+    batch, position = audit_spool.read_pending(3)
+    assert [r["time"] for r in batch] == ["t0", "t1", "t2"]
+    audit_spool.save_checkpoint(*position)
+
+    batch, position = audit_spool.read_pending(10)
+    assert [r["time"] for r in batch] == ["t3", "t4"]
+    audit_spool.save_checkpoint(*position)
+    assert audit_spool.pending_bytes() == 0
+
+
+def test_undelivered_records_are_replayed_after_a_restart():
+    for record in records(3):
+        audit_spool.append_record(record)
+    first, _ = audit_spool.read_pending(10)
+    # The process died before the checkpoint was saved: the same records come back
+    again, _ = audit_spool.read_pending(10)
+    assert again == first
+    assert audit_spool.pending_bytes() > 0
+
+
+def test_replay_spans_segments_and_skips_half_written_lines(spool):
+    (spool / audit_spool.segment_name("2026-10-18")).write_text('{"time": "a"}\n{"time": "b"}\n')
+    (spool / audit_spool.segment_name("2026-10-19")).write_text('{"time": "c"}\nnot json\n{"time": "d"')
+
+    batch, position = audit_spool.read_pending(10)
+    assert [r["time"] for r in batch] == ["a", "b", "c"]  # Corrupt line skipped, partial line left
+    audit_spool.save_checkpoint(*position)
+
+    # The writer finishes the line: it is delivered next round
+    with open(spool / audit_spool.segment_name("2026-10-19"), "a") as f:
+        f.write("}\n")
+    batch, _ = audit_spool.read_pending(10)
+    assert [r["time"] for r in batch] == ["d"]
+
+
+def test_full_spool_refuses_records(monkeypatch):
+    monkeypatch.setattr(audit_spool, "MAX_PENDING_BYTES", 10)
+    assert audit_spool.append_record(records(1)[0]) is False
+    assert audit_spool.list_segments() == []
+
+
+def test_failed_batches_stay_spooled_and_are_delivered_once(monkeypatch):
+    for record in records(5):
+        audit_spool.append_record(record)
+    monkeypatch.setattr(logger, "AUDIT_BATCH_SIZE", 2)
+    monkeypatch.setattr(audit_spool, "prune_segments", lambda: 0)
+
+    delivered = []
+    outcomes = iter([True, False, True, True])
+
+    def post(entries, max_wait=None):
+        ok = next(outcomes)
+        if ok:
+            delivered.extend(e["time"] for e in entries)
+        return ok
+
+    monkeypatch.setattr(logger, "_post_batch", post)
+    assert logger._drain() is False  # Second batch failed: stops, keeps it spooled
+    assert delivered == ["t0", "t1"]
+    assert logger._drain() is True  # Next round resumes at the checkpoint
+    assert delivered == ["t0", "t1", "t2", "t3", "t4"]
+
+
+def test_posted_hashes_are_pruned_with_their_content(spool):
+    audit_spool.store_content("aaaa", "old body")
+    audit_spool.store_content("bbbb", "recent body")
+    audit_spool.mark_posted(["aaaa", "bbbb"], "https://example.invalid/comment")
+    os.utime(spool / "content" / "aaaa.txt", (0, 0))
+    audit_spool.save_checkpoint(audit_spool.segment_name("2099-01-01"), 0)
+
+    assert audit_spool.prune_segments() == 1
+    assert list(audit_spool.load_posted()) == ["bbbb"]
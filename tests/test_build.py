@@ -0,0 +1,217 @@
+import json
+import re
+
+import pytest
+
+import build
+
+PAGE = """<!doctype html>
+<html>
+<head>
+    <link rel="stylesheet" href="style.css">
+    <meta property="og:image" content="https://thawedham.example/Images/hero.jpg">
+</head>
+<body>
+    <!-- Hero -->
+    <section class="hero">   <h1>Thawe   Dham</h1>  </section>
+    <footer class="footer"><a href="#">Top</a></footer>
+    <img src="./Images/hero.jpg" alt="">
+    <script src="script.js"></script>
+</body>
+</html>
+"""
+CSS = """/* Site styles */
+.hero {
+    background: url('Images/hero.jpg') center / cover;
+    color: #fff;
+}
+.footer a:hover { color: red; }
+"""
+SW = """const PRECACHE = [
+    { url: './', revision: null },
+    { url: './style.css', revision: null },
+    { url: './Images/hero.jpg', revision: null },
+    { url: './gone.js', revision: null }
+];
+"""
+
+
+@pytest.fixture
+def dist(tmp_path, monkeypatch):
+    """A small site already copied to dist/ (the site step)"""
+    monkeypatch.setattr(build, "BUILD_DIR", str(tmp_path))
+    (tmp_path / "index.html").write_text(PAGE)
+    (tmp_path / "rituals-news.html").write_text('<link rel="stylesheet" href="style.css">')
+    (tmp_path / "manifest.json").write_text('{"icons": [{"src": "Images/hero.jpg"}]}')
+    (tmp_path / "style.css").write_text(CSS)
+    (tmp_path / "script.js").write_text("fetch('festivals_2026.json');\n")
+    (tmp_path / "festivals_2026.json").write_text("[]")
+    (tmp_path / "sw.js").write_text(SW)
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "Images" / "hero.jpg").write_bytes(b"\xff\xd8\xff hero")
+    return tmp_path
+
+
+def read(dist, name):
+    return (dist / name).read_text()
+
+
+def test_assets_are_fingerprinted_and_references_rewritten(dist):
+    build.build_assets()
+    assets = build.load_asset_map()
+    hero, style = assets["Images/hero.jpg"], assets["style.css"]
+    assert re.fullmatch(r"Images/hero\.[0-9a-f]{8}\.jpg", hero)
+    assert (dist / hero).read_bytes() == (dist / "Images" / "hero.jpg").read_bytes()
+
+    # style.css is hashed after its reference to the image was rewritten
+    assert f"url('{hero}')" in read(dist, style)
+    assert assets["script.js"] != "script.js"
+    assert assets["festivals_2026.json"] in read(dist, assets["script.js"])
+    page = read(dist, "index.html")
+    assert f'href="{style}"' in page and f'src="./{hero}"' in page
+    assert "https://thawedham.example/Images/hero.jpg" in page  # Absolute URLs stay
+    assert json.loads(read(dist, "manifest.json"))["icons"][0]["src"] == hero
+
+
+def test_service_worker_precaches_fingerprinted_urls(dist):
+    build.build_assets()
+    build.build_service_worker()
+    assets = build.load_asset_map()
+    precache = re.findall(r"url: \"([^\"]+)\", revision: '([0-9a-f]{8})'", read(dist, "sw.js"))
+    assert [url for url, _ in precache] == ["./", "./" + assets["style.css"], "./" + assets["Images/hero.jpg"]]
+    assert precache[0][1] == build.file_digest("index.html")[:8]
+
+
+def test_minify_css_keeps_strings_and_descendant_selectors():
+    from api.minify import minify_css
+    css = '/* c */ a :hover , p > b {\n  content: "a  ;  b" ;\n  margin: 0 auto ;\n}\n'
+    assert minify_css(css) == 'a :hover,p>b{content:"a  ;  b";margin:0 auto}'
+
+
+def test_minify_html_collapses_text_but_not_raw_blocks():
+    from api.minify import minify_html
+    html = ('<!-- note -->\n<p>Ring   <i></i>\n  Bell</p>\n<pre>  keep\n  this</pre>\n'
+            '<script type="application/ld+json">\n{ "name": "Thawe" }\n</script>\n<style> a { color: red ; } </style>')
+    assert minify_html(html) == ('<p>Ring <i></i> Bell</p> <pre>  keep\n  this</pre> '
+                                 '<script type="application/ld+json">{"name":"Thawe"}</script> <style>a{color:red}</style>')
+
+
+def test_critical_css_keeps_the_rules_of_the_fragment():
+    from api.minify import critical_css, minify_css
+    css = minify_css(CSS + "@media (max-width:600px){.hero{height:50vh}.footer{display:none}}"
+                           "@keyframes fade{from{opacity:0}}")
+    critical = critical_css(css, '<header class="hero"><h1>Thawe</h1></header>')
+    assert ".hero{" in critical and "@media (max-width:600px){.hero{height:50vh}}" in critical
+    assert ".footer" not in critical and "@keyframes" not in critical
+
+
+def test_minify_step_inlines_the_hero_css(dist):
+    build.build_minified()
+    page = read(dist, "index.html")
+    assert "<!--" not in page
+    assert re.search(r"<style>\.hero\{[^<]*</style>", page)
+    assert '<link rel="preload" href="style.css" as="style"' in page
+    assert '<noscript><link rel="stylesheet" href="style.css"></noscript>' in page
+    assert ".footer" not in page.split("</style>")[0]
+
+    report = json.loads(read(dist, "build-report.json"))
+    before, after = report["files"]["style.css"]["bytes"]
+    assert after < before
+    lcp_before, lcp_after = report["estimatedLcpMs"]
+    assert lcp_after < lcp_before  # No render-blocking stylesheet any more
+
+
+def test_font_usage_is_scanned_from_pages_and_scripts():
+    from api.font_subset import BASE_CHARACTERS, icon_codepoints, scan_usage
+    characters, icons, classes = scan_usage(['<i class="fas fa-bell"></i> ठावे', "icon.className = 'fab fa-youtube';"])
+    assert {"ठ", "ा", "a"} <= characters and BASE_CHARACTERS <= characters
+    assert icons == {"solid": {"fa-bell"}, "brands": {"fa-youtube"}}
+    assert {"fas", "fab", "fa-bell"} <= classes
+
+    css = '.fa-bell:before{content:"\\f0f3"}.fa-youtube:before,.fa-yt:before{content:"\\f167"}.fa-sun:before{content:"\\f185"}'
+    assert icon_codepoints(css, {"fa-bell", "fa-youtube"}) == {0xf0f3, 0xf167}
+
+
+def test_font_sources_must_match_the_lock(tmp_path, monkeypatch):
+    import hashlib
+    import requests
+    from api import font_subset
+    monkeypatch.setattr(font_subset, "FONT_SOURCE_DIR", str(tmp_path))
+    lock = {"sources": {"a.ttf": {"url": "https://fonts.example/a.ttf", "sha256": hashlib.sha256(b"font").hexdigest()}}}
+
+    class Download:
+        content = b"tampered"
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(requests, "get", lambda url, timeout: Download())
+    with pytest.raises(RuntimeError, match="does not match"):
+        font_subset.fetch_source("a.ttf", lock)
+    with pytest.raises(RuntimeError, match="not in"):
+        font_subset.fetch_source("b.ttf", lock)
+
+    Download.content = b"font"
+    path = font_subset.fetch_source("a.ttf", lock)
+    assert open(path, "rb").read() == b"font"
+    monkeypatch.setattr(requests, "get", None)  # Cached: no download
+    assert font_subset.fetch_source("a.ttf", lock) == path
+
+    with pytest.raises(RuntimeError, match="font_subset --lock"):
+        font_subset.load_lock(str(tmp_path / "missing.json"))
+
+
+def test_fonts_stay_on_the_cdn_without_a_lock(dist, tmp_path, monkeypatch):
+    from api import font_subset
+    monkeypatch.setattr(font_subset, "LOCK_PATH", str(tmp_path / "missing.lock.json"))
+    (dist / "index.html").write_text('<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/'
+                                     'font-awesome/6.4.0/css/all.min.css">')
+    before = read(dist, "index.html")
+    build.build_fonts()
+    assert read(dist, "index.html") == before
+    assert not (dist / "fonts.css").exists()
+
+
+def test_locked_fonts_fail_the_build_unless_the_cdn_fallback_is_set(dist, tmp_path, monkeypatch):
+    from api import font_subset
+    (tmp_path / "fonts.lock.json").write_text("{}")
+    monkeypatch.setattr(font_subset, "LOCK_PATH", str(tmp_path / "fonts.lock.json"))
+
+    def fail(texts, out_dir):
+        (dist / "fonts").mkdir()
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(font_subset, "build_fonts", fail)
+    with pytest.raises(SystemExit):
+        build.build_fonts()
+
+    monkeypatch.setenv("FONTS_FALLBACK", "cdn")
+    build.build_fonts()  # Keeps the CDN links
+    assert not (dist / "fonts").exists()  # Partial output removed
+
+
+def test_audio_is_listed_as_sources_in_preference_order(dist, monkeypatch):
+    from api import audio_variants
+    (dist / "Audio").mkdir()
+    (dist / "Audio" / "bell.mp3").write_bytes(b"ID3" + bytes(1000))
+    (dist / "index.html").write_text('<audio id="bell" src="Audio/bell.mp3" preload="none"></audio>')
+
+    def transcode(source, out_dir):
+        return [("bell.ogg", "audio/ogg; codecs=opus", 100), ("bell.m4a", "audio/mp4", 150),
+                ("bell.mp3", "audio/mpeg", 200)]
+
+    monkeypatch.setattr(audio_variants, "FFMPEG", "ffmpeg")
+    monkeypatch.setattr(audio_variants, "transcode", transcode)
+    build.build_audio()
+    assert read(dist, "index.html") == (
+        '<audio id="bell" preload="none"><source src="Audio/bell.ogg" type="audio/ogg; codecs=opus">'
+        '<source src="Audio/bell.m4a" type="audio/mp4"><source src="Audio/bell.mp3" type="audio/mpeg"></audio>')
+
+
+def test_audio_is_deployed_as_is_without_ffmpeg(dist, monkeypatch):
+    from api import audio_variants
+    (dist / "index.html").write_text('<audio src="Audio/bell.mp3"></audio>')
+    monkeypatch.setattr(audio_variants, "FFMPEG", None)
+    monkeypatch.setattr(audio_variants, "transcode", None)
+    build.build_audio()
+    assert read(dist, "index.html") == '<audio src="Audio/bell.mp3"></audio>'
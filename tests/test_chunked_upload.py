@@ -0,0 +1,157 @@
+import hashlib
+import threading
+
+import pytest
+
+import server
+from api import chunked_upload, logger
+from api.upload import UPLOAD_LIMITS
+
+DATA = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 40  # A small "JPEG" of ~10 KB
+
+
+@pytest.fixture(autouse=True)
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setitem(UPLOAD_LIMITS, "chunkSize", 4096)
+    return tmp_path
+
+
+def start(data=DATA, sha256=None):
+    error, status, info = chunked_upload.create_upload(len(data), "image/jpeg", "Hindi", sha256, {"resized": True})
+    assert (error, status) == (None, 201)
+    assert info["offset"] == 0
+    return info["uploadId"]
+
+
+def send_all(upload_id, data=DATA, chunk=4096):
+    for offset in range(0, len(data), chunk):
+        error, status, info = chunked_upload.write_chunk(upload_id, offset, data[offset:offset + chunk])
+        assert (error, status) == (None, 200)
+    return info
+
+
+def test_create_upload_validates_fields():
+    assert chunked_upload.create_upload(0, "image/jpeg", "Hindi")[1] == 400
+    assert chunked_upload.create_upload(10, "image/gif", "Hindi")[1] == 415
+    assert chunked_upload.create_upload(UPLOAD_LIMITS["maxChunkedBytes"] + 1, "image/jpeg", "Hindi")[1] == 413
+
+
+def test_chunks_must_arrive_at_the_current_offset():
+    upload_id = start()
+    assert chunked_upload.write_chunk(upload_id, 0, DATA[:4096])[1] == 200
+
+    # A retried chunk (already stored) is refused and the current offset reported
+    error, status, info = chunked_upload.write_chunk(upload_id, 0, DATA[:4096])
+    assert status == 409
+    assert info["offset"] == 4096
+    # So is a chunk that skips ahead
+    assert chunked_upload.write_chunk(upload_id, 8192, DATA[8192:12288])[1] == 409
+    assert chunked_upload.write_chunk(upload_id, None, DATA[4096:8192])[1] == 409
+
+
+def test_chunk_size_and_declared_size_are_enforced():
+    upload_id = start()
+    assert chunked_upload.write_chunk(upload_id, 0, b"")[1] == 400
+    assert chunked_upload.write_chunk(upload_id, 0, b"x" * 4097)[1] == 400
+
+    small_id = start(DATA[:100])
+    assert chunked_upload.write_chunk(small_id, 0, DATA[:101])[1] == 400
+
+
+def test_concurrent_chunks_for_the_same_offset_are_written_once():
+    upload_id = start()
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def put():
+        barrier.wait()
+        statuses.append(chunked_upload.write_chunk(upload_id, 0, DATA[:4096])[1])
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [200] + [409] * 7
+    assert chunked_upload.get_upload(upload_id)[2]["offset"] == 4096
+
+
+def test_resume_reports_the_received_offset():
+    upload_id = start()
+    chunked_upload.write_chunk(upload_id, 0, DATA[:4096])
+
+    # The client lost the connection: it asks where to continue
+    error, status, info = chunked_upload.get_upload(upload_id)
+    assert (error, status) == (None, 200)
+    assert info["offset"] == 4096
+    assert info["size"] == len(DATA)
+    for offset in range(info["offset"], len(DATA), 4096):
+        assert chunked_upload.write_chunk(upload_id, offset, DATA[offset:offset + 4096])[1] == 200
+    assert chunked_upload.get_upload(upload_id)[2]["offset"] == len(DATA)
+
+
+def test_finalize_keeps_the_spool_until_discarded():
+    upload_id = start(sha256=hashlib.sha256(DATA).hexdigest())
+    send_all(upload_id)
+
+    error, status, result = chunked_upload.finish_upload(upload_id)
+    assert (error, status) == (None, 200)
+    assert result["bytes"] == DATA
+    assert result["mimeType"] == "image/jpeg"
+    assert result["targetLang"] == "Hindi"
+    assert result["client"] == {"resized": True}
+
+    # The conversion failed: finalizing again needs no new chunks
+    assert chunked_upload.finish_upload(upload_id)[2]["bytes"] == DATA
+
+    # It succeeded: the route discards the spool, a later finalize is a 404
+    chunked_upload.discard_upload(upload_id)
+    assert chunked_upload.finish_upload(upload_id)[1] == 404
+    assert chunked_upload.write_chunk(upload_id, len(DATA), b"x")[1] == 404
+
+
+def test_finalize_refuses_incomplete_or_corrupt_uploads():
+    upload_id = start()
+    chunked_upload.write_chunk(upload_id, 0, DATA[:4096])
+    error, status, info = chunked_upload.finish_upload(upload_id)
+    assert status == 409
+    assert info["offset"] == 4096
+
+    corrupt_id = start(sha256="0" * 64)
+    send_all(corrupt_id)
+    assert chunked_upload.finish_upload(corrupt_id)[1] == 422
+    assert chunked_upload.get_upload(corrupt_id)[1] == 404
+
+
+def test_unknown_or_malformed_ids_are_not_found():
+    assert chunked_upload.get_upload("../../etc/passwd")[1] == 404
+    assert chunked_upload.get_upload("A" * 24)[1] == 404
+    assert chunked_upload.write_chunk("A" * 24, 0, b"x")[1] == 404
+
+
+def test_failed_conversion_keeps_the_upload_for_a_retry(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(logger, "log_to_github", lambda *args: None)
+    outcomes = iter([RuntimeError("model overloaded"), "नमस्ते"])
+
+    def translate(api_key, image_bytes, mime_type, target_lang):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(server, "translate_document", translate)
+    upload_id = start()
+    send_all(upload_id)
+    client = server.app.test_client()
+    finalize = f"/api/convert/uploads/{upload_id}/finalize"
+
+    assert client.post(finalize).status_code == 500
+    assert chunked_upload.get_upload(upload_id)[2]["offset"] == len(DATA)  # Still there
+
+    response = client.post(finalize)
+    assert response.status_code == 200
+    assert response.get_json() == {"text": "नमस्ते"}
+    assert chunked_upload.get_upload(upload_id)[1] == 404  # Converted: discarded
@@ -0,0 +1,111 @@
+import gzip
+import os
+
+import pytest
+
+from api import compression
+from conftest import add_posts
+from server import app
+
+CSS = b"body { color: #333; }\n" * 100
+NEWS = ["News_%03d.jpg" % i for i in range(100)]  # Enough for an index worth compressing
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """style.css with the .br/.gz siblings build.py writes"""
+    (tmp_path / "style.css").write_bytes(CSS)
+    sizes = compression.precompress_file(str(tmp_path / "style.css"))
+    monkeypatch.setattr(app, "static_folder", str(tmp_path))
+    return tmp_path, sizes
+
+
+def test_accepted_encodings():
+    assert compression.accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert compression.accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert compression.accepted_encodings("*") == {"*", "br", "gzip"}
+    assert compression.accepted_encodings(None) == set()
+    assert compression.accepted_encodings("gzip;q=bad") == set()
+
+
+def test_compress_body_skips_small_bodies():
+    assert compression.compress_body(b"{}", "gzip") == (None, None)
+    data, encoding = compression.compress_body(CSS, "gzip")
+    assert encoding == "gzip" and gzip.decompress(data) == CSS
+    # Identical input, identical bytes (build artifacts don't churn)
+    assert compression.compress_body(CSS, "gzip", level="max") == compression.compress_body(CSS, "gzip", level="max")
+
+
+def test_precompressed_sibling_is_picked_by_preference(site):
+    tmp_path, sizes = site
+    path = str(tmp_path / "style.css")
+    assert sizes["gzip"] < len(CSS)
+    assert compression.pick_precompressed(path, "gzip") == (path + ".gz", "gzip")
+    if compression.brotli is not None:
+        assert compression.pick_precompressed(path, "gzip, br") == (path + ".br", "br")
+    assert compression.pick_precompressed(path, "identity") == (None, None)
+    assert compression.pick_precompressed(str(tmp_path / "missing.css"), "gzip") == (None, None)
+
+
+def test_stale_sibling_is_ignored(site):
+    tmp_path, _ = site
+    path = str(tmp_path / "style.css")
+    # style.css edited after the build: its siblings describe the old content
+    for suffix in (".br", ".gz"):
+        if os.path.exists(path + suffix):
+            os.utime(path + suffix, (0, 0))
+    assert compression.pick_precompressed(path, "gzip, br") == (None, None)
+
+
+def test_precompressed_sibling_is_negotiated(site):
+    client = app.test_client()
+    plain = client.get("/style.css")
+    response = client.get("/style.css", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == CSS
+    # Each encoding is a different byte sequence with its own ETag
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    again = client.get("/style.css", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_range_requests_get_the_identity_file(site):
+    response = app.test_client().get("/style.css", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert "Content-Encoding" not in response.headers
+    assert response.data == CSS[:10]
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_rituals_index_is_sent_encoded(rituals, encoding):
+    if encoding == "br" and compression.brotli is None:
+        pytest.skip("brotli not installed")
+    add_posts(rituals, *NEWS)
+    client = app.test_client()
+    plain = client.get("/api/rituals")
+    assert "Content-Encoding" not in plain.headers
+
+    response = client.get("/api/rituals", headers={"Accept-Encoding": encoding})
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + f'-{encoding}"'
+    body = gzip.decompress(response.data) if encoding == "gzip" else compression.brotli.decompress(response.data)
+    assert body == plain.data
+    # Revalidating with either ETag is a 304
+    for etag in (plain.headers["ETag"], response.headers["ETag"]):
+        headers = {"Accept-Encoding": encoding, "If-None-Match": etag}
+        assert client.get("/api/rituals", headers=headers).status_code == 304
+
+
+def test_dynamic_json_is_compressed_per_response(rituals):
+    add_posts(rituals, *NEWS)
+    client = app.test_client()
+    plain = client.get("/api/rituals?limit=100")
+    response = client.get("/api/rituals?limit=100", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+    # Errors and small bodies go out as they are
+    assert "Content-Encoding" not in client.get("/api/rituals?category=x", headers={"Accept-Encoding": "gzip"}).headers
@@ -0,0 +1,113 @@
+import socket
+import time
+
+import pytest
+import requests
+
+import fake_github
+from api import github_transport
+
+real_wait = github_transport._wait
+
+
+@pytest.fixture(autouse=True)
+def transport(monkeypatch):
+    """Fresh rate-limit state; waits are recorded instead of slept"""
+    waits = []
+    monkeypatch.setenv("GITHUB_TOKEN", "fake-token")
+    monkeypatch.setattr(github_transport, "_session", None)
+    monkeypatch.setattr(github_transport, "_rate", {"limit": None, "remaining": None, "reset": None,
+                                                    "blockedUntil": 0.0, "lastRequest": 0.0})
+    monkeypatch.setattr(github_transport, "_stats", dict.fromkeys(github_transport._stats, 0))
+    monkeypatch.setattr(github_transport, "RATE_RESERVE", 0)
+    monkeypatch.setattr(github_transport, "_wait", lambda seconds, deadline: waits.append(seconds) if seconds > 0 else None)
+    return waits
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Starts fake_github.py's server with the given options and points the transport at it"""
+    servers = []
+
+    def start(**options):
+        state = fake_github.FakeGitHub(**options)
+        servers.append(fake_github.serve(state, 0))
+        monkeypatch.setattr(github_transport, "GITHUB_API_URL", f"http://127.0.0.1:{servers[-1].server_address[1]}")
+        return state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def comment(**kwargs):
+    return github_transport.github_request("POST", "/repos/local/fake/issues/1/comments", json={"body": "x"}, **kwargs)
+
+
+def test_reads_are_retried_on_server_errors(fake):
+    state = fake(error_rate=1.0)
+    resp = github_transport.github_request("GET", "/repos/local/fake/contents/audit/a.gz")
+    assert resp.status_code == 500
+    assert state.counts["requests"] == github_transport.MAX_RETRIES + 1
+
+
+def test_comments_are_not_retried_on_server_errors(fake):
+    # The 500 may come after GitHub created the comment: a retry could post it twice
+    state = fake(error_rate=1.0)
+    assert comment().status_code == 500
+    assert state.counts["requests"] == 1
+
+
+def test_comments_are_retried_when_rate_limited(fake, transport):
+    state = fake(too_many_every=2)
+    assert comment().status_code == 201
+    assert comment().status_code == 201  # 429 first, then Retry-After and a second attempt
+    assert state.counts["429"] == 1
+    assert state.counts["created"] == 2
+    assert transport[0] >= 1  # Retry-After: 1
+
+
+def test_comments_are_not_retried_after_a_read_timeout(fake):
+    state = fake(latency_ms=300)
+    with pytest.raises(requests.Timeout):
+        comment(timeout=0.05)
+    time.sleep(0.5)
+    assert state.counts["created"] == 1  # It did reach GitHub
+
+
+def test_comments_are_retried_when_the_connection_fails(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # Nothing listens here once the socket is closed
+    monkeypatch.setattr(github_transport, "GITHUB_API_URL", f"http://127.0.0.1:{port}")
+    with pytest.raises(requests.ConnectionError):
+        comment()
+    assert github_transport._stats["networkErrors"] == github_transport.MAX_RETRIES + 1
+
+
+def test_requests_are_paced_when_the_budget_runs_low(fake, transport):
+    fake(limit=10, window=60)
+    for _ in range(5):
+        assert comment().status_code == 201
+    assert transport == []  # Half the budget left: no pacing yet
+    assert comment().status_code == 201
+    assert comment().status_code == 201
+    # 4 requests left for the rest of the window: spaced about 60/4 s apart
+    assert 0 < transport[-1] <= 61
+    assert github_transport.get_transport_stats()["rateLimitRemaining"] == 3
+
+
+def test_exhausted_budget_waits_for_the_reset(fake, transport):
+    fake(limit=1, window=60)
+    assert comment().status_code == 201
+    # Nothing left (and no reserve): the next call first waits for the window to reset
+    comment()
+    assert 0 < transport[0] <= 61
+
+
+def test_max_wait_raises_instead_of_sleeping(fake, monkeypatch):
+    monkeypatch.setattr(github_transport, "_wait", real_wait)
+    fake(limit=1, window=60)
+    assert comment().status_code == 201
+    with pytest.raises(github_transport.RateLimitWait):
+        comment(max_wait=1)
@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+from api import image_variants  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def site(tmp_path, monkeypatch):
+    """A site root with one 1600x1200 photo and an empty variant cache"""
+    (tmp_path / "Images").mkdir()
+    Image.new("RGB", (1600, 1200), (200, 120, 40)).save(tmp_path / "Images" / "Mandir.jpg", quality=90)
+    monkeypatch.setattr(image_variants, "_root", str(tmp_path))
+    monkeypatch.setattr(image_variants, "CACHE_DIR", str(tmp_path / "image_cache"))
+    monkeypatch.setattr(image_variants, "_usage", {"bytes": None})
+    return tmp_path
+
+
+def test_widths_snap_to_a_few_steps():
+    assert image_variants.snap_width(None) is None
+    assert image_variants.snap_width("100") == 160
+    assert image_variants.snap_width(641) == 800
+    assert image_variants.snap_width(99999) == 2048
+    with pytest.raises(ValueError):
+        image_variants.snap_width(0)
+
+
+def test_format_is_negotiated_from_accept():
+    assert image_variants.choose_format("jpg", "") == ("jpeg", False)
+    assert image_variants.choose_format("gif", "") == (None, False)
+    assert image_variants.choose_format(None, "image/webp,*/*") == ("webp", True)
+    assert image_variants.choose_format("auto", "*/*") == ("jpeg", True)
+
+
+@pytest.mark.parametrize("fmt", ["jpeg", "webp", "avif"])
+def test_variants_are_resized_and_encoded(fmt):
+    if not image_variants.can_encode(fmt):
+        pytest.skip(f"Pillow has no {fmt} encoder here")
+    error, status, variant = image_variants.get_variant("Images/Mandir.jpg", 600, fmt)
+    assert (error, status) == (None, 200)
+    assert variant["mimeType"] == f"image/{fmt}"
+    with Image.open(variant["path"]) as img:
+        assert img.format == image_variants.FORMATS[fmt][0]
+        assert img.size == (640, 480)
+
+
+def test_variants_are_cached_by_source_content(site):
+    _, _, first = image_variants.get_variant("Images/Mandir.jpg", 320, "jpeg")
+    _, _, again = image_variants.get_variant("Images/Mandir.jpg", 300, "jpeg")
+    assert again["path"] == first["path"]  # Same width step: one file
+
+    # Editing the photo changes its hash, so a new variant is made
+    Image.new("RGB", (1600, 1200), (0, 0, 0)).save(site / "Images" / "Mandir.jpg")
+    _, _, edited = image_variants.get_variant("Images/Mandir.jpg", 320, "jpeg")
+    assert edited["etag"] != first["etag"]
+    assert len(os.listdir(site / "image_cache")) >= 1
+
+
+def test_only_images_in_the_media_folders_are_resized(site):
+    (site / "secret.jpg").write_bytes(b"x")
+    assert image_variants.get_variant("secret.jpg")[1] == 404
+    assert image_variants.get_variant("Images/../secret.jpg")[1] == 404
+    assert image_variants.get_variant("Images/missing.jpg")[1] == 404
+    assert image_variants.get_variant("Images/Mandir.jpg", "wide")[1] == 400
+    assert image_variants.get_variant("Images/Mandir.jpg", None, "gif")[1] == 400
+
+
+def test_missing_encoder_is_a_415(monkeypatch):
+    monkeypatch.setattr(image_variants, "can_encode", lambda fmt: fmt == "jpeg")
+    assert image_variants.get_variant("Images/Mandir.jpg", 320, "avif")[1] == 415
+    # Negotiation falls back to JPEG instead
+    assert image_variants.get_variant("Images/Mandir.jpg", 320, None, "image/avif,*/*")[2]["mimeType"] == "image/jpeg"
+
+
+def test_least_recently_used_variants_are_evicted_first():
+    paths = []
+    for i, width in enumerate((160, 320, 480, 640)):
+        path = image_variants.get_variant("Images/Mandir.jpg", width, "jpeg")[2]["path"]
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+    os.utime(paths[0], (2000, 2000))  # The smallest one was just used again
+
+    sizes = [os.path.getsize(p) for p in paths]
+    limit = sum(sizes) - 1
+    removed = image_variants.evict(limit)
+    assert removed >= 1
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])  # Oldest use goes first
+    assert image_variants._usage["bytes"] <= limit * 0.9
+
+
+def test_hits_refresh_the_last_use():
+    path = image_variants.get_variant("Images/Mandir.jpg", 160, "jpeg")[2]["path"]
+    os.utime(path, (1000, 1000))
+    image_variants.get_variant("Images/Mandir.jpg", 160, "jpeg")
+    assert os.path.getmtime(path) > 1000
+
+
+def test_img_route_caches_fingerprinted_urls_for_a_year():
+    from server import app
+    client = app.test_client()
+    response = client.get("/img/Images/Mandir.jpg?w=320", headers={"Accept": "image/webp,*/*"})
+    assert response.status_code == 200
+    assert response.headers["Vary"] == "Accept"
+    assert response.headers["Cache-Control"] == image_variants.VARIANT_CACHE_CONTROL
+
+    version = image_variants.source_hash(image_variants.resolve_source("Images/Mandir.jpg"))[:12]
+    pinned = client.get(f"/img/Images/Mandir.jpg?w=320&fmt=jpeg&v={version}")
+    assert pinned.headers["Cache-Control"] == image_variants.IMMUTABLE_CACHE_CONTROL
+    assert "Vary" not in pinned.headers
+    assert client.get("/img/Images/Mandir.jpg?w=320&fmt=jpeg&v=00000000").headers["Cache-Control"] \
+        == image_variants.VARIANT_CACHE_CONTROL
+    assert client.get("/img/Images/Mandir.jpg?w=320", headers={"If-None-Match": response.headers["ETag"],
+                                                                "Accept": "image/webp,*/*"}).status_code == 304
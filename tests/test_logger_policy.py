@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from api import logger
+
+T = "2026-10-19 10:00:00"
+
+
+@pytest.fixture(autouse=True)
+def policy(monkeypatch):
+    """Fresh windows; spooled entries are collected instead of written"""
+    spooled = []
+    monkeypatch.setattr(logger, "_windows", {})
+    monkeypatch.setattr(logger, "_spool", spooled.append)
+    monkeypatch.setattr(logger, "AUDIT_DEDUPE_WINDOW", 300)
+    monkeypatch.setattr(logger, "AUDIT_REPEAT_SAMPLE_RATE", 0.25)
+    return spooled
+
+
+def test_new_documents_are_always_logged():
+    for i in range(5):
+        assert logger._apply_policy("1.2.3.4", "Hindi", True, 1000 + i, T) == "log"
+
+
+def test_repeats_within_the_window_are_collapsed_into_one_counter(policy):
+    assert logger._apply_policy("1.2.3.4", "Hindi", True, 1000, T) == "log"
+    for i in range(3):
+        assert logger._apply_policy("1.2.3.4", "Hindi", False, 1010 + i, T) == "collapsed"
+    # Another IP or language has its own window
+    assert logger._apply_policy("1.2.3.4", "English", True, 1020, T) == "log"
+    assert policy == []
+
+    # Once the window has run out, its count is spooled as one entry
+    logger._close_windows(now=1000 + 300)
+    assert policy == [{"type": "collapsed", "time": T, "ip": "1.2.3.4", "targetLang": "Hindi",
+                       "count": 3, "windowSeconds": 300}]
+
+
+def test_repeats_without_a_window_are_sampled(monkeypatch):
+    rolls = iter([0.1, 0.9, 0.2, 0.5])
+    monkeypatch.setattr(random, "random", lambda: next(rolls))
+    decisions = [logger._apply_policy(f"10.0.0.{i}", "Hindi", False, 1000, T) for i in range(4)]
+    assert decisions == ["log", "sampledOut", "log", "sampledOut"]
+
+
+def test_dedupe_window_zero_disables_collapsing(monkeypatch):
+    monkeypatch.setattr(logger, "AUDIT_DEDUPE_WINDOW", 0)
+    monkeypatch.setattr(logger, "AUDIT_REPEAT_SAMPLE_RATE", 1.0)
+    for i in range(3):
+        assert logger._apply_policy("1.2.3.4", "Hindi", False, 1000 + i, T) == "log"
+    assert logger._windows == {}
+
+
+def test_open_windows_are_bounded(monkeypatch, policy):
+    monkeypatch.setattr(logger, "AUDIT_DEDUPE_MAX_KEYS", 2)
+    logger._apply_policy("a", "Hindi", True, 1, T)
+    logger._apply_policy("a", "Hindi", False, 2, T)  # Collapsed into a's window
+    logger._apply_policy("b", "Hindi", True, 3, T)
+    logger._apply_policy("c", "Hindi", True, 4, T)  # Closes the oldest window (a)
+    assert set(logger._windows) == {("b", "Hindi"), ("c", "Hindi")}
+    assert [entry["ip"] for entry in policy] == ["a"]
+
+
+def test_digest_counts_collapsed_and_sampled_entries_at_full_weight(tmp_path, monkeypatch):
+    from api import audit_spool
+    from api.audit_digest import summarize
+    monkeypatch.setattr(audit_spool, "SPOOL_DIR", str(tmp_path))
+    records = [
+        {"ip": "1.2.3.4", "targetLang": "Hindi", "contentHash": "aaaa"},
+        {"type": "collapsed", "ip": "1.2.3.4", "targetLang": "Hindi", "count": 3},
+        {"ip": "5.6.7.8", "targetLang": "Hindi", "contentHash": "aaaa", "sampleRate": 0.25},
+    ]
+    summary = summarize(records)
+    assert summary["conversions"] == 1 + 3 + 4
+    assert summary["uniqueIps"] == 2
@@ -0,0 +1,55 @@
+import json
+
+from api import rituals_index
+from conftest import add_posts
+from server import app
+
+
+def test_index_lists_rituals_and_news_by_name(rituals):
+    add_posts(rituals, "Rituals_b.jpg", "Rituals_a.png", "News_mela.webp", "notes.txt", "Other.jpg")
+    body, etag = rituals_index.get_index()
+    assert json.loads(body)["rituals"] == ["Rituals_a.png", "Rituals_b.jpg"]
+    assert json.loads(body)["news"] == ["News_mela.webp"]
+    assert etag.startswith('"') and len(etag) == 34  # Strong ETag
+
+
+def test_index_is_cached_until_the_folder_changes(rituals, monkeypatch):
+    add_posts(rituals, "Rituals_aarti.jpg")
+    body, etag = rituals_index.get_index()
+
+    builds = []
+    build_index = rituals_index.build_index
+    monkeypatch.setattr(rituals_index, "build_index", lambda: builds.append(1) or build_index())
+    assert rituals_index.get_index() == (body, etag)
+    assert builds == []  # Served from the cache: only the folder was stat'ed
+
+    add_posts(rituals, "News_new.jpg")
+    assert rituals_index.get_index()[1] != etag
+    assert builds == [1]
+
+
+def test_if_none_match_forms():
+    etag = '"abc"'
+    assert rituals_index.etag_matches('"abc"', etag)
+    assert rituals_index.etag_matches('W/"abc"', etag)
+    assert rituals_index.etag_matches('"zzz", "abc"', etag)
+    assert rituals_index.etag_matches('*', etag)
+    assert not rituals_index.etag_matches('"abcd"', etag)
+    assert not rituals_index.etag_matches(None, etag)
+
+
+def test_api_answers_304_until_a_post_is_added(rituals):
+    add_posts(rituals, "Rituals_aarti.jpg", "News_mela.jpg", "notes.txt")
+    client = app.test_client()
+    response = client.get("/api/rituals")
+    assert response.status_code == 200
+    assert response.get_json()["rituals"] == ["Rituals_aarti.jpg"]
+    assert response.get_json()["news"] == ["News_mela.jpg"]
+    assert response.headers["Cache-Control"] == rituals_index.INDEX_CACHE_CONTROL
+    etag = response.headers["ETag"]
+    assert client.get("/api/rituals", headers={"If-None-Match": etag}).status_code == 304
+
+    add_posts(rituals, "News_zz.jpg")
+    changed = client.get("/api/rituals", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,34 @@
+import json
+
+import build
+from api import media_manifest, rituals_index
+from conftest import add_posts
+
+
+def test_static_manifest_is_one_versioned_page(rituals):
+    add_posts(rituals, "News_mela.jpg", "Rituals_aarti.jpg")
+    media_manifest.update_manifest(str(rituals), ["News_mela.jpg", "Rituals_aarti.jpg"])
+
+    manifest = rituals_index.static_manifest()
+    assert [item["name"] for item in manifest["items"]] == ["Rituals_aarti.jpg", "News_mela.jpg"]
+    assert manifest["nextCursor"] is None
+    assert all("?v=" in item["url"] for item in manifest["items"])
+    # The same items as the API's pages
+    assert manifest["items"] == rituals_index.get_page(limit=100)[2]["items"]
+
+    # The version only moves when the listing does
+    assert rituals_index.static_manifest()["version"] == manifest["version"]
+    add_posts(rituals, "News_new.jpg")
+    assert rituals_index.static_manifest()["version"] != manifest["version"]
+
+
+def test_build_writes_the_manifest_and_rituals_json(rituals, tmp_path, monkeypatch):
+    add_posts(rituals, "Rituals_aarti.jpg")
+    monkeypatch.setattr(build, "BUILD_DIR", str(tmp_path / "dist"))
+    build.build_rituals()
+
+    with open(tmp_path / "dist" / "rituals.json", encoding="utf-8") as f:
+        written = json.load(f)
+    hashed = media_manifest.load_manifest()["files"]["Rituals_aarti.jpg"]["hash"]
+    assert written["items"][0]["url"] == "Rituals%20and%20News/Rituals_aarti.jpg?v=" + hashed
+    assert written == rituals_index.static_manifest()
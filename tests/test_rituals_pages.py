@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from api import media_manifest, rituals_index
+from conftest import add_posts
+from server import app
+
+POSTS = ["Rituals_%02d.jpg" % i for i in range(5)] + ["News_%02d.jpg" % i for i in range(3)]
+
+
+def page_names(**kwargs):
+    """All pages in order, following nextCursor"""
+    names, cursor = [], None
+    while True:
+        error, status, page = rituals_index.get_page(cursor=cursor, **kwargs)
+        assert (error, status) == (None, 200)
+        names.append([item["name"] for item in page["items"]])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return names
+
+
+def test_pages_follow_the_cursor_through_both_categories(rituals):
+    add_posts(rituals, *POSTS)
+    assert page_names(limit=3) == [POSTS[0:3], POSTS[3:5] + ["News_00.jpg"], ["News_01.jpg", "News_02.jpg"]]
+    assert page_names(limit=2, category="news") == [["News_00.jpg", "News_01.jpg"], ["News_02.jpg"]]
+
+
+def test_posts_added_meanwhile_do_not_shift_later_pages(rituals):
+    add_posts(rituals, *POSTS)
+    _, _, first = rituals_index.get_page(limit=3)
+    add_posts(rituals, "Rituals_00a.jpg")  # Sorts before the cursor: already "seen"
+    _, _, second = rituals_index.get_page(cursor=first["nextCursor"], limit=3)
+    assert [item["name"] for item in second["items"]] == ["Rituals_03.jpg", "Rituals_04.jpg", "News_00.jpg"]
+
+
+def test_items_are_versioned_once_the_manifest_lists_them(rituals):
+    add_posts(rituals, "News_mela fair.jpg")
+    item = rituals_index.get_page()[2]["items"][0]
+    assert item["category"] == "news"
+    assert item["url"] == "Rituals%20and%20News/News_mela%20fair.jpg"  # Not in the manifest yet
+
+    # Written at build time; the request path only reads it
+    manifest = media_manifest.update_manifest(str(rituals), ["News_mela fair.jpg"])
+    item = rituals_index.get_page()[2]["items"][0]
+    assert item["url"] == "Rituals%20and%20News/News_mela%20fair.jpg?v=" + manifest["files"]["News_mela fair.jpg"]["hash"]
+
+
+@pytest.mark.parametrize("args", [{"category": "other"}, {"cursor": "not base64!"},
+                                  {"cursor": "b3RoZXIveA"}, {"limit": "many"}])
+def test_bad_arguments_are_rejected(rituals, args):
+    assert rituals_index.get_page(**args)[1] == 400
+
+
+def test_page_size_is_clamped(rituals):
+    add_posts(rituals, *POSTS)
+    assert len(rituals_index.get_page(limit="0")[2]["items"]) == 1
+    assert len(rituals_index.get_page(limit="1000")[2]["items"]) == len(POSTS)
+
+
+def test_api_pages_and_their_etag(rituals):
+    add_posts(rituals, *POSTS)
+    client = app.test_client()
+    response = client.get("/api/rituals?limit=2&category=rituals")
+    assert response.status_code == 200
+    assert [item["name"] for item in response.get_json()["items"]] == POSTS[:2]
+    etag = response.headers["ETag"]
+    assert client.get("/api/rituals?limit=2&category=rituals", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/rituals?category=other").status_code == 400
+
+
+def test_manifest_describes_images_until_they_change(tmp_path):
+    from PIL import Image
+    Image.new("RGB", (40, 30), (200, 40, 40)).save(tmp_path / "a.jpg")
+    path = str(tmp_path / "manifest.json")
+
+    manifest = media_manifest.update_manifest(str(tmp_path), ["a.jpg", "missing.jpg"], path)
+    media = media_manifest.media_for(manifest, "a.jpg", str(tmp_path))
+    assert (media["width"], media["height"]) == (40, 30)
+    assert media["lqip"].startswith("data:image/jpeg;base64,")
+    assert media_manifest.media_for(manifest, "missing.jpg") is None
+    assert media_manifest.load_manifest(path) == manifest
+
+    # Replaced in place: the recorded hash no longer describes the file
+    Image.new("RGB", (10, 10)).save(tmp_path / "a.jpg")
+    os.utime(tmp_path / "a.jpg", ns=(0, 0))
+    assert media_manifest.media_for(manifest, "a.jpg", str(tmp_path)) is None
+    assert media_manifest.media_for(manifest, "a.jpg")["hash"] == media["hash"]  # Without the check
+
+    # Updating hashes it again and drops images no file uses
+    manifest = media_manifest.update_manifest(str(tmp_path), ["a.jpg"], path)
+    assert media_manifest.media_for(manifest, "a.jpg", str(tmp_path))["width"] == 10
+    assert list(manifest["images"]) == [manifest["files"]["a.jpg"]["hash"]]
@@ -0,0 +1,56 @@
+import socket
+import time
+
+import pytest
+
+from api import server_metrics
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    server_metrics.configure(workers=2, threads=4)
+    yield
+    server_metrics.configure()
+
+
+def test_queue_wait_from_the_request_start_header():
+    now = 1_760_000_000.5
+    assert server_metrics.queue_wait_ms("t=1760000000.250", now) == pytest.approx(250)
+    assert server_metrics.queue_wait_ms("1760000000250", now) == pytest.approx(250)  # Milliseconds
+    assert server_metrics.queue_wait_ms("t=1760000000250000", now) == pytest.approx(250)  # Microseconds
+    assert server_metrics.queue_wait_ms("t=1760000001", now) == 0.0  # Clock slightly ahead
+    assert server_metrics.queue_wait_ms("t=1000", now) is None  # Skewed clock
+    assert server_metrics.queue_wait_ms("t=soon", now) is None
+    assert server_metrics.queue_wait_ms(None, now) is None
+
+
+def test_requests_are_counted_per_worker():
+    first = server_metrics.request_started(f"t={time.time() - 0.2:.3f}")
+    second = server_metrics.request_started()
+    assert server_metrics.get_server_stats()["active"] == 2
+    server_metrics.request_finished(first)
+    server_metrics.request_finished(second)
+
+    stats = server_metrics.get_server_stats()
+    assert (stats["requests"], stats["active"], stats["maxActive"], stats["queued"]) == (2, 0, 2, 1)
+    assert stats["avgQueueWaitMs"] >= 100
+    assert (stats["workers"], stats["threads"]) == (2, 4)
+    assert stats["listenQueue"] is None  # No listening sockets configured
+
+
+def test_listen_queue_counts_connections_not_yet_accepted():
+    if not hasattr(socket, "TCP_INFO"):
+        pytest.skip("TCP_INFO is Linux-only")
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    clients = [socket.create_connection(listener.getsockname()) for _ in range(3)]
+    try:
+        time.sleep(0.05)
+        assert server_metrics.listen_queue(listener) == (3, 8)
+        server_metrics.configure([listener])
+        assert server_metrics.get_server_stats()["listenQueue"] == 3
+    finally:
+        for client in clients:
+            client.close()
+        listener.close()
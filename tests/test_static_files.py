@@ -0,0 +1,64 @@
+import pytest
+
+from api import audit_spool
+from server import app
+
+CSS = b"body { color: #333; }\n" * 100
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client serving a small site from tmp_path"""
+    (tmp_path / "index.html").write_bytes(b"<!doctype html><title>Thawe</title>")
+    (tmp_path / "style.css").write_bytes(CSS)
+    (tmp_path / "server.py").write_bytes(b"SECRET = 1\n")
+    (tmp_path / "events.jsonl").write_bytes(b"{}\n")
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "Images" / "photo.jpg").write_bytes(b"\xff\xd8\xff" + bytes(1000))
+    monkeypatch.setattr(app, "static_folder", str(tmp_path))
+    return app.test_client()
+
+
+def test_static_file_has_strong_etag_and_revalidates(client):
+    response = client.get("/style.css")
+    assert response.status_code == 200
+    assert response.data == CSS
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert response.headers["Cache-Control"] == "public, max-age=0, must-revalidate"
+
+    again = client.get("/style.css", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_range_request_returns_partial_content(client):
+    response = client.get("/Images/photo.jpg", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 0-9/1003"
+    assert response.data == b"\xff\xd8\xff" + bytes(7)
+
+    # A Range with a stale If-Range validator gets the whole file
+    stale = client.get("/Images/photo.jpg", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert len(stale.data) == 1003
+
+
+def test_fingerprinted_url_is_immutable(client):
+    etag = client.get("/style.css").headers["ETag"].strip('"')
+    response = client.get(f"/style.css?v={etag[:8]}")
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+
+
+def test_only_allow_listed_files_are_served(client):
+    assert client.get("/").status_code == 200
+    assert client.get("/Images/photo.jpg").status_code == 200
+    for path in ("/server.py", "/events.jsonl", "/Images/../server.py", "/.env", "/api/logger.py"):
+        assert client.get(path).status_code == 404, path
+
+
+def test_audit_spool_is_never_served(client, tmp_path, monkeypatch):
+    # Even when configured inside the static folder, under an allowed name
+    monkeypatch.setattr(audit_spool, "SPOOL_DIR", str(tmp_path / "Images"))
+    assert client.get("/Images/photo.jpg").status_code == 404
+
@@ -0,0 +1,78 @@
+import json
+import random
+from datetime import datetime, timezone
+
+from api import analytics_rollup, analytics_store
+from api.analytics_sketch import DaySketch, TDigest
+
+
+def exact(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def test_quantiles_of_a_skewed_stream():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(7, 0.6) for _ in range(20000)]  # LCP-like, in ms
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+
+    assert digest.count() == len(values)
+    for q in (0.5, 0.75, 0.95, 0.99):
+        assert abs(digest.quantile(q) - exact(values, q)) / exact(values, q) < 0.03, q
+    assert digest.quantile(0) == min(values)
+    assert digest.quantile(1) == max(values)
+    assert len(digest.centroids) <= 2 * digest.compression  # Bounded memory
+
+
+def test_empty_and_single_value():
+    assert TDigest().quantile(0.5) is None
+    digest = TDigest()
+    digest.add(120)
+    assert digest.quantile(0.95) == 120
+
+
+def test_merged_digests_match_one_digest_of_all_values():
+    rng = random.Random(3)
+    parts = [[rng.uniform(0, 1000) for _ in range(3000)] for _ in range(4)]
+    merged = TDigest()
+    for part in parts:
+        digest = TDigest()
+        for value in part:
+            digest.add(value)
+        merged.merge(TDigest.from_dict(json.loads(json.dumps(digest.to_dict()))))
+    values = [v for part in parts for v in part]
+    assert merged.count() == len(values)
+    assert abs(merged.quantile(0.95) - exact(values, 0.95)) < 15
+
+
+def test_day_sketch_keeps_one_digest_per_page_and_metric():
+    day, other = DaySketch(), DaySketch()
+    for ms in range(100):
+        day.add_vital("/", "LCP", 1000 + ms)
+        other.add_vital("/", "LCP", 3000 + ms)
+        other.add_vital("/", "INP", 80)
+    day.merge(other)
+    assert day.vitals["/"]["LCP"].count() == 200
+    assert 2900 < day.vitals["/"]["LCP"].quantile(0.75) < 3100
+    assert day.vitals["/"]["INP"].quantile(0.5) == 80
+
+
+def test_rollup_summary_reports_vitals_percentiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(analytics_rollup, "_deltas", {})
+    monkeypatch.setattr(analytics_rollup, "_sketches", {})
+    received = datetime(2026, 10, 18, 10, tzinfo=timezone.utc)
+    for i in range(1, 101):
+        analytics_rollup.add_event({"type": "vitals", "path": "/", "lcp": i * 30, "cls": i / 1000,
+                                    "inp": "fast"}, received)  # Non-numbers are ignored
+    analytics_rollup.add_event({"type": "conversion", "path": "/", "ms": 4200}, received)
+    analytics_rollup.persist()
+
+    vitals = analytics_rollup.summarize("2026-10-18", "2026-10-18")["vitals"]["/"]
+    assert vitals["lcp"]["count"] == 100
+    assert abs(vitals["lcp"]["p75"] - 2250) <= 60
+    assert abs(vitals["cls"]["p95"] - 0.095) <= 0.002
+    assert "inp" not in vitals
+    assert vitals["conversion"]["p50"] == 4200
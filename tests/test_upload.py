@@ -0,0 +1,75 @@
+import base64
+
+from api.upload import UPLOAD_LIMITS, check_upload, decode_upload, describe_upload, sniff_type
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\0" * 64
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+WEBP = b"RIFF\x40\0\0\0WEBPVP8 " + b"\0" * 64
+PDF = b"%PDF-1.7\n" + b"\0" * 64
+
+
+def test_decode_upload_rejects_invalid_base64():
+    assert decode_upload(base64.b64encode(JPEG).decode()) == JPEG
+    assert decode_upload("not base64!") is None
+
+
+def test_sniff_type_recognizes_accepted_types():
+    assert sniff_type(JPEG) == "image/jpeg"
+    assert sniff_type(PNG) == "image/png"
+    assert sniff_type(WEBP) == "image/webp"
+    assert sniff_type(PDF) == "application/pdf"
+    assert sniff_type(b"<html></html>") is None
+
+
+def test_check_upload_accepts_matching_content():
+    for data, mime_type in ((JPEG, "image/jpeg"), (PNG, "image/png"), (WEBP, "image/webp"), (PDF, "application/pdf")):
+        error, status, record = check_upload(data, mime_type)
+        assert (error, status) == (None, 200)
+        assert record["sniffedType"] == mime_type
+
+
+def test_check_upload_rejects_unsupported_type():
+    error, status, _ = check_upload(JPEG, "image/gif")
+    assert status == 415
+    assert "Unsupported" in error
+
+
+def test_check_upload_rejects_content_that_does_not_match_the_declared_type():
+    error, status, record = check_upload(PNG, "image/jpeg")
+    assert status == 415
+    assert record["sniffedType"] == "image/png"
+
+    _, status, record = check_upload(b"MZ\x90\0" + b"\0" * 64, "application/pdf")
+    assert status == 415
+    assert record["sniffedType"] is None
+
+
+def test_check_upload_enforces_size_limits():
+    big = JPEG + b"\0" * UPLOAD_LIMITS["maxBytes"]
+    _, status, _ = check_upload(big, "image/jpeg")
+    assert status == 413
+    # Chunked uploads pass their own, higher limit
+    _, status, _ = check_upload(big, "image/jpeg", max_bytes=UPLOAD_LIMITS["maxChunkedBytes"])
+    assert status == 200
+
+
+def test_check_upload_records_client_size_mismatch():
+    _, _, record = check_upload(JPEG, "image/jpeg", {"bytes": len(JPEG) + 1, "resized": True})
+    assert record["sizeMismatch"] is True
+    assert record["resized"] is True
+
+
+def test_bad_client_metadata_is_dropped():
+    meta = {"bytes": "64", "resized": "yes", "originalBytes": "x", "originalWidth": float("nan"),
+            "originalHeight": -1, "width": True, "height": [1]}
+    error, status, record = check_upload(JPEG, "image/jpeg", meta)
+    assert (error, status) == (None, 200)
+    assert record["resized"] is False
+    assert record["sizeMismatch"] is False
+    for field in ("originalBytes", "originalWidth", "originalHeight", "width", "height"):
+        assert record[field] is None, field
+    assert describe_upload(record) == "0 KB image/jpeg"
+
+    _, _, record = check_upload(JPEG, "image/jpeg", {"resized": True, "originalBytes": 4096.0,
+                                                     "width": 640, "height": 480})
+    assert describe_upload(record) == "0 KB image/jpeg (640x480), resized from 4 KB"